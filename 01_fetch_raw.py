@@ -1,28 +1,40 @@
 #!/usr/bin/env python3
 import json
-import time
-import tls_client
-from bs4 import BeautifulSoup
-from collections import defaultdict
 import os
 
+from coleta_http import LimitadorPorHost, requisitar, executar_em_paralelo
+from empresas import tags_por_empresa
+import registros_io
+from registros_io import EscritorRegistros, caminho_saida, carregar_raw
+
 # Diretório consolidado 01_03 (somente RAW)
 BASE_OUT_01_03 = "pipeline_output/01_03"
 os.makedirs(BASE_OUT_01_03, exist_ok=True)
 
-# Arquivo de saída RAW (não processado ainda)
-RAW_OUTPUT = os.path.join(BASE_OUT_01_03, "raw_infomoney.json")
+# Arquivo de saída RAW (não processado ainda): um card por linha, {"empresa", "card"}
+RAW_BASE = os.path.join(BASE_OUT_01_03, "raw_infomoney")
+RAW_OUTPUT = caminho_saida(RAW_BASE)
 
-# tag_id de Intelbras (substitua pelo valor real)
-INTB3_TAG_ID = 9999  # substitua pelo tag_id real para Intelbras
+# Modo incremental: mantém o RAW existente e acrescenta apenas cards mais novos
+# que a marca d'água (último post_id / data vistos) de cada empresa
+MODO_INCREMENTAL = False
+WATERMARK_FILE = os.path.join(BASE_OUT_01_03, "watermarks.json")
 
-# Atualiza o mapeamento para incluir Intelbras
-EMPRESAS = {
-    "TOTVS": 2309,
-    "Positivo Tecnologia": 2702,
-    "Locaweb": 1742,
-    "Intelbras": 171631
-}
+# Empresas acompanhadas: lista de {"empresa", "tag_id", "ticker", "palavras_chave"} (ver empresas.py)
+CONFIG_EMPRESAS = "empresas.json"
+
+CARDS_URL = "https://www.infomoney.com.br/wp-json/infomoney/v1/cards"
+POST_ID_INICIAL = 2784666
+
+# Paginação: a cada página o post_id mais antigo vira o cursor da próxima.
+# Para ao atingir a data de corte, o limite de páginas ou uma página vazia.
+MAX_PAGINAS = 10
+DATA_CORTE = None  # ex.: "2024-01-01" (ISO); None = sem corte por data
+
+# Coleta concorrente entre empresas (o limite de taxa por host continua valendo)
+MAX_WORKERS = 4
+REQUISICOES_POR_SEGUNDO = 1.0
+RAJADA_MAXIMA = 2
 
 headers = {
     "User-Agent": "Mozilla/5.0",
@@ -30,39 +42,173 @@ headers = {
     "Origin": "https://www.infomoney.com.br"
 }
 
-client = tls_client.Session(
-    client_identifier="chrome_120",
-    random_tls_extension_order=True
-)
+
+def id_card(card):
+    """post_id do card como inteiro (None se ausente)."""
+    try:
+        return int(card.get("post_id") or card.get("id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def chave_card(card):
+    """Chave de deduplicação: post_id, ou a URL para cards sem id (None se nenhum dos dois)."""
+    post_id = id_card(card)
+    if post_id is not None:
+        return post_id
+    url = card.get("post_permalink")
+    return ("url", url) if url else None
+
+
+def data_card(card):
+    """Data do card em ISO (string comparável), se existir."""
+    return card.get("post_date") or card.get("date")
+
+
+def card_mais_novo(card, marca):
+    """True se o card é posterior à marca d'água da empresa."""
+    if not marca:
+        return True
+    if id_card(card) is not None and marca.get("post_id") is not None:
+        return id_card(card) > marca["post_id"]
+    if data_card(card) and marca.get("data"):
+        return data_card(card) > marca["data"]
+    return True  # sem como comparar: a deduplicação por URL resolve
+
+
+def atualizar_marca(marca, cards):
+    """Avança a marca d'água com o maior post_id/data dentre os cards."""
+    marca = dict(marca or {})
+    ids = [i for i in (id_card(c) for c in cards) if i is not None]
+    datas = [d for d in (data_card(c) for c in cards) if d]
+    if ids:
+        marca["post_id"] = max(ids + ([marca["post_id"]] if marca.get("post_id") is not None else []))
+    if datas:
+        marca["data"] = max(datas + ([marca["data"]] if marca.get("data") else []))
+    return marca
+
+
+def carregar_json(caminho, padrao):
+    if os.path.exists(caminho):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return padrao
+
+
+def coletar_empresa(empresa, tag_id, marca, limitador):
+    """
+    Percorre as páginas de cards de uma tag, do mais novo para o mais antigo.
+
+    Returns:
+        (cards, erro) — cards na ordem recebida; erro é None em caso de sucesso
+    """
+    cards = []
+    cursor = POST_ID_INICIAL
+    chaves_vistas = set()
+
+    for pagina in range(MAX_PAGINAS):
+        payload = {
+            "post_id": cursor,
+            "categories": [],
+            "tags": [tag_id],
+            "showHat": False
+        }
+
+        try:
+            resp = requisitar("POST", CARDS_URL, limitador, headers=headers, json=payload)
+        except Exception as e:
+            return cards, (e if pagina == 0 else None)
+
+        if resp.status_code != 200:
+            # Falha na primeira página é erro; nas demais, fica com o que já veio
+            return cards, (f"Erro {resp.status_code}" if pagina == 0 else None)
+
+        # Cards sem id nem URL não podem ser deduplicados: são descartados
+        dados = []
+        for c in resp.json():
+            chave = chave_card(c)
+            if chave is not None and chave not in chaves_vistas:
+                chaves_vistas.add(chave)
+                dados.append(c)
+        if not dados:
+            break
+
+        cards.extend(dados)
+
+        # Critérios de parada: marca d'água (incremental), data de corte, fim do cursor
+        if MODO_INCREMENTAL and not all(card_mais_novo(c, marca) for c in dados):
+            break
+        datas = [data_card(c) for c in dados if data_card(c)]
+        if DATA_CORTE and datas and min(datas) < DATA_CORTE:
+            break
+        ids = [id_card(c) for c in dados if id_card(c) is not None]
+        if not ids or min(ids) == cursor:
+            break
+        cursor = min(ids)
+
+    if DATA_CORTE:
+        cards = [c for c in cards if not data_card(c) or data_card(c) >= DATA_CORTE]
+
+    return cards, None
+
+
+EMPRESAS = tags_por_empresa(CONFIG_EMPRESAS)
 
 print("\n🚀 Iniciando coleta RAW...\n")
+print(f"📋 {len(EMPRESAS)} empresas em {CONFIG_EMPRESAS} (até {MAX_PAGINAS} páginas cada)\n")
 
 resultado_final = {}
+marcas = {}
+raw_anterior = {}
+
+if MODO_INCREMENTAL:
+    raw_anterior = carregar_raw(RAW_BASE)
+    marcas = carregar_json(WATERMARK_FILE, {})
+    print(f"🔁 Modo incremental: {sum(len(v) for v in raw_anterior.values())} cards já coletados\n")
 
-for empresa, tag_id in EMPRESAS.items():
-    print(f"📌 Coletando: {empresa} (tag {tag_id})")
+limitador = LimitadorPorHost(REQUISICOES_POR_SEGUNDO, RAJADA_MAXIMA)
+coletas = executar_em_paralelo(
+    lambda item: coletar_empresa(item[0], item[1], marcas.get(item[0]), limitador),
+    list(EMPRESAS.items()),
+    MAX_WORKERS
+)
 
-    payload = {
-        "post_id": 2784666,
-        "categories": [],
-        "tags": [tag_id],
-        "showHat": False
-    }
+for (empresa, tag_id), (dados, erro) in zip(EMPRESAS.items(), coletas):
+    print(f"📌 {empresa} (tag {tag_id})")
 
-    resposta_empresa = client.post("https://www.infomoney.com.br/wp-json/infomoney/v1/cards", headers=headers, json=payload)
+    anteriores = raw_anterior.get(empresa, [])
 
-    if resposta_empresa.status_code == 200:
-        dados = resposta_empresa.json()
-        resultado_final[empresa] = dados
-        print(f"✔ {len(dados)} registros coletados\n")
+    if erro is None:
+        if MODO_INCREMENTAL:
+            vistos = {chave_card(c) for c in anteriores}
+            novos = [c for c in dados
+                     if card_mais_novo(c, marcas.get(empresa)) and chave_card(c) not in vistos]
+            # Cards novos primeiro (mais recentes), seguidos do histórico
+            resultado_final[empresa] = novos + anteriores
+            marcas[empresa] = atualizar_marca(marcas.get(empresa), dados)
+            print(f"✔ {len(novos)} novos registros ({len(resultado_final[empresa])} no total)\n")
+        else:
+            resultado_final[empresa] = dados
+            print(f"✔ {len(dados)} registros coletados\n")
     else:
-        print(f"❌ Erro {resposta_empresa.status_code}: não foi possível coletar.\n")
-    
-    time.sleep(1)
+        if anteriores:
+            resultado_final[empresa] = anteriores
+        print(f"❌ {erro}: não foi possível coletar.\n")
 
 # salvar RAW apenas (_sem processar_)
-with open(RAW_OUTPUT, "w", encoding="utf-8") as f:
-    json.dump(resultado_final, f, indent=2, ensure_ascii=False)
+with EscritorRegistros(RAW_OUTPUT) as escritor:
+    for empresa, cards in resultado_final.items():
+        escritor.escrever_todos({"empresa": empresa, "card": card} for card in cards)
+
+if registros_io.EXPORTAR_JSON_LEGADO:
+    with open(RAW_BASE + ".json", "w", encoding="utf-8") as f:
+        json.dump(resultado_final, f, indent=2, ensure_ascii=False)
 
 print(f"\n💾 RAW salvo em: {RAW_OUTPUT}")
+
+if MODO_INCREMENTAL:
+    with open(WATERMARK_FILE, "w", encoding="utf-8") as f:
+        json.dump(marcas, f, indent=2, ensure_ascii=False)
+    print(f"💾 Marcas d'água salvas em: {WATERMARK_FILE}")
+
 print("🎉 Etapa 1 concluída!")
\ No newline at end of file
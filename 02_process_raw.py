@@ -1,111 +1,230 @@
 import json
-import time
-import tls_client
-from bs4 import BeautifulSoup
-from collections import defaultdict
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import os
 
-RAW_FILE = os.path.join("pipeline_output","01_03","raw_infomoney.json")
-OUTPUT_FILE = os.path.join("pipeline_output","01_03","noticias_processadas.json")
-
-client = tls_client.Session(
-    client_identifier="chrome_120",
-    random_tls_extension_order=True
-)
+from coleta_http import LimitadorPorHost, requisitar, executar_em_paralelo
+from cache_html import CacheHTML, buscar_com_cache
+from empresas import construir_matcher, contar_mencoes, palavras_chave_por_empresa
+from extracao_html import extrair_campos, resolver_backend
+import registros_io
+from registros_io import EscritorRegistros, caminho_saida, carregar_raw, hash_texto, ler_registros, localizar
+
+RAW_BASE = os.path.join("pipeline_output","01_03","raw_infomoney")
+OUTPUT_BASE = os.path.join("pipeline_output","01_03","noticias_processadas")
+OUTPUT_FILE = caminho_saida(OUTPUT_BASE)
+
+# Concorrência e limite de taxa (substituem o time.sleep(1) por URL)
+MAX_WORKERS = 8
+REQUISICOES_POR_SEGUNDO = 2.0  # por host
+RAJADA_MAXIMA = 4
+
+# Cache persistente de HTML (reexecuções não baixam de novo as mesmas páginas)
+USAR_CACHE = True
+MODO_OFFLINE = False  # True: usa somente o cache, sem acessar a rede
+PASTA_CACHE = os.path.join("pipeline_output", "cache_html")
+CACHE_TAMANHO_MAXIMO = 2 * 1024 ** 3  # bytes
+CACHE_TTL_DIAS = 30  # após isso a página é revalidada com ETag/Last-Modified
+
+# Extração do HTML: "bs4" (referência), "lxml", "selectolax" ou "auto" (o mais rápido
+# instalado: selectolax > lxml > bs4). Os backends rápidos dão o mesmo texto normalizado
+# nas páginas de tests/fixtures/html; rode os testes antes de trocar o padrão.
+# O parsing roda em um pool de processos (spawn), fora das threads de download.
+BACKEND_EXTRACAO = "bs4"
+PROCESSOS_EXTRACAO = os.cpu_count() or 1
+
+# Modo incremental: só baixa notícias ainda não vistas e mescla com a saída anterior
+MODO_INCREMENTAL = False
+ESTADO_FILE = os.path.join("pipeline_output", "01_03", "estado_processamento.json")
 
 headers = {
     "User-Agent": "Mozilla/5.0",
 }
 
-# Palavras-chave por empresa (busca no corpo do texto)
-CHAVES_EMPRESAS = {
-    "TOTVS": ["totvs", "tots3"],
-    "Locaweb": ["locaweb", "lwsa3"],
-    "Intelbras": ["intelbras", "intb3", "INTB3"],
-    "Positivo Tecnologia": ["positivo", "positivo tecnologia", "posi3"]
-}
+# Palavras-chave por empresa (busca no corpo do texto), de empresas.json
+CONFIG_EMPRESAS = "empresas.json"
+CHAVES_EMPRESAS = palavras_chave_por_empresa(CONFIG_EMPRESAS)
+PADRAO_EMPRESAS, TERMO_EMPRESAS = construir_matcher(CHAVES_EMPRESAS)
+
 
+def empresas_mencionadas(conteudo):
+    """Conta, em uma única passada, as menções a cada empresa acompanhada."""
+    return contar_mencoes(conteudo, PADRAO_EMPRESAS, TERMO_EMPRESAS)
 
-def extrair_data(soup):
-    """Extrai a data real de publicação do <time datetime="">"""
-    time_tag = soup.select_one("div[data-ds-component='author-small'] time")
-    if time_tag and time_tag.get("datetime"):
-        return time_tag["datetime"]  # formato ISO
-    return None
 
+def noticia_relevante(conteudo, empresa, mencoes=None):
+    """Retorna True se o texto mencionar o nome ou ticker da empresa."""
+    if mencoes is None:
+        mencoes = empresas_mencionadas(conteudo)
+    return mencoes.get(empresa, 0) > 0
 
-def extrair_texto(soup):
-    """Coleta todo conteúdo em <p> do corpo da notícia"""
-    article = soup.find("article")
-    if not article:
-        return ""
 
-    paragraphs = article.find_all("p")
-    texto = "\n".join(p.get_text(strip=True) for p in paragraphs)
-    return texto
+def baixar_pagina(tarefa, limitador, cache):
+    """Baixa o HTML de uma notícia (ou lê do cache). Executado nas threads do pool."""
+    empresa, url, titulo = tarefa
+    try:
+        if cache is None:
+            resp = requisitar("GET", url, limitador, headers=headers)
+            return resp.text, None
 
+        def baixar(condicionais):
+            return requisitar("GET", url, limitador, headers={**headers, **condicionais})
 
-def noticia_relevante(conteudo, empresa):
-    """Retorna True se o texto mencionar o nome ou ticker da empresa."""
-    conteudo = conteudo.lower()
+        return buscar_com_cache(url, cache, baixar, offline=MODO_OFFLINE, ttl_dias=CACHE_TTL_DIAS)
+    except Exception as e:
+        return None, e
+
+
+def carregar_estado_incremental():
+    """
+    Localiza a saída anterior e carrega as chaves já conhecidas.
+
+    Returns:
+        (caminho_anterior, conhecidas, descartadas) — conhecidas é um set de
+        (empresa, url) já salvos; descartadas é {empresa: set(urls)} irrelevantes
+    """
+    caminho_anterior = localizar(OUTPUT_BASE)
+    conhecidas = set()
+    descartadas = defaultdict(set)
+
+    if caminho_anterior:
+        conhecidas = {(n.get("empresa"), n.get("url")) for n in ler_registros(caminho_anterior)}
+
+    if os.path.exists(ESTADO_FILE):
+        with open(ESTADO_FILE, "r", encoding="utf-8") as f:
+            for empresa, urls in json.load(f).get("urls_descartadas", {}).items():
+                descartadas[empresa].update(urls)
+
+    return caminho_anterior, conhecidas, descartadas
 
-    for termo in CHAVES_EMPRESAS.get(empresa, []):
-        if termo.lower() in conteudo:
-            return True
 
-    return False
+def noticias_anteriores(caminho_anterior, ja_escritas):
+    """
+    Gera as notícias da saída anterior que ainda não foram escritas.
+
+    A chave é (empresa, url): a mesma URL pode ser relevante para mais de uma empresa.
+    """
+    for noticia in ler_registros(caminho_anterior):
+        chave = (noticia.get("empresa"), noticia.get("url"))
+        if chave not in ja_escritas:
+            ja_escritas.add(chave)
+            yield noticia
 
 
 def processar_noticias():
-    print("\n📂 Carregando RAW:", RAW_FILE)
+    caminho_raw = localizar(RAW_BASE)
+    print("\n📂 Carregando RAW:", caminho_raw)
 
-    with open(RAW_FILE, "r", encoding="utf-8") as f:
-        raw_data = json.load(f)
+    raw_data = carregar_raw(RAW_BASE)
 
-    noticias_final = []
+    caminho_anterior, conhecidas, descartadas = None, set(), defaultdict(set)
+    if MODO_INCREMENTAL:
+        caminho_anterior, conhecidas, descartadas = carregar_estado_incremental()
+        print(f"🔁 Modo incremental: {len(conhecidas)} notícias já processadas")
 
+    # Monta a lista de tarefas na ordem do RAW (empresa, depois card)
+    tarefas = []
     for empresa, noticias in raw_data.items():
-        print(f"\n🔍 Processando {empresa} ({len(noticias)} notícias)...")
-
+        pendentes = 0
         for item in noticias:
             url = item.get("post_permalink")
-            titulo = item.get("post_title")
-
-            if not url:
+            if not url or (empresa, url) in conhecidas or url in descartadas[empresa]:
                 continue
+            tarefas.append((empresa, url, item.get("post_title")))
+            pendentes += 1
+        print(f"🔍 {empresa}: {len(noticias)} notícias ({pendentes} a processar)")
 
-            print(f"  🌐 Acessando: {titulo[:50]}...")
+    print(f"\n🌐 Baixando {len(tarefas)} páginas ({MAX_WORKERS} em paralelo, "
+          f"{REQUISICOES_POR_SEGUNDO}/s por host)...")
 
-            try:
-                resp = client.get(url, headers=headers)
-                soup = BeautifulSoup(resp.text, "html.parser")
-
-                data_publicacao = extrair_data(soup)
-                conteudo = extrair_texto(soup)
-
-                if noticia_relevante(conteudo, empresa):
-                    print("    ✔ Relevante — salva.")
-                    noticias_final.append({
-                        "empresa": empresa,
-                        "titulo": titulo,
-                        "url": url,
-                        "data_publicacao": data_publicacao,
-                        "conteudo": conteudo
-                    })
-                else:
-                    print("    ❌ Ignorada — não menciona a empresa.")
+    backend = resolver_backend(BACKEND_EXTRACAO)
+    print(f"🧩 Extração com {backend} em {PROCESSOS_EXTRACAO} processo(s)")
 
-            except Exception as e:
-                print(f"  ⚠ Erro ao acessar {url}: {e}")
+    limitador = LimitadorPorHost(REQUISICOES_POR_SEGUNDO, RAJADA_MAXIMA)
+    cache = CacheHTML(PASTA_CACHE, CACHE_TAMANHO_MAXIMO) if (USAR_CACHE or MODO_OFFLINE) else None
+    escritas = set()
 
-            time.sleep(1)
+    if MODO_OFFLINE:
+        print("📴 Modo offline: usando somente páginas em cache")
 
+    # Os resultados chegam na ordem das tarefas, então a saída é igual à da execução serial
+    paginas = executar_em_paralelo(lambda t: baixar_pagina(t, limitador, cache), tarefas, MAX_WORKERS)
+
+    # Cada notícia relevante é gravada assim que extraída (flush periódico)
     print("\n💾 Salvando resultado em:", OUTPUT_FILE)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(noticias_final, f, indent=2, ensure_ascii=False)
+    with EscritorRegistros(OUTPUT_FILE) as escritor, \
+            ProcessPoolExecutor(
+                max_workers=PROCESSOS_EXTRACAO,
+                # Nunca fork: as threads de download (tls_client) já estão rodando
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as extratores:
+        def gravar_extracao(empresa, url, titulo, futuro):
+            print(f"  🌐 {empresa}: {(titulo or '')[:50]}...")
+
+            try:
+                data_publicacao, conteudo = futuro.result()
+            except Exception as e:
+                print(f"  ⚠ Erro ao extrair {url}: {e}")
+                return
+
+            mencoes = empresas_mencionadas(conteudo)
+
+            if noticia_relevante(conteudo, empresa, mencoes):
+                print("    ✔ Relevante — salva.")
+                escritas.add((empresa, url))
+                escritor.escrever({
+                    "empresa": empresa,
+                    "titulo": titulo,
+                    "url": url,
+                    "data_publicacao": data_publicacao,
+                    "conteudo": conteudo,
+                    "hash_conteudo": hash_texto(conteudo),
+                    "empresas_mencionadas": mencoes
+                })
+            else:
+                print("    ❌ Ignorada — não menciona a empresa.")
+                descartadas[empresa].add(url)
+
+        # Cada página é enviada para extração assim que baixada; as extrações
+        # prontas no início da fila são gravadas na ordem original
+        pendentes = deque()
+        for (empresa, url, titulo), (html, erro) in zip(tarefas, paginas):
+            if erro is not None:
+                print(f"  ⚠ Erro ao acessar {url}: {erro}")
+            else:
+                pendentes.append((empresa, url, titulo, extratores.submit(extrair_campos, html, backend)))
+
+            while pendentes and pendentes[0][3].done():
+                gravar_extracao(*pendentes.popleft())
+
+        while pendentes:
+            gravar_extracao(*pendentes.popleft())
+
+        novas = escritor.total
+
+        # Incremental: as novas ficam na frente, seguidas do histórico sem duplicatas
+        if MODO_INCREMENTAL and caminho_anterior:
+            escritor.escrever_todos(noticias_anteriores(caminho_anterior, escritas))
+
+        total = escritor.total
+
+    if MODO_INCREMENTAL:
+        with open(ESTADO_FILE, "w", encoding="utf-8") as f:
+            json.dump({"urls_descartadas": {e: sorted(u) for e, u in descartadas.items()}},
+                      f, indent=2, ensure_ascii=False)
+
+    if registros_io.EXPORTAR_JSON_LEGADO:
+        registros_io.exportar_json_legado(OUTPUT_FILE, OUTPUT_BASE + ".json")
 
     print("\n🎉 PROCESSO CONCLUÍDO!")
-    print(f"Total de notícias relevantes: {len(noticias_final)}")
+    print(f"Total de notícias relevantes: {total}")
+    if MODO_INCREMENTAL:
+        print(f"Novas nesta execução: {novas}")
+
+    if cache is not None:
+        print(f"🗄  Cache HTML — {cache.resumo()}")
+        cache.fechar()
 
 
 if __name__ == "__main__":
@@ -2,49 +2,42 @@
 """
 03_export_csv.py
 
-Exporta apenas as 15 notícias por empresa a partir do arquivo noticias_processadas.json
-gerado em pipeline_output/01_03/noticias_processadas.json.
+Exporta apenas as 15 notícias por empresa a partir do arquivo noticias_processadas
+gerado em pipeline_output/01_03/ (JSONL ou .json legado).
 
 Saída:
-  - pipeline_output/01_03/noticias_processadas_15.json
+  - pipeline_output/01_03/noticias_processadas_15.jsonl (+ .json legado, se habilitado)
 Não gera nem o resumo nem as notas com preços.
 """
 
 import os
-import json
 from collections import defaultdict
 
-BASE_OUT = "pipeline_output/01_03"
-INPUT_JSON = os.path.join(BASE_OUT, "noticias_processadas.json")
-OUTPUT_JSON = os.path.join(BASE_OUT, "noticias_processadas_15.json")
-
-def main():
-    if not os.path.exists(INPUT_JSON):
-        print(f"Arquivo de noticias não encontrado: {INPUT_JSON}")
-        return
-
-    with open(INPUT_JSON, "r", encoding="utf-8") as f:
-        data = json.load(f)
+from registros_io import ler_registros, localizar, salvar_registros
 
-    # Espera-se uma lista de notícias (conforme 02_process_raw.py)
-    if not isinstance(data, list):
-        print("Formato de dados inesperado: esperado uma lista de notícias.")
-        return
+BASE_OUT = "pipeline_output/01_03"
+INPUT_BASE = os.path.join(BASE_OUT, "noticias_processadas")
+OUTPUT_BASE = os.path.join(BASE_OUT, "noticias_processadas_15")
 
-    # Mantém a ordem original e coleta até 15 notícias por empresa
+def filtrar_por_empresa(registros, limite=15):
+    """Mantém a ordem original e gera até `limite` notícias por empresa"""
     seen = defaultdict(int)
-    result = []
-    for item in data:
+    for item in registros:
         emp = item.get("empresa", "UNKNOWN")
-        if seen[emp] < 15:
-            result.append(item)
+        if seen[emp] < limite:
             seen[emp] += 1
+            yield item
+
+def main():
+    input_path = localizar(INPUT_BASE)
+    if input_path is None:
+        print(f"Arquivo de noticias não encontrado: {INPUT_BASE}.jsonl")
+        return
 
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
+    output_path, total = salvar_registros(filtrar_por_empresa(ler_registros(input_path)), OUTPUT_BASE)
 
-    print(f"✅ Salvou 15 notícias por empresa em: {OUTPUT_JSON}")
-    print(f"Total de notícias após filtro: {len(result)}")
+    print(f"✅ Salvou 15 notícias por empresa em: {output_path}")
+    print(f"Total de notícias após filtro: {total}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
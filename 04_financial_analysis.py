@@ -1,36 +1,60 @@
 #!/usr/bin/env python3
-import json
 from datetime import datetime, timedelta
 from dateutil import parser
+import numpy as np
 import pandas as pd
-import yfinance as yf
 import os
 
+from armazem_precos import ArmazemPrecos, criar_fonte
+from calendario_b3 import CalendarioPregao
+from empresas import tickers_por_empresa
+from registros_io import ler_registros, localizar
+from tabelas_io import caminho_tabela, esquema_janelas, salvar_tabela
+
 # ---------- CONFIG ----------
 
 OUTPUT_FOLDER = "pipeline_output/04_fetch"
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-INPUT_NEWS_FILE = os.path.join("pipeline_output", "01_03", "noticias_processadas_15.json")
-OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, "noticias_com_precos_civis.csv")
+INPUT_NEWS_BASE = os.path.join("pipeline_output", "01_03", "noticias_processadas_15")
+
+# Janela em dias civis (d±N = N dias corridos) ou em pregões (d±N = N pregões
+# da B3 a partir do primeiro pregão na data da notícia ou depois dela)
+MODO_JANELA = "civil"  # "civil" ou "pregao"
+
+# "csv" (`;`, utf-8-sig), "parquet" ou "feather" (esquema explícito, requerem pyarrow)
+FORMATO_SAIDA = "csv"
+OUTPUT_BASE = os.path.join(
+    OUTPUT_FOLDER,
+    "noticias_com_precos_civis" if MODO_JANELA == "civil" else "noticias_com_precos_pregoes"
+)
+OUTPUT_FILE = caminho_tabela(OUTPUT_BASE, FORMATO_SAIDA)
 
-TICKER_MAP = {
-    "Intelbras": "INTB3.SA",
-    "TOTVS": "TOTS3.SA",
-    "Positivo Tecnologia": "POSI3.SA",
-    "Locaweb": "LWSA3.SA",
-}
+# Ticker de cada empresa acompanhada, de empresas.json
+CONFIG_EMPRESAS = "empresas.json"
+TICKER_MAP = tickers_por_empresa(CONFIG_EMPRESAS)
 
 WINDOW_BEFORE = 2
 WINDOW_AFTER = 2
 BUFFER_DAYS = 30  # mantém uma margem grande para pegar dados históricos
 
+# Horário das publicações: normalizado para o fuso da B3. Com AJUSTAR_FECHAMENTO,
+# a data do evento é o primeiro pregão que a notícia pode ter influenciado (o
+# próprio dia, se publicada antes do fechamento em dia de pregão; senão o próximo)
+FUSO_HORARIO = "America/Sao_Paulo"
+HORARIO_FECHAMENTO = "17:00"
+AJUSTAR_FECHAMENTO = True
+
+# Armazém local de preços: só os períodos ainda não baixados vão para a fonte
+ARMAZEM_PRECOS_FILE = os.path.join(OUTPUT_FOLDER, "precos.sqlite")
+FONTE_PRECOS = "yahoo"  # "yahoo" ou "csv" (offline: um <ticker>.csv por ticker em PASTA_PRECOS_CSV)
+PASTA_PRECOS_CSV = os.path.join(OUTPUT_FOLDER, "precos_csv")
+
 
 # ---------- FUNÇÕES AUXILIARES ----------
 
 def load_news(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return list(ler_registros(filepath))
 
 
 def to_date(dt_iso):
@@ -47,105 +71,196 @@ def ticker_for_company(company_name):
     return None
 
 
-def download_prices(ticker, start_date, end_date):
-    start = (start_date - timedelta(days=BUFFER_DAYS)).strftime("%Y-%m-%d")
-    end = (end_date + timedelta(days=BUFFER_DAYS)).strftime("%Y-%m-%d")
-
-    df = yf.download(ticker, start=start, end=end, progress=False)
-
-    if df.empty:
-        return df
-
-    df.index = pd.to_datetime(df.index).date
+def add_returns(df):
     df["pct_change_prev_close"] = df["Close"].pct_change()
     df["intraday_pct"] = (df["Close"] - df["Open"]) / df["Open"]
     return df
 
 
-def get_last_valid_price(df, target_date):
-    """Retorna o preço mais recente ANTERIOR ou do próprio dia. 
-       Se não houver, retorna None.
+def load_prices(intervals):
+    """Atualiza o armazém (uma requisição por lacuna, para todos os tickers que a têm) e carrega os preços.
+
+    intervals: {ticker: (start_date, end_date)}
+    Retorna {ticker: DataFrame indexado por data}.
     """
-    if hasattr(target_date, "date"):
-        target_date = target_date.date()
+    store = ArmazemPrecos(ARMAZEM_PRECOS_FILE)
+    try:
+        source = criar_fonte(FONTE_PRECOS, PASTA_PRECOS_CSV)
+        print(f"📈 Atualizando preços de {len(intervals)} tickers (fonte: {FONTE_PRECOS})...")
+        updated = store.atualizar(intervals, source)
+        print(f"   {updated} ticker(s) com períodos novos baixados; demais vieram do armazém local")
 
-    valid_dates = df.index[df.index <= target_date]
+        return {ticker: add_returns(store.carregar(ticker, start, end))
+                for ticker, (start, end) in intervals.items()}
+    finally:
+        store.fechar()
 
-    if not valid_dates.any():
-        return None, None  # sem valores ainda
-    
-    closest = valid_dates[-1]
-    return df.loc[closest], closest
 
+def publication_timestamps(series):
+    """Timestamps de publicação no FUSO_HORARIO (tz-aware), para a série inteira.
 
-# ---------- PROCESSAMENTO PRINCIPAL ----------
+    Strings com fuso (Z ou ±HH:MM) são convertidas; sem fuso, são tratadas
+    como horário local (na hora repetida do fim do horário de verão vale a
+    primeira ocorrência; horários inexistentes avançam para o início do
+    horário de verão). Formatos que o parser ISO do pandas não aceita caem
+    no to_date, elemento a elemento.
+    """
+    texto = series.astype("string")
+    com_fuso = texto.str.contains(r"(?:Z|[+-]\d{2}:?\d{2})$", regex=True, na=False).to_numpy(dtype=bool)
+
+    timestamps = pd.Series(pd.NaT, index=series.index, dtype=f"datetime64[ns, {FUSO_HORARIO}]")
+    if com_fuso.any():
+        timestamps[com_fuso] = pd.to_datetime(
+            texto[com_fuso], format="ISO8601", utc=True, errors="coerce"
+        ).dt.tz_convert(FUSO_HORARIO)
+    if (~com_fuso).any():
+        timestamps[~com_fuso] = pd.to_datetime(
+            texto[~com_fuso], format="ISO8601", errors="coerce"
+        ).dt.tz_localize(FUSO_HORARIO, ambiguous=True, nonexistent="shift_forward")
+
+    faltando = (timestamps.isna() & texto.notna()).to_numpy(dtype=bool)
+    for indice, valor in zip(series.index[faltando], texto[faltando]):
+        dt = to_date(valor)
+        if dt is not None:
+            ts = pd.Timestamp(dt)
+            if ts.tzinfo is None:
+                timestamps[indice] = ts.tz_localize(FUSO_HORARIO, ambiguous=True, nonexistent="shift_forward")
+            else:
+                timestamps[indice] = ts.tz_convert(FUSO_HORARIO)
+    return timestamps
+
+
+def local_dates(timestamps):
+    """Dia local (FUSO_HORARIO) de cada timestamp, como datetime64[D]."""
+    return timestamps.dt.tz_localize(None).to_numpy(dtype="datetime64[D]")
+
+
+def event_dates(timestamps, calendar):
+    """Primeiro pregão que cada notícia pode ter influenciado, como datetime64[D].
+
+    Mesmo dia se publicada antes de HORARIO_FECHAMENTO em dia de pregão;
+    caso contrário, o pregão seguinte.
+    """
+    datas = local_dates(timestamps)
+    horario = timestamps.dt.tz_localize(None) - timestamps.dt.tz_localize(None).dt.normalize()
+    antes_fechamento = (horario < pd.Timedelta(f"{HORARIO_FECHAMENTO}:00")).to_numpy(dtype=bool)
 
-def analyze(news_list):
-    resultados = []
+    mesmo_dia = antes_fechamento & calendar.eh_pregao(datas)
+    return np.where(mesmo_dia, datas, calendar.deslocar(datas + np.timedelta64(1, "D"), 0))
 
-    for empresa, grupo in pd.DataFrame(news_list).groupby("empresa"):
-        ticker = ticker_for_company(empresa)
 
-        if not ticker:
-            print(f"⚠️ Ignorando {empresa}, ticker não encontrado.")
-            continue
+PRICE_FIELDS = [
+    ("open", "Open"),
+    ("close", "Close"),
+    ("pct_change_prev_close", "pct_change_prev_close"),
+    ("intraday_pct", "intraday_pct"),
+]
+
 
-        datas_publicacao = [to_date(x) for x in grupo["data_publicacao"]]
-        datas_publicacao = [d for d in datas_publicacao if d]
+def build_windows(empresa, ticker, grupo, prices, calendar=None):
+    """Monta todas as colunas d{offset} de um ticker de uma só vez (as-of por searchsorted).
+
+    A janela parte de `data_evento`: o dia-alvo é essa data + offset em dias
+    civis ou, se `calendar` for dado, o pregão de número `offset`
+    (CalendarioPregao.deslocar). Para cada dia-alvo usa o último pregão
+    ANTERIOR ou do próprio dia; `no_pregao` indica que esse pregão não é o
+    próprio dia-alvo.
+    """
+    base_dates = grupo["data_evento"].to_numpy(dtype="datetime64[D]")
+    price_dates = np.asarray(prices.index, dtype="datetime64[D]")
+    values = {coluna: prices[coluna].to_numpy(dtype=float) for _, coluna in PRICE_FIELDS}
+
+    colunas = {
+        "empresa": empresa,
+        "ticker": ticker,
+        "titulo": grupo["titulo"].to_numpy(),
+        "url": grupo["url"].to_numpy(),
+        "data_publicacao": np.datetime_as_string(grupo["data_local"].to_numpy(dtype="datetime64[D]"), unit="D"),
+        "data_evento": np.datetime_as_string(base_dates, unit="D"),
+    }
+
+    for offset in range(-WINDOW_BEFORE, WINDOW_AFTER + 1):
+        key = f"d{offset:+d}"
+        if calendar is None:
+            target_days = base_dates + np.timedelta64(offset, "D")
+        else:
+            target_days = calendar.deslocar(base_dates, offset)
+
+        posicao = np.searchsorted(price_dates, target_days, side="right") - 1
+        valido = (posicao >= 0) & ~np.isnat(target_days)
+        posicao = np.where(valido, posicao, 0)
+
+        colunas[f"{key}_date"] = np.datetime_as_string(target_days, unit="D")
+        if len(price_dates):
+            colunas[f"{key}_no_pregao"] = ~valido | (price_dates[posicao] != target_days)
+        else:
+            colunas[f"{key}_no_pregao"] = np.ones(len(target_days), dtype=bool)
+
+        for nome, coluna in PRICE_FIELDS:
+            serie = values[coluna][posicao] if len(price_dates) else np.full(len(target_days), np.nan)
+            colunas[f"{key}_{nome}"] = np.where(valido, serie, np.nan)
+
+    return pd.DataFrame(colunas)
 
-        start = min(datas_publicacao).date() - timedelta(days=WINDOW_BEFORE + BUFFER_DAYS)
-        end = max(datas_publicacao).date() + timedelta(days=WINDOW_AFTER + BUFFER_DAYS)
 
-        print(f"📈 Baixando preços para {empresa} ({ticker})...")
+# ---------- PROCESSAMENTO PRINCIPAL ----------
 
-        prices = download_prices(ticker, start, end)
+def analyze(news_list):
+    resultados = []
 
-        for _, linha in grupo.iterrows():
-            pub_dt = to_date(linha["data_publicacao"])
-            base_date = pub_dt.date()
+    # Timestamps normalizados para o fuso da B3, para todas as notícias de uma vez
+    news = pd.DataFrame(news_list)
+    timestamps = publication_timestamps(news["data_publicacao"])
+    news["data_local"] = local_dates(timestamps)
 
-            registro = {
-                "empresa": empresa,
-                "ticker": ticker,
-                "titulo": linha["titulo"],
-                "url": linha["url"],
-                "data_publicacao": base_date.isoformat()
-            }
+    # Períodos necessários por ticker, para baixar tudo de uma vez
+    grupos = []
+    intervals = {}
+    for empresa, grupo in news.groupby("empresa"):
+        ticker = ticker_for_company(empresa)
 
-            last_valid_price = None
-            last_valid_date = None
+        if not ticker:
+            print(f"⚠️ Ignorando {empresa}, ticker não encontrado.")
+            continue
 
-            for offset in range(-WINDOW_BEFORE, WINDOW_AFTER + 1):
-                target_day = base_date + timedelta(days=offset)
-                key = f"d{offset:+d}"
+        datas_publicacao = grupo["data_local"].dropna()
 
-                price_info, real_price_date = get_last_valid_price(prices, target_day)
+        start = datas_publicacao.min().date() - timedelta(days=WINDOW_BEFORE + 2 * BUFFER_DAYS)
+        end = datas_publicacao.max().date() + timedelta(days=WINDOW_AFTER + 2 * BUFFER_DAYS)
 
-                registro[f"{key}_date"] = target_day.isoformat()
+        if ticker in intervals:
+            start = min(start, intervals[ticker][0])
+            end = max(end, intervals[ticker][1])
+        intervals[ticker] = (start, end)
+        grupos.append((empresa, ticker))
 
-                # Determinar se houve pregão no dia:
-                no_pregao = (real_price_date != target_day)
-                registro[f"{key}_no_pregao"] = bool(no_pregao)
+    all_prices = load_prices(intervals)
 
-                if price_info is not None:
-                    last_valid_price = price_info
-                    last_valid_date = real_price_date
+    calendar = None
+    if (MODO_JANELA == "pregao" or AJUSTAR_FECHAMENTO) and intervals:
+        # Calendário de pregões: feriados da B3 + dias com cotação no armazém
+        observed = np.concatenate([np.asarray(p.index, dtype="datetime64[D]") for p in all_prices.values()])
+        calendar = CalendarioPregao(
+            min(start for start, _ in intervals.values()),
+            max(end for _, end in intervals.values()),
+            observed,
+        )
 
-                if last_valid_price is not None:
-                    registro[f"{key}_open"] = float(last_valid_price["Open"])
-                    registro[f"{key}_close"] = float(last_valid_price["Close"])
-                    registro[f"{key}_pct_change_prev_close"] = float(last_valid_price.get("pct_change_prev_close", 0))
-                    registro[f"{key}_intraday_pct"] = float(last_valid_price.get("intraday_pct", 0))
-                else:
-                    registro[f"{key}_open"] = None
-                    registro[f"{key}_close"] = None
-                    registro[f"{key}_pct_change_prev_close"] = None
-                    registro[f"{key}_intraday_pct"] = None
+    if AJUSTAR_FECHAMENTO and calendar is not None:
+        news["data_evento"] = event_dates(timestamps, calendar)
+    else:
+        news["data_evento"] = news["data_local"]
 
-            resultados.append(registro)
+    grupos_por_empresa = dict(list(news.groupby("empresa")))
+    for empresa, ticker in grupos:
+        resultados.append(build_windows(
+            empresa, ticker, grupos_por_empresa[empresa], all_prices[ticker],
+            calendar if MODO_JANELA == "pregao" else None
+        ))
 
-    df = pd.DataFrame(resultados)
-    df.to_csv(OUTPUT_FILE, index=False, sep=";", encoding="utf-8-sig")
+    df = pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame()
+    esquema = None if FORMATO_SAIDA == "csv" else esquema_janelas(range(-WINDOW_BEFORE, WINDOW_AFTER + 1))
+    salvar_tabela(df, OUTPUT_FILE, esquema, sep=";", encoding="utf-8-sig")
 
     print(f"\n💾 Arquivo salvo:\n   {OUTPUT_FILE}")
     return df
@@ -154,10 +269,15 @@ def analyze(news_list):
 # ---------- EXECUÇÃO ----------
 
 if __name__ == "__main__":
-    print("\n🚀 Iniciando análise (dias civis + flag de pregão)...\n")
+    if MODO_JANELA == "civil":
+        print("\n🚀 Iniciando análise (dias civis + flag de pregão)...\n")
+    else:
+        print("\n🚀 Iniciando análise (janela em pregões da B3)...\n")
     
-    if os.path.exists(INPUT_NEWS_FILE):
-        analyze(load_news(INPUT_NEWS_FILE))
+    input_news_file = localizar(INPUT_NEWS_BASE)
+
+    if input_news_file:
+        analyze(load_news(input_news_file))
         print("\n✅ Finalizado com sucesso!")
     else:
-        print(f"❌ Arquivo de entrada não encontrado: {INPUT_NEWS_FILE}")
+        print(f"❌ Arquivo de entrada não encontrado: {INPUT_NEWS_BASE}.jsonl")
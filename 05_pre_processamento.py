@@ -2,73 +2,402 @@
 # 05_text_preprocess.py - Pré-processamento para Sentimento
 # -----------------------------------------------------------
 
-import re
-import spacy
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-import nltk
+import gzip
+import itertools
 import json
+import re
+import time
+from collections import OrderedDict, deque
 import os
 
-# ---- DOWNLOAD DOS RECURSOS NECESSÁRIOS ----
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('punkt_tab', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    stop_words = set(stopwords.words('portuguese'))
-except:
-    # Fallback: lista manual de stopwords em português
-    stop_words = set([
-        'a', 'o', 'e', 'é', 'de', 'da', 'do', 'em', 'um', 'uma', 'os', 'as', 'dos', 'das',
-        'para', 'com', 'no', 'na', 'que', 'por', 'se', 'ao', 'mais', 'como', 'mas', 'foi',
-        'ao', 'ele', 'das', 'tem', 'à', 'seu', 'sua', 'ou', 'ser', 'quando', 'muito', 'há',
-        'nos', 'já', 'está', 'eu', 'também', 'só', 'pelo', 'pela', 'até', 'isso', 'ela',
-        'entre', 'era', 'depois', 'sem', 'mesmo', 'aos', 'ter', 'seus', 'quem', 'nas', 'me',
-        'esse', 'eles', 'estão', 'você', 'tinha', 'foram', 'essa', 'num', 'nem', 'suas',
-        'meu', 'às', 'minha', 'têm', 'numa', 'pelos', 'elas', 'havia', 'seja', 'qual',
-        'será', 'nós', 'tenho', 'lhe', 'deles', 'essas', 'esses', 'pelas', 'este', 'fosse',
-        'dele', 'tu', 'te', 'vocês', 'vos', 'lhes', 'meus', 'minhas', 'teu', 'tua', 'teus',
-        'tuas', 'nosso', 'nossa', 'nossos', 'nossas', 'dela', 'delas', 'esta', 'estes',
-        'estas', 'aquele', 'aquela', 'aqueles', 'aquelas', 'isto', 'aquilo'
-    ])
-
-# Carregar modelo de língua portuguesa para lematização
-nlp = spacy.load("pt_core_news_sm")
+from registros_io import hash_texto, id_registro, ler_registros, localizar, salvar_registros
+
+# ---------- CONFIGURAÇÃO -------------
+# Saídas de 05 devem ficar em uma pasta separada
+OUTPUT_FOLDER = "pipeline_output/05_pre"
+
+input_base = "./pipeline_output/01_03/noticias_processadas_15"
+output_base = OUTPUT_FOLDER + "/noticias_pre_processadas_15"
+
+# spaCy: só o lemma_ é usado, então parser e NER não são carregados
+MODELO_SPACY = "pt_core_news_sm"
+COMPONENTES_DESNECESSARIOS = ["parser", "ner", "senter"]
+
+# Lematização em lote com nlp.pipe (N_PROCESSOS_SPACY > 1 usa vários núcleos)
+N_PROCESSOS_SPACY = 1
+BATCH_SIZE_SPACY = 64
+
+# Cache de lemas por texto: a mesma notícia costuma aparecer para várias empresas
+# e em várias execuções. A chave é o hash do texto já limpo (o que vai ao spaCy),
+# e o valor é a lista de lemas do texto inteiro, então o resultado é o mesmo do
+# modo sem cache. LRU limitado (em número de textos) e persistido entre execuções;
+# descartado se o modelo spaCy (nome, versão ou componentes) mudar.
+USAR_CACHE_LEMAS = True
+CAPACIDADE_CACHE_LEMAS = 20_000
+CACHE_LEMAS_FILE = os.path.join(OUTPUT_FOLDER, "cache_lemas.json.gz")
+
+# Incremental: reaproveita o conteudo_processado da saída anterior para notícias
+# com mesma URL, mesmo hash do conteúdo e mesma assinatura do pré-processamento
+# (modelo spaCy e versão, stopwords, tokenizador, limpeza);
+# só as novas/alteradas são processadas
+MODO_INCREMENTAL = False
+
+# Benchmark: compara o laço artigo a artigo (pipeline completo) com o modo em lote
+MODO_BENCHMARK = False
+AMOSTRA_BENCHMARK = 200
+
+# Modo offline: nunca tenta baixar recursos (usa a lista de stopwords embutida
+# e um tokenizador por espaços se os dados do NLTK não estiverem instalados)
+MODO_OFFLINE = False
+
+# Lista embutida de stopwords em português (fallback sem NLTK)
+STOPWORDS_EMBUTIDAS = frozenset([
+    'a', 'o', 'e', 'é', 'de', 'da', 'do', 'em', 'um', 'uma', 'os', 'as', 'dos', 'das',
+    'para', 'com', 'no', 'na', 'que', 'por', 'se', 'ao', 'mais', 'como', 'mas', 'foi',
+    'ao', 'ele', 'das', 'tem', 'à', 'seu', 'sua', 'ou', 'ser', 'quando', 'muito', 'há',
+    'nos', 'já', 'está', 'eu', 'também', 'só', 'pelo', 'pela', 'até', 'isso', 'ela',
+    'entre', 'era', 'depois', 'sem', 'mesmo', 'aos', 'ter', 'seus', 'quem', 'nas', 'me',
+    'esse', 'eles', 'estão', 'você', 'tinha', 'foram', 'essa', 'num', 'nem', 'suas',
+    'meu', 'às', 'minha', 'têm', 'numa', 'pelos', 'elas', 'havia', 'seja', 'qual',
+    'será', 'nós', 'tenho', 'lhe', 'deles', 'essas', 'esses', 'pelas', 'este', 'fosse',
+    'dele', 'tu', 'te', 'vocês', 'vos', 'lhes', 'meus', 'minhas', 'teu', 'tua', 'teus',
+    'tuas', 'nosso', 'nossa', 'nossos', 'nossas', 'dela', 'delas', 'esta', 'estes',
+    'estas', 'aquele', 'aquela', 'aqueles', 'aquelas', 'isto', 'aquilo'
+])
+
+# ---- RECURSOS (carregados sob demanda, no primeiro uso) ----
+_recursos = {}
+
+
+# Garante um recurso do NLTK: procura localmente e só baixa se faltar (e não offline)
+def recurso_nltk(caminho, pacote):
+    import nltk
+
+    try:
+        nltk.data.find(caminho)
+        return True
+    except LookupError:
+        if MODO_OFFLINE:
+            return False
+    nltk.download(pacote, quiet=True)
+    try:
+        nltk.data.find(caminho)
+        return True
+    except LookupError:
+        return False
+
+
+def obter_stopwords():
+    if "stopwords" not in _recursos:
+        stop_words = STOPWORDS_EMBUTIDAS
+        if recurso_nltk("corpora/stopwords", "stopwords"):
+            from nltk.corpus import stopwords
+            stop_words = frozenset(stopwords.words('portuguese'))
+        _recursos["stopwords"] = stop_words
+    return _recursos["stopwords"]
+
+
+def obter_tokenizador():
+    if "tokenizador" not in _recursos:
+        # Depois da limpeza só restam letras, dígitos e espaços: sem os dados
+        # do punkt, separar por espaços é equivalente
+        tokenizador = str.split
+        if recurso_nltk("tokenizers/punkt_tab/english", "punkt_tab") or \
+                recurso_nltk("tokenizers/punkt", "punkt"):
+            from nltk.tokenize import word_tokenize
+            tokenizador = word_tokenize
+        _recursos["tokenizador"] = tokenizador
+    return _recursos["tokenizador"]
+
+
+# Modelo de língua portuguesa para lematização (sem parser/NER)
+def obter_nlp():
+    if "nlp" not in _recursos:
+        import spacy
+
+        try:
+            nlp = spacy.load(MODELO_SPACY, exclude=COMPONENTES_DESNECESSARIOS)
+        except OSError as erro:
+            # Não instala pacotes como efeito colateral: o modelo vem do setup
+            raise OSError(f"Modelo spaCy não instalado: {MODELO_SPACY} "
+                          f"(instale com: python -m spacy download {MODELO_SPACY})") from erro
+        _recursos["nlp"] = nlp
+    return _recursos["nlp"]
+
+
+# Regex compilada uma única vez
+PADRAO_NAO_PALAVRA = re.compile(r"[^a-zA-Zá-úÁ-Ú0-9 ]")
+
+
+# Limpeza e remoção de stopwords (etapa anterior ao spaCy)
+def limpar_tokens(texto):
+    texto = PADRAO_NAO_PALAVRA.sub(" ", texto.lower())
+    tokens = obter_tokenizador()(texto)
+    stop_words = obter_stopwords()
+    return [palavra for palavra in tokens if palavra not in stop_words]
+
+
+# Cache LRU hash do texto limpo -> lemas, com persistência opcional em disco
+class CacheLemas:
+    def __init__(self, capacidade=CAPACIDADE_CACHE_LEMAS, caminho=None, modelo=None):
+        self.capacidade = capacidade
+        self.caminho = caminho
+        self.modelo = modelo
+        self.lemas = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if caminho and os.path.exists(caminho):
+            with gzip.open(caminho, "rt", encoding="utf-8") as f:
+                dados = json.load(f)
+            if dados.get("modelo") == modelo:
+                self.lemas.update(dados["lemas"])
+
+    def obter(self, chave):
+        lemas = self.lemas.get(chave)
+        if lemas is None:
+            self.misses += 1
+            return None
+        self.lemas.move_to_end(chave)
+        self.hits += 1
+        return list(lemas)
+
+    def gravar(self, chave, lemas):
+        self.lemas[chave] = list(lemas)
+        self.lemas.move_to_end(chave)
+        if len(self.lemas) > self.capacidade:
+            self.lemas.popitem(last=False)
+
+    def salvar(self):
+        if not self.caminho:
+            return
+        temporario = self.caminho + ".parcial"
+        with gzip.open(temporario, "wt", encoding="utf-8") as f:
+            json.dump({"modelo": self.modelo, "lemas": self.lemas}, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def resumo(self):
+        total = self.hits + self.misses
+        taxa = self.hits / total * 100 if total else 0.0
+        return (f"hits: {self.hits} | misses: {self.misses} | aproveitamento: {taxa:.1f}% "
+                f"| textos: {len(self.lemas)}")
+
+
+def identificacao_modelo():
+    nlp = obter_nlp()
+    meta = nlp.meta
+    return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}:{','.join(nlp.pipe_names)}"
+
+
+# Hash de tudo o que define o conteudo_processado; muda se qualquer item mudar.
+# A versão do modelo vem dos metadados do pacote, sem carregar o spaCy
+def assinatura_preprocessamento():
+    from importlib import metadata
+
+    try:
+        versao_modelo = metadata.version(MODELO_SPACY)
+    except metadata.PackageNotFoundError:
+        versao_modelo = None
+    configuracao = {
+        "modelo": MODELO_SPACY,
+        "versao_modelo": versao_modelo,
+        "componentes_excluidos": sorted(COMPONENTES_DESNECESSARIOS),
+        "stopwords": sorted(obter_stopwords()),
+        "tokenizador": obter_tokenizador().__name__,
+        "limpeza": PADRAO_NAO_PALAVRA.pattern,
+    }
+    return hash_texto(json.dumps(configuracao, ensure_ascii=False, sort_keys=True))
+
 
 # Função principal
 def preprocessar_texto(texto):
-    texto = texto.lower()
-    texto = re.sub(r"[^a-zA-Zá-úÁ-Ú0-9 ]", " ", texto)
-    tokens = word_tokenize(texto)
-    tokens = [palavra for palavra in tokens if palavra not in stop_words]
-    doc = nlp(" ".join(tokens))
+    doc = obter_nlp()(" ".join(limpar_tokens(texto)))
     return [token.lemma_ for token in doc]
 
-# ---------- CONFIGURAÇÃO -------------
-# Saídas de 05 devem ficar em uma pasta separada
-OUTPUT_FOLDER = "pipeline_output/05_pre"
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-# ----- LEITURA DO ARQUIVO DE NOTÍCIAS -----
-input_path = "./pipeline_output/01_03/noticias_processadas_15.json"
-output_path = OUTPUT_FOLDER + "/noticias_pre_processadas_15.json"
+# ----- PRÉ-PROCESSAMENTO (em lote, preservando a ordem) -----
+# Cada notícia acompanha seu texto como contexto (as_tuples), então a saída
+# sai na mesma ordem da entrada mesmo com vários processos
+def preprocessar_noticias(noticias, n_processos=None, batch_size=None):
+    entradas = (
+        (" ".join(limpar_tokens(noticia.get("conteudo", ""))), noticia)
+        for noticia in noticias
+    )
+    docs = obter_nlp().pipe(
+        entradas,
+        as_tuples=True,
+        n_process=n_processos or N_PROCESSOS_SPACY,
+        batch_size=batch_size or BATCH_SIZE_SPACY,
+    )
+    for doc, noticia in docs:
+        noticia["conteudo_processado"] = [token.lemma_ for token in doc]
+        yield noticia
+
+
+# Variante com cache: textos já vistos (mesmo texto limpo) saem do cache; só os
+# demais vão ao nlp.pipe, e a ordem de entrada é preservada
+def preprocessar_noticias_com_cache(noticias, cache, n_processos=None, batch_size=None):
+    fila = deque()  # (noticia, chave) na ordem de entrada; chave None = veio do cache
+
+    def pendentes():
+        for noticia in noticias:
+            texto = " ".join(limpar_tokens(noticia.get("conteudo", "")))
+            chave = hash_texto(texto)
+            lemas = cache.obter(chave)
+            if lemas is not None:
+                noticia["conteudo_processado"] = lemas
+                fila.append((noticia, None))
+            else:
+                fila.append((noticia, chave))
+                yield texto, noticia
+
+    docs = obter_nlp().pipe(
+        pendentes(),
+        as_tuples=True,
+        n_process=n_processos or N_PROCESSOS_SPACY,
+        batch_size=batch_size or BATCH_SIZE_SPACY,
+    )
+    for doc, noticia in docs:
+        while fila[0][1] is None:
+            yield fila.popleft()[0]
+        _, chave = fila.popleft()  # a própria `noticia`
+        noticia["conteudo_processado"] = [token.lemma_ for token in doc]
+        cache.gravar(chave, noticia["conteudo_processado"])
+        yield noticia
+
+    while fila:
+        yield fila.popleft()[0]
+
+
+# ----- INCREMENTAL -----
+# {(empresa, url): (hash_conteudo, conteudo_processado)} da execução anterior,
+# só das notícias processadas com a mesma `assinatura`
+def carregar_anteriores(base, assinatura):
+    caminho = localizar(base)
+    if caminho is None:
+        return {}
+    anteriores = {}
+    for noticia in ler_registros(caminho):
+        if "conteudo_processado" in noticia and noticia.get("assinatura_preprocessamento") == assinatura:
+            hash_conteudo = noticia.get("hash_conteudo") or hash_texto(noticia.get("conteudo", ""))
+            anteriores[id_registro(noticia)] = (hash_conteudo, noticia["conteudo_processado"])
+    return anteriores
+
+
+# Envia a `processar` apenas as notícias novas ou alteradas e intercala as
+# reaproveitadas na ordem original. `contagem` recebe o total de cada grupo.
+def processar_incremental(noticias, anteriores, processar, contagem):
+    fila = deque()  # (noticia, reaproveitada) na ordem de entrada
+
+    def novas():
+        for noticia in noticias:
+            noticia["hash_conteudo"] = noticia.get("hash_conteudo") or hash_texto(noticia.get("conteudo", ""))
+            anterior = anteriores.get(id_registro(noticia))
+            if anterior is not None and anterior[0] == noticia["hash_conteudo"]:
+                noticia["conteudo_processado"] = anterior[1]
+                contagem["reaproveitadas"] += 1
+                fila.append((noticia, True))
+            else:
+                contagem["processadas"] += 1
+                fila.append((noticia, False))
+                yield noticia
+
+    for processada in processar(novas()):
+        while fila[0][1]:
+            yield fila.popleft()[0]
+        fila.popleft()  # a própria `processada`
+        yield processada
+
+    while fila:
+        yield fila.popleft()[0]
+
+
+# Benchmark: artigos/segundo do laço original (pipeline completo) vs nlp.pipe sem parser/NER
+def executar_benchmark(noticias):
+    amostra = [dict(n) for n in noticias[:AMOSTRA_BENCHMARK]]
+    print(f"⏱  Benchmark com {len(amostra)} artigos (n_process={N_PROCESSOS_SPACY}, batch_size={BATCH_SIZE_SPACY})")
+
+    import spacy
+
+    nlp_completo = spacy.load(MODELO_SPACY)
+    inicio = time.perf_counter()
+    laco = [[t.lemma_ for t in nlp_completo(" ".join(limpar_tokens(n.get("conteudo", ""))))] for n in amostra]
+    tempo_laco = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    em_lote = [n["conteudo_processado"] for n in preprocessar_noticias(amostra)]
+    tempo_lote = time.perf_counter() - inicio
+
+    iguais = sum(a == b for a, b in zip(laco, em_lote))
+    print(f"   Laço artigo a artigo: {len(amostra) / tempo_laco:.2f} artigos/s")
+    print(f"   nlp.pipe em lote:     {len(amostra) / tempo_lote:.2f} artigos/s ({tempo_laco / tempo_lote:.1f}x)")
+    print(f"   Lemas idênticos: {iguais}/{len(amostra)} artigos\n")
+
+
+def main():
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+
+    # ----- LEITURA DO ARQUIVO DE NOTÍCIAS -----
+    input_path = localizar(input_base)
+    if input_path is None:
+        raise FileNotFoundError(f"Arquivo não encontrado: {input_base}.jsonl")
+
+    # Nada a processar: sai sem carregar NLTK/spaCy
+    registros = ler_registros(input_path)
+    primeiro = next(registros, None)
+    if primeiro is None:
+        output_path, _ = salvar_registros([], output_base)
+        print(f"Nenhuma notícia para processar. Arquivo salvo em: {output_path}")
+        return
+    registros = itertools.chain([primeiro], registros)
+
+    if MODO_BENCHMARK:
+        executar_benchmark(list(ler_registros(input_path)))
 
+    # ----- SALVAR -----
+    inicio = time.perf_counter()
+    cache = None
 
-if not os.path.exists(input_path):
-    raise FileNotFoundError(f"Arquivo não encontrado: {input_path}")
+    # O modelo (e o cache de lemas) só é carregado quando chega a primeira notícia a processar
+    def processar(noticias):
+        nonlocal cache
+        primeira = next(noticias, None)
+        if primeira is None:
+            return
+        noticias = itertools.chain([primeira], noticias)
+        if USAR_CACHE_LEMAS:
+            cache = CacheLemas(CAPACIDADE_CACHE_LEMAS, CACHE_LEMAS_FILE, identificacao_modelo())
+            yield from preprocessar_noticias_com_cache(noticias, cache)
+        else:
+            yield from preprocessar_noticias(noticias)
 
-with open(input_path, "r", encoding="utf-8") as f:
-    noticias = json.load(f)
+    # Cada notícia leva a assinatura com que foi processada (base da reutilização)
+    assinatura = assinatura_preprocessamento()
 
+    def assinar(noticias):
+        for noticia in noticias:
+            noticia["assinatura_preprocessamento"] = assinatura
+            yield noticia
 
-# ----- PRÉ-PROCESSAMENTO -----
-for noticia in noticias:
-    conteudo = noticia.get("conteudo", "")
-    noticia["conteudo_processado"] = preprocessar_texto(conteudo)
+    contagem = {"reaproveitadas": 0, "processadas": 0}
+    if MODO_INCREMENTAL:
+        anteriores = carregar_anteriores(output_base, assinatura)
+        noticias = processar_incremental(registros, anteriores, processar, contagem)
+    else:
+        noticias = processar(registros)
+    noticias = assinar(noticias)
+    output_path, total = salvar_registros(noticias, output_base)
+    duracao = time.perf_counter() - inicio
 
+    print(f"Processamento concluído! Arquivo salvo em: {output_path}")
+    print(f"{total} notícias em {duracao:.1f}s ({total / max(duracao, 1e-9):.2f} artigos/s)")
+    if MODO_INCREMENTAL:
+        print(f"Incremental: {contagem['processadas']} novas/alteradas | "
+              f"{contagem['reaproveitadas']} reaproveitadas da execução anterior")
+    if cache is not None:
+        cache.salvar()
+        print(f"Cache de lemas: {cache.resumo()}")
 
-# ----- SALVAR -----
-with open(output_path, "w", encoding="utf-8") as f:
-    json.dump(noticias, f, ensure_ascii=False, indent=2)
 
-print(f"Processamento concluído! Arquivo salvo em: {output_path}")
+if __name__ == "__main__":
+    main()
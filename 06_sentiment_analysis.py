@@ -13,16 +13,24 @@ Funcionalidades:
 """
 
 import json
+import multiprocessing
 import os
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+import sqlite3
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
 import torch
 from tqdm import tqdm
 
+from inferencia_onnx import carregar_analisador, verificar_paridade
+from registros_io import caminho_saida, hash_texto, id_registro, ler_registros, localizar, salvar_registros
+
 # ---------- CONFIGURAÇÃO ----------
-INPUT_ORIGINAL = "pipeline_output/01_03/noticias_processadas_15.json"
-INPUT_PREPROCESSED = "pipeline_output/05_pre/noticias_pre_processadas_15.json"
+INPUT_ORIGINAL = "pipeline_output/01_03/noticias_processadas_15"
+INPUT_PREPROCESSED = "pipeline_output/05_pre/noticias_pre_processadas_15"
 OUTPUT_FOLDER = "pipeline_output/06_sentiment"
-OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, "noticias_com_sentimentos.json")
+OUTPUT_BASE = os.path.join(OUTPUT_FOLDER, "noticias_com_sentimentos")
+OUTPUT_FILE = caminho_saida(OUTPUT_BASE)
 COMPARACAO_FILE = os.path.join(OUTPUT_FOLDER, "comparacao_preprocessamento.txt")
 
 # Criar pasta de saída
@@ -33,14 +41,48 @@ os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 # 1. "neuralmind/bert-base-portuguese-cased" - BERT base português
 # 2. "lxyuan/distilbert-base-multilingual-cased-sentiments-student" - Multilingual
 MODEL_NAME = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
-
-print(f"\n{'='*60}")
-print("ANÁLISE DE SENTIMENTOS COM BERT")
-print(f"{'='*60}\n")
-print(f"Modelo: {MODEL_NAME}")
-print(f"Entrada original: {INPUT_ORIGINAL}")
-print(f"Entrada pré-processada: {INPUT_PREPROCESSED}")
-print(f"Saída: {OUTPUT_FILE}\n")
+MODEL_REVISION = "main"  # fixe um commit do Hub para resultados reprodutíveis
+
+# Backend de inferência: "pytorch" (referência), "pytorch_int8", "onnx" ou "onnx_int8"
+# Os backends ONNX exportam o modelo uma única vez para PASTA_MODELOS_ONNX
+BACKEND_INFERENCIA = "pytorch"
+PASTA_MODELOS_ONNX = os.path.join(OUTPUT_FOLDER, "modelos_onnx")
+VERIFICAR_PARIDADE = False  # compara o backend com o PyTorch antes de analisar (se reprovar, usa o PyTorch)
+
+# Modo cliente: se definido, os textos são enviados ao servico_sentimento.py
+# (modelo já carregado) em vez de carregar o modelo neste processo
+URL_SERVICO = None  # ex.: "http://127.0.0.1:8765"
+TEXTOS_POR_REQUISICAO = 64
+REQUISICOES_SIMULTANEAS = 4  # o serviço junta requisições concorrentes em micro-lotes
+
+# Cache de resultados: textos já analisados com o mesmo modelo/configuração
+# não passam de novo pelo modelo (que só é carregado se houver texto novo)
+USAR_CACHE_SENTIMENTOS = True
+CACHE_SENTIMENTOS_FILE = os.path.join(OUTPUT_FOLDER, "cache_sentimentos.sqlite")
+
+# Inferência em lote: textos ordenados por número de tokens e agrupados em
+# lotes de tamanho fixo, para que o padding dentro de cada lote seja mínimo
+BATCH_SIZE = 16
+THREADS_INTRA_OP = os.cpu_count() or 1  # threads do PyTorch por operação
+
+# Vários processos: as notícias são divididas entre PROCESSOS_INFERENCIA workers,
+# cada um com THREADS_POR_PROCESSO threads (processos x threads ≈ núcleos).
+# Os workers são iniciados com spawn e cada um carrega o próprio modelo: fork
+# depois de o PyTorch (pools de threads OpenMP, CUDA) ter sido inicializado no
+# processo pai é causa conhecida de travamentos.
+PROCESSOS_INFERENCIA = 1
+THREADS_POR_PROCESSO = max(1, (os.cpu_count() or 1) // PROCESSOS_INFERENCIA)
+MINIMO_TEXTOS_POR_PROCESSO = 32  # abaixo disso não compensa abrir o pool
+
+# Textos longos: em vez de truncar em 512 tokens, divide em janelas deslizantes
+# sobrepostas; todas as janelas de todas as notícias compartilham os mesmos lotes
+MODO_JANELAS = False
+SOBREPOSICAO_TOKENS = 128
+AGREGACAO_JANELAS = "ponderada"  # "media", "ponderada" (por nº de tokens) ou "max_confianca"
+
+# Benchmark: compara a análise texto a texto com a análise em lote
+MODO_BENCHMARK = False
+AMOSTRA_BENCHMARK = 64
 
 # ---------- FUNÇÕES AUXILIARES ----------
 
@@ -93,10 +135,405 @@ def analisar_sentimento(texto, analyzer, max_length=512):
         return 0.0
 
 
-def carregar_noticias(filepath):
-    """Carrega notícias do arquivo JSON"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+def pontuar_ids(lista_ids, analyzer, batch_size=BATCH_SIZE, desc="Processando"):
+    """
+    Classifica sequências de token ids em lotes agrupados por comprimento
+
+    Args:
+        lista_ids: lista de listas de token ids (já truncadas, com tokens especiais)
+        analyzer: pipeline do transformers (usa seu tokenizer e modelo)
+        batch_size: sequências por chamada ao modelo
+
+    Returns:
+        list: (label, score) na mesma ordem de `lista_ids`
+    """
+    tokenizer = analyzer.tokenizer
+    model = analyzer.model
+    id2label = model.config.id2label
+
+    # Ordenar por comprimento: lotes com sequências parecidas quase não têm padding
+    ordem = sorted(range(len(lista_ids)), key=lambda i: len(lista_ids[i]))
+    resultados = [None] * len(lista_ids)
+
+    with torch.inference_mode():
+        for inicio in tqdm(range(0, len(ordem), batch_size), desc=desc, disable=desc is None):
+            lote = ordem[inicio:inicio + batch_size]
+            try:
+                entradas = tokenizer.pad({"input_ids": [lista_ids[i] for i in lote]}, return_tensors="pt")
+                probs = torch.softmax(model(**entradas).logits, dim=-1)
+                scores, indices = probs.max(dim=-1)
+                for i, score, indice in zip(lote, scores.tolist(), indices.tolist()):
+                    resultados[i] = (id2label[indice], score)
+            except Exception as e:
+                print(f"⚠️  Erro ao analisar lote: {str(e)[:100]}")
+                for i in lote:
+                    resultados[i] = ("neutral", 0.0)
+
+    return resultados
+
+
+def gerar_janelas(ids, tokenizer, max_length=512, sobreposicao=SOBREPOSICAO_TOKENS):
+    """
+    Divide uma sequência de token ids (sem tokens especiais) em janelas sobrepostas
+
+    Returns:
+        list: janelas prontas para o modelo, cada uma com [CLS]/[SEP]
+    """
+    tamanho = max_length - 2
+    passo = max(tamanho - sobreposicao, 1)
+    cls, sep = tokenizer.cls_token_id, tokenizer.sep_token_id
+
+    janelas = []
+    inicio = 0
+    while True:
+        janelas.append([cls] + ids[inicio:inicio + tamanho] + [sep])
+        if inicio + tamanho >= len(ids):
+            return janelas
+        inicio += passo
+
+
+def agregar_janelas(resultados, pesos, estrategia=AGREGACAO_JANELAS):
+    """
+    Combina os resultados das janelas de um texto em um único sentimento
+
+    Args:
+        resultados: lista de (label, score) por janela
+        pesos: número de tokens de cada janela
+        estrategia: "media", "ponderada" ou "max_confianca"
+
+    Returns:
+        float: sentimento entre -10 e +10
+    """
+    valores = [mapear_sentimento_para_escala(label, score) for label, score in resultados]
+
+    if estrategia == "max_confianca":
+        mais_confiante = max(range(len(resultados)), key=lambda i: resultados[i][1])
+        return valores[mais_confiante]
+    if estrategia == "media":
+        return sum(valores) / len(valores)
+    return sum(v * p for v, p in zip(valores, pesos)) / sum(pesos)
+
+
+def analisar_sentimentos_detalhado(textos, analyzer, batch_size=BATCH_SIZE, max_length=512,
+                                   desc="Processando", janelas=None):
+    """
+    Analisa textos em lote e devolve o detalhe de cada resultado
+
+    Args:
+        textos: lista de strings
+        analyzer: pipeline do transformers
+        batch_size: textos (ou janelas) por lote
+        max_length: tamanho máximo de tokens (BERT = 512)
+        janelas: se True, analisa o texto inteiro em janelas (padrão: MODO_JANELAS)
+
+    Returns:
+        list: (label, score, sentimento) na ordem de `textos`. Textos vazios
+        resultam em (None, None, 0.0); no modo janelas, label/score são os
+        da janela mais confiante e o sentimento é o agregado.
+    """
+    if janelas is None:
+        janelas = MODO_JANELAS
+
+    detalhes = [(None, None, 0.0)] * len(textos)
+    validos = [i for i, texto in enumerate(textos) if texto and texto.strip()]
+    if not validos:
+        return detalhes
+
+    tokenizer = analyzer.tokenizer
+    textos_validos = [textos[i] for i in validos]
+
+    if not janelas:
+        # Tokeniza tudo de uma vez (tokenizer rápido) com o mesmo truncamento do pipeline
+        lista_ids = tokenizer(textos_validos, truncation=True, max_length=max_length)["input_ids"]
+
+        for i, (label, score) in zip(validos, pontuar_ids(lista_ids, analyzer, batch_size, desc)):
+            detalhes[i] = (label, score, round(mapear_sentimento_para_escala(label, score), 2))
+        return detalhes
+
+    # Tokeniza uma única vez, sem truncar, e achata as janelas de todos os textos
+    todas_janelas = []
+    dono = []
+    for i, ids in zip(validos, tokenizer(textos_validos, add_special_tokens=False)["input_ids"]):
+        for janela in gerar_janelas(ids, tokenizer, max_length, SOBREPOSICAO_TOKENS):
+            todas_janelas.append(janela)
+            dono.append(i)
+
+    por_texto = {}
+    for i, janela, resultado in zip(dono, todas_janelas, pontuar_ids(todas_janelas, analyzer, batch_size, desc)):
+        resultados, pesos = por_texto.setdefault(i, ([], []))
+        resultados.append(resultado)
+        pesos.append(len(janela))
+
+    for i, (resultados, pesos) in por_texto.items():
+        label, score = max(resultados, key=lambda r: r[1])
+        detalhes[i] = (label, score, round(agregar_janelas(resultados, pesos, AGREGACAO_JANELAS), 2))
+
+    return detalhes
+
+
+def analisar_sentimentos_em_lote(textos, analyzer, batch_size=BATCH_SIZE, max_length=512,
+                                 desc="Processando", janelas=None):
+    """
+    Versão em lote de analisar_sentimento: mesma saída, uma chamada ao modelo por lote
+
+    Returns:
+        list: sentimentos entre -10 e +10, na ordem de `textos`
+    """
+    detalhes = analisar_sentimentos_detalhado(textos, analyzer, batch_size, max_length, desc, janelas)
+    return [sentimento for _, _, sentimento in detalhes]
+
+
+# Analisador visto pelos workers: carregado no initializer
+_ANALISADOR_WORKER = None
+
+
+def _iniciar_worker(threads, backend, model_name, revisao, pasta):
+    global _ANALISADOR_WORKER
+    torch.set_num_threads(threads)
+    _ANALISADOR_WORKER = carregar_analisador(backend, model_name, revisao, pasta, threads)
+
+
+def _analisar_fatia(args):
+    numero, textos = args
+    return analisar_sentimentos_detalhado(textos, _ANALISADOR_WORKER, desc=f"Worker {numero}")
+
+
+def analisar_em_processos(textos, obter_analyzer, processos=None, threads=None, desc="Processando"):
+    """
+    Divide os textos entre vários processos e junta os resultados na ordem original
+
+    Args:
+        textos: lista de strings
+        obter_analyzer: função sem argumentos que retorna o analisador; só é chamada
+            quando não há divisão (com vários processos, cada worker carrega o seu
+            e o processo pai não carrega nenhum)
+        processos: número de workers (padrão: PROCESSOS_INFERENCIA)
+        threads: threads do PyTorch por worker (padrão: THREADS_POR_PROCESSO)
+
+    Returns:
+        list: (label, score, sentimento) na ordem de `textos`
+    """
+    processos = processos or PROCESSOS_INFERENCIA
+    threads = threads or THREADS_POR_PROCESSO
+    processos = min(processos, len(textos) // MINIMO_TEXTOS_POR_PROCESSO)
+
+    if processos <= 1:
+        return analisar_sentimentos_detalhado(textos, obter_analyzer(), desc=desc)
+
+    # Fatias intercaladas por comprimento: cada worker recebe textos curtos e longos
+    ordem = sorted(range(len(textos)), key=lambda i: len(textos[i] or ""))
+    fatias = [ordem[n::processos] for n in range(processos)]
+
+    # Nunca fork: o PyTorch já foi importado (e possivelmente inicializado) aqui
+    contexto = multiprocessing.get_context("spawn")
+
+    print(f"🧵 {processos} processos x {threads} threads ({contexto.get_start_method()})")
+    detalhes = [None] * len(textos)
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        mp_context=contexto,
+        initializer=_iniciar_worker,
+        initargs=(threads, BACKEND_INFERENCIA, MODEL_NAME, MODEL_REVISION, PASTA_MODELOS_ONNX),
+    ) as executor:
+        trabalhos = [(n, [textos[i] for i in fatia]) for n, fatia in enumerate(fatias)]
+        for fatia, resultados in zip(fatias, executor.map(_analisar_fatia, trabalhos)):
+            for i, resultado in zip(fatia, resultados):
+                detalhes[i] = resultado
+
+    return detalhes
+
+
+class CacheSentimentos:
+    """
+    Cache local (SQLite) de resultados de sentimento
+
+    Chave: (modelo, revisão, hash do texto, flag de pré-processamento, configuração
+    de inferência). A configuração entra na chave porque truncar em 512 tokens
+    ou agregar janelas produz resultados diferentes para o mesmo texto.
+    """
+
+    def __init__(self, caminho):
+        self.db = sqlite3.connect(caminho)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS sentimentos (
+                modelo TEXT NOT NULL,
+                revisao TEXT NOT NULL,
+                hash_texto TEXT NOT NULL,
+                preprocessado INTEGER NOT NULL,
+                configuracao TEXT NOT NULL,
+                label TEXT,
+                score REAL,
+                sentimento REAL NOT NULL,
+                PRIMARY KEY (modelo, revisao, hash_texto, preprocessado, configuracao)
+            )
+        """)
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def buscar(self, hashes, preprocessado, configuracao):
+        """Retorna {hash: (label, score, sentimento)} para os hashes já presentes no cache"""
+        encontrados = {}
+        unicos = list(set(hashes))
+        for inicio in range(0, len(unicos), 500):
+            parte = unicos[inicio:inicio + 500]
+            marcadores = ",".join("?" * len(parte))
+            linhas = self.db.execute(
+                f"SELECT hash_texto, label, score, sentimento FROM sentimentos "
+                f"WHERE modelo = ? AND revisao = ? AND preprocessado = ? AND configuracao = ? "
+                f"AND hash_texto IN ({marcadores})",
+                (MODEL_NAME, MODEL_REVISION, int(preprocessado), configuracao, *parte)
+            )
+            encontrados.update((h, (label, score, sentimento)) for h, label, score, sentimento in linhas)
+        return encontrados
+
+    def gravar(self, itens, preprocessado, configuracao):
+        """Grava uma lista de (hash, label, score, sentimento)"""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO sentimentos VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(MODEL_NAME, MODEL_REVISION, h, int(preprocessado), configuracao, label, score, sentimento)
+             for h, label, score, sentimento in itens]
+        )
+        self.db.commit()
+
+    def fechar(self):
+        self.db.close()
+
+
+def configuracao_inferencia():
+    """Descrição da configuração que afeta o resultado (parte da chave do cache)"""
+    if MODO_JANELAS:
+        configuracao = f"janelas:512:{SOBREPOSICAO_TOKENS}:{AGREGACAO_JANELAS}"
+    else:
+        configuracao = "truncado:512"
+    # Backends quantizados/exportados podem diferir levemente do PyTorch
+    if BACKEND_INFERENCIA != "pytorch":
+        configuracao = f"{BACKEND_INFERENCIA}:{configuracao}"
+    return configuracao
+
+
+def analisar_via_servico(textos, url=None, desc="Processando"):
+    """
+    Envia os textos ao servico_sentimento.py, em partes concorrentes
+
+    Returns:
+        list: (label, score, sentimento) na ordem de `textos`
+
+    Raises:
+        RuntimeError: se o serviço usa outro modelo ou outra configuração de inferência
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    url = (url or URL_SERVICO).rstrip("/")
+    esperado = {"modelo": MODEL_NAME, "revisao": MODEL_REVISION, "configuracao": configuracao_inferencia()}
+
+    def enviar(parte):
+        corpo = json.dumps({"textos": parte}).encode("utf-8")
+        requisicao = urllib.request.Request(
+            url + "/analisar", data=corpo, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(requisicao) as resp:
+            resposta = json.loads(resp.read())
+
+        servico = {chave: resposta.get(chave) for chave in esperado}
+        if servico != esperado:
+            raise RuntimeError(f"Serviço de sentimento incompatível: {servico} (esperado {esperado})")
+        return [(r["label"], r["score"], r["sentimento"]) for r in resposta["resultados"]]
+
+    partes = [textos[i:i + TEXTOS_POR_REQUISICAO] for i in range(0, len(textos), TEXTOS_POR_REQUISICAO)]
+    detalhes = []
+    with ThreadPoolExecutor(max_workers=REQUISICOES_SIMULTANEAS) as executor:
+        for resultados in tqdm(executor.map(enviar, partes), total=len(partes), desc=desc):
+            detalhes.extend(resultados)
+    return detalhes
+
+
+def analisar_textos(textos, obter_analyzer, desc="Processando"):
+    """Analisa via serviço (se URL_SERVICO) ou localmente, em um ou vários processos"""
+    if URL_SERVICO:
+        return analisar_via_servico(textos, desc=desc)
+    return analisar_em_processos(textos, obter_analyzer, desc=desc)
+
+
+def analisar_com_cache(textos, obter_analyzer, cache, preprocessado, desc="Processando"):
+    """
+    Analisa textos consultando o cache antes do modelo
+
+    Textos idênticos são analisados uma única vez, inclusive entre as versões
+    original e pré-processada de um mesmo lote.
+
+    Args:
+        textos: lista de strings
+        obter_analyzer: função sem argumentos que retorna o pipeline (carregado
+            apenas se houver algum texto fora do cache e não houver URL_SERVICO)
+        cache: CacheSentimentos ou None
+        preprocessado: bool, ou uma lista de bools (um por texto) indicando
+            quais textos são a versão pré-processada
+
+    Returns:
+        list: sentimentos entre -10 e +10, na ordem de `textos`
+    """
+    if isinstance(preprocessado, bool):
+        preprocessado = [preprocessado] * len(textos)
+    hashes = [hash_texto(t) for t in textos]
+
+    if cache is None:
+        unicos = dict(zip(hashes, textos))
+        detalhes = dict(zip(unicos, analisar_textos(list(unicos.values()), obter_analyzer, desc)))
+        return [detalhes[h][2] for h in hashes]
+
+    configuracao = configuracao_inferencia()
+    encontrados = {}
+    for flag in (False, True):
+        hashes_flag = [h for h, p in zip(hashes, preprocessado) if p == flag]
+        if hashes_flag:
+            encontrados.update(((h, flag), d) for h, d in cache.buscar(hashes_flag, flag, configuracao).items())
+
+    # O resultado depende só do texto: um texto já pontuado na outra versão é reaproveitado
+    por_hash = {h: d for (h, _), d in encontrados.items()}
+    faltantes = {}
+    for h, flag, texto in zip(hashes, preprocessado, textos):
+        if (h, flag) not in encontrados and h not in por_hash:
+            faltantes.setdefault(h, texto)
+
+    cache.misses += sum(1 for h in hashes if h in faltantes)
+    cache.hits += len(textos) - sum(1 for h in hashes if h in faltantes)
+
+    if faltantes:
+        por_hash.update(zip(faltantes, analisar_textos(list(faltantes.values()), obter_analyzer, desc)))
+
+    novos = {(h, flag) for h, flag in zip(hashes, preprocessado) if (h, flag) not in encontrados}
+    for flag in (False, True):
+        itens = [(h, *por_hash[h]) for h, f in novos if f == flag]
+        if itens:
+            cache.gravar(itens, flag, configuracao)
+
+    return [por_hash[h][2] for h in hashes]
+
+
+def executar_benchmark(textos, analyzer):
+    """Mede notícias/segundo da análise texto a texto vs em lote na mesma amostra"""
+    amostra = textos[:AMOSTRA_BENCHMARK]
+    print(f"⏱  Benchmark com {len(amostra)} textos (batch_size={BATCH_SIZE}, threads={THREADS_INTRA_OP})")
+
+    inicio = time.perf_counter()
+    serial = [analisar_sentimento(t, analyzer) for t in amostra]
+    tempo_serial = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    em_lote = analisar_sentimentos_em_lote(amostra, analyzer, desc="Benchmark")
+    tempo_lote = time.perf_counter() - inicio
+
+    diferenca = max((abs(a - b) for a, b in zip(serial, em_lote)), default=0.0)
+    print(f"   Texto a texto: {len(amostra) / tempo_serial:.2f} notícias/s")
+    print(f"   Em lote:       {len(amostra) / tempo_lote:.2f} notícias/s "
+          f"({tempo_serial / tempo_lote:.1f}x)")
+    print(f"   Maior diferença entre os sentimentos: {diferenca:.2f}\n")
+
+
+def carregar_noticias(base):
+    """Carrega notícias do arquivo JSONL (ou .json legado) da etapa anterior"""
+    return list(ler_registros(localizar(base)))
 
 
 def reconstruir_texto_preprocessado(tokens):
@@ -117,74 +554,91 @@ def reconstruir_texto_preprocessado(tokens):
 # ---------- PROCESSAMENTO PRINCIPAL ----------
 
 def main():
-    print("🔄 Carregando modelo BERT...")
+    global BACKEND_INFERENCIA
 
-    # Carregar modelo de análise de sentimentos
-    # Forçar CPU (device=-1) devido a incompatibilidade da GPU GTX 1050 Ti
-    sentiment_analyzer = pipeline(
-        "sentiment-analysis",
-        model=MODEL_NAME,
-        tokenizer=MODEL_NAME,
-        device=-1  # CPU (mais lento mas funciona em qualquer hardware)
-    )
+    print(f"\n{'='*60}")
+    print("ANÁLISE DE SENTIMENTOS COM BERT")
+    print(f"{'='*60}\n")
+    print(f"Modelo: {MODEL_NAME}")
+    print(f"Entrada original: {INPUT_ORIGINAL}")
+    print(f"Entrada pré-processada: {INPUT_PREPROCESSED}")
+    print(f"Saída: {OUTPUT_FILE}\n")
+
+    torch.set_num_threads(THREADS_INTRA_OP)
+
+    # O modelo só é carregado na primeira vez que for necessário (cache miss)
+    modelo = {}
+
+    def carregar_modelo():
+        if "analyzer" not in modelo:
+            print(f"🔄 Carregando modelo BERT (backend: {BACKEND_INFERENCIA})...")
+            modelo["analyzer"] = carregar_analisador(
+                BACKEND_INFERENCIA, MODEL_NAME, MODEL_REVISION, PASTA_MODELOS_ONNX, THREADS_INTRA_OP
+            )
+            print(f"✅ Modelo carregado (Device: {'GPU' if torch.cuda.is_available() else 'CPU'})\n")
+        return modelo["analyzer"]
+
+    if VERIFICAR_PARIDADE and BACKEND_INFERENCIA != "pytorch":
+        # Backend divergente não é usado: a execução segue com a referência PyTorch
+        # (o que também muda a chave do cache e os workers para "pytorch")
+        if not verificar_paridade(BACKEND_INFERENCIA, MODEL_NAME, MODEL_REVISION, pasta=PASTA_MODELOS_ONNX):
+            print(f"⚠️  {BACKEND_INFERENCIA} reprovado na verificação de paridade: usando o backend pytorch")
+            BACKEND_INFERENCIA = "pytorch"
+        print()
 
-    print(f"✅ Modelo carregado (Device: {'GPU' if torch.cuda.is_available() else 'CPU'})\n")
+    cache = CacheSentimentos(CACHE_SENTIMENTOS_FILE) if USAR_CACHE_SENTIMENTOS else None
 
     # Carregar notícias originais
     print("📂 Carregando notícias originais...")
     noticias = carregar_noticias(INPUT_ORIGINAL)
     print(f"✅ {len(noticias)} notícias carregadas\n")
 
-    # ANÁLISE 1: Texto ORIGINAL (sem pré-processamento)
-    print("🔍 ANÁLISE 1: Texto ORIGINAL (sem pré-processamento)")
-    print("-" * 60)
-
-    for noticia in tqdm(noticias, desc="Processando"):
-        conteudo_original = noticia.get('conteudo', '')
-        sentimento = analisar_sentimento(conteudo_original, sentiment_analyzer)
-        noticia['sentimento_original'] = sentimento
-
-    print("✅ Análise de texto original concluída\n")
-
-    # ANÁLISE 2: Texto PRÉ-PROCESSADO (se disponível)
-    print("🔍 ANÁLISE 2: Texto PRÉ-PROCESSADO")
-    print("-" * 60)
+    if MODO_BENCHMARK:
+        executar_benchmark([n.get('conteudo', '') for n in noticias], carregar_modelo())
 
-    if os.path.exists(INPUT_PREPROCESSED):
+    # Texto pré-processado (se disponível), associado pela identificação estável da notícia
+    prep_map = {}
+    if localizar(INPUT_PREPROCESSED):
         print(f"📂 Carregando notícias pré-processadas...")
-        noticias_prep = carregar_noticias(INPUT_PREPROCESSED)
-
-        # Criar mapeamento por empresa + título
-        prep_map = {}
-        for n in noticias_prep:
-            key = (n['empresa'], n['titulo'])
-            prep_map[key] = n.get('conteudo_processado', [])
-
-        # Analisar textos pré-processados
-        for noticia in tqdm(noticias, desc="Processando"):
-            key = (noticia['empresa'], noticia['titulo'])
-
-            if key in prep_map:
-                tokens = prep_map[key]
-                texto_limpo = reconstruir_texto_preprocessado(tokens)
-                sentimento = analisar_sentimento(texto_limpo, sentiment_analyzer)
-                noticia['sentimento_preprocessado'] = sentimento
-            else:
-                noticia['sentimento_preprocessado'] = noticia['sentimento_original']
-
-        print("✅ Análise de texto pré-processado concluída\n")
+        for n in carregar_noticias(INPUT_PREPROCESSED):
+            prep_map[id_registro(n)] = reconstruir_texto_preprocessado(n.get('conteudo_processado', []))
+        print(f"✅ {len(prep_map)} notícias pré-processadas carregadas\n")
     else:
         print(f"⚠️  Arquivo pré-processado não encontrado: {INPUT_PREPROCESSED}")
         print("   Pulando análise com pré-processamento\n")
 
-        # Copiar sentimento original para pré-processado
-        for noticia in noticias:
-            noticia['sentimento_preprocessado'] = noticia['sentimento_original']
+    # ANÁLISE: texto ORIGINAL e PRÉ-PROCESSADO em uma única passagem pelo modelo
+    print("🔍 ANÁLISE: Texto ORIGINAL e PRÉ-PROCESSADO")
+    print("-" * 60)
+
+    inicio = time.perf_counter()
+    com_prep = [n for n in noticias if id_registro(n) in prep_map]
+    textos = [n.get('conteudo', '') for n in noticias] + [prep_map[id_registro(n)] for n in com_prep]
+    preprocessado = [False] * len(noticias) + [True] * len(com_prep)
+
+    sentimentos = analisar_com_cache(textos, carregar_modelo, cache, preprocessado)
+    for noticia, sentimento in zip(noticias, sentimentos):
+        noticia['sentimento_original'] = sentimento
+    for noticia, sentimento in zip(com_prep, sentimentos[len(noticias):]):
+        noticia['sentimento_preprocessado'] = sentimento
+
+    # Sem versão pré-processada: copiar sentimento original
+    for noticia in noticias:
+        noticia.setdefault('sentimento_preprocessado', noticia['sentimento_original'])
+
+    duracao = time.perf_counter() - inicio
+    print(f"✅ Análise concluída: {len(noticias)} originais + {len(com_prep)} pré-processadas "
+          f"({len(noticias) / max(duracao, 1e-9):.2f} notícias/s)\n")
+
+    if cache is not None:
+        total = cache.hits + cache.misses
+        taxa = cache.hits / total * 100 if total else 0.0
+        print(f"🗄️  Cache de sentimentos: {cache.hits} hits | {cache.misses} misses | aproveitamento: {taxa:.1f}%\n")
+        cache.fechar()
 
     # Salvar resultados
     print(f"💾 Salvando resultados em: {OUTPUT_FILE}")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(noticias, f, indent=2, ensure_ascii=False)
+    salvar_registros(noticias, OUTPUT_BASE)
 
     print("✅ Resultados salvos\n")
 
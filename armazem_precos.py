@@ -0,0 +1,214 @@
+"""
+armazem_precos.py - Armazém local de cotações diárias (SQLite)
+
+Funcionalidades:
+1. Cotações OHLCV por ticker e data em uma tabela SQLite
+2. Registro dos intervalos de datas já consultados na fonte (mesmo os sem pregão),
+   só para tickers em que a fonte devolveu cotações
+3. Cálculo das lacunas de um período: só o que falta é baixado de novo
+4. Fontes plugáveis: Yahoo Finance (vários tickers em uma requisição) ou
+   uma pasta de CSVs locais, para rodar a etapa offline
+"""
+
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import pandas as pd
+
+COLUNAS = ["Open", "High", "Low", "Close", "Volume"]
+ARQUIVO_PADRAO = os.path.join("pipeline_output", "04_fetch", "precos.sqlite")
+
+
+class FonteYahoo:
+    """Baixa cotações do Yahoo Finance com um único yf.download para vários tickers."""
+
+    nome = "yahoo"
+
+    def baixar(self, tickers, inicio, fim):
+        """
+        Returns:
+            {ticker: DataFrame indexado por data com COLUNAS}, para o intervalo [inicio, fim]
+        """
+        import yfinance as yf
+
+        dados = yf.download(
+            list(tickers),
+            start=inicio.isoformat(),
+            end=(fim + timedelta(days=1)).isoformat(),  # `end` do yfinance é exclusivo
+            progress=False,
+            group_by="ticker",
+        )
+
+        resultado = {}
+        for ticker in tickers:
+            if dados.empty or ticker not in dados.columns.get_level_values(0):
+                resultado[ticker] = pd.DataFrame(columns=COLUNAS)
+                continue
+            df = dados[ticker].dropna(subset=["Close"])
+            resultado[ticker] = df.reindex(columns=COLUNAS)
+        return resultado
+
+
+class FonteCSV:
+    """Lê cotações de `pasta/<ticker>.csv` (colunas Date, Open, High, Low, Close, Volume)."""
+
+    nome = "csv"
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+
+    def baixar(self, tickers, inicio, fim):
+        resultado = {}
+        for ticker in tickers:
+            caminho = os.path.join(self.pasta, f"{ticker}.csv")
+            if not os.path.exists(caminho):
+                resultado[ticker] = pd.DataFrame(columns=COLUNAS)
+                continue
+            df = pd.read_csv(caminho, parse_dates=["Date"]).set_index("Date")
+            datas = df.index.date
+            resultado[ticker] = df.loc[(datas >= inicio) & (datas <= fim)].reindex(columns=COLUNAS)
+        return resultado
+
+
+def criar_fonte(nome, pasta_csv=None):
+    """Instancia a fonte de preços pelo nome ("yahoo" ou "csv")."""
+    if nome == "yahoo":
+        return FonteYahoo()
+    if nome == "csv":
+        return FonteCSV(pasta_csv)
+    raise ValueError(f"Fonte de preços desconhecida: {nome}")
+
+
+class ArmazemPrecos:
+    """Cotações diárias em SQLite com controle dos intervalos já cobertos."""
+
+    def __init__(self, caminho=ARQUIVO_PADRAO):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self.db = sqlite3.connect(caminho)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS precos (
+                ticker TEXT NOT NULL,
+                data TEXT NOT NULL,
+                open REAL, high REAL, low REAL, close REAL, volume REAL,
+                PRIMARY KEY (ticker, data)
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cobertura (
+                ticker TEXT NOT NULL,
+                inicio TEXT NOT NULL,
+                fim TEXT NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def _cobertura(self, ticker):
+        linhas = self.db.execute(
+            "SELECT inicio, fim FROM cobertura WHERE ticker = ? ORDER BY inicio", (ticker,)
+        ).fetchall()
+        return [(date.fromisoformat(i), date.fromisoformat(f)) for i, f in linhas]
+
+    def lacunas(self, ticker, inicio, fim):
+        """Sub-intervalos de [inicio, fim] (inclusivos) ainda não consultados na fonte."""
+        faltando = []
+        cursor = inicio
+        for ini, f in self._cobertura(ticker):
+            if f < cursor:
+                continue
+            if ini > fim:
+                break
+            if ini > cursor:
+                faltando.append((cursor, ini - timedelta(days=1)))
+            cursor = max(cursor, f + timedelta(days=1))
+            if cursor > fim:
+                break
+        if cursor <= fim:
+            faltando.append((cursor, fim))
+        return faltando
+
+    def gravar(self, ticker, df, inicio=None, fim=None):
+        """Grava as cotações e, se informado, marca [inicio, fim] como coberto (fundindo intervalos)."""
+        linhas = [
+            (ticker, pd.Timestamp(indice).date().isoformat(),
+             *(None if pd.isna(linha[c]) else float(linha[c]) for c in COLUNAS))
+            for indice, linha in df.iterrows()
+        ]
+        self.db.executemany("INSERT OR REPLACE INTO precos VALUES (?, ?, ?, ?, ?, ?, ?)", linhas)
+
+        if inicio is None or fim is None or inicio > fim:
+            self.db.commit()
+            return
+
+        # Funde o novo intervalo com os existentes que se sobrepõem ou encostam
+        intervalos = self._cobertura(ticker) + [(inicio, fim)]
+        intervalos.sort()
+        fundidos = [intervalos[0]]
+        for ini, f in intervalos[1:]:
+            ultimo_ini, ultimo_fim = fundidos[-1]
+            if ini <= ultimo_fim + timedelta(days=1):
+                fundidos[-1] = (ultimo_ini, max(ultimo_fim, f))
+            else:
+                fundidos.append((ini, f))
+
+        self.db.execute("DELETE FROM cobertura WHERE ticker = ?", (ticker,))
+        self.db.executemany(
+            "INSERT INTO cobertura VALUES (?, ?, ?)",
+            [(ticker, i.isoformat(), f.isoformat()) for i, f in fundidos]
+        )
+        self.db.commit()
+
+    def carregar(self, ticker, inicio, fim):
+        """DataFrame com COLUNAS indexado por datetime.date, ordenado, para [inicio, fim]."""
+        df = pd.read_sql_query(
+            "SELECT data, open, high, low, close, volume FROM precos "
+            "WHERE ticker = ? AND data BETWEEN ? AND ? ORDER BY data",
+            self.db, params=(ticker, inicio.isoformat(), fim.isoformat())
+        )
+        df.columns = ["data"] + COLUNAS
+        df.index = pd.to_datetime(df.pop("data")).dt.date
+        return df
+
+    def atualizar(self, intervalos, fonte):
+        """
+        Garante no armazém os períodos pedidos, baixando só as lacunas.
+
+        Tickers com a mesma lacuna são baixados juntos, em uma chamada à fonte
+        por lacuna distinta; uma lacuna antiga de um ticker não amplia o
+        período baixado para os demais.
+
+        Args:
+            intervalos: {ticker: (inicio, fim)}
+            fonte: FonteYahoo, FonteCSV ou objeto com `baixar(tickers, inicio, fim)`
+
+        Returns:
+            número de tickers atualizados na fonte
+        """
+        # Dias a partir de hoje podem ainda não ter cotação: só ficam cobertos
+        # até a última data que a fonte devolveu
+        ultimo_fechado = date.today() - timedelta(days=1)
+
+        por_lacuna = {}
+        for ticker, (inicio, fim) in intervalos.items():
+            # Não há cotação de datas futuras: nem são pedidas
+            for lacuna in self.lacunas(ticker, inicio, min(fim, date.today())):
+                por_lacuna.setdefault(lacuna, []).append(ticker)
+
+        atualizados = set()
+        for (inicio, fim), tickers in sorted(por_lacuna.items()):
+            dados = fonte.baixar(tickers, inicio, fim)
+
+            for ticker in tickers:
+                atualizados.add(ticker)
+                df = dados.get(ticker, pd.DataFrame(columns=COLUNAS))
+                if df.empty:
+                    # Falha, limite de requisições ou arquivo ausente: nada é marcado
+                    # como coberto, e o período volta a ser pedido na próxima execução
+                    continue
+                ultima_data = max(pd.Timestamp(indice).date() for indice in df.index)
+                self.gravar(ticker, df, inicio, min(fim, max(ultimo_fechado, ultima_data)))
+
+        return len(atualizados)
+
+    def fechar(self):
+        self.db.close()
@@ -0,0 +1,208 @@
+"""
+cache_html.py - Cache persistente em disco das páginas HTML das notícias
+
+Funcionalidades:
+1. Corpo das páginas endereçado pelo hash SHA-256 da URL (arquivos .html.gz)
+2. Índice SQLite com ETag, Last-Modified e horário do último acesso
+3. Revalidação condicional (If-None-Match / If-Modified-Since) de entradas antigas
+4. Limite de tamanho total com remoção LRU (menos recentemente acessadas)
+5. Modo offline: usa apenas o que já está em cache
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+PASTA_CACHE_PADRAO = os.path.join("pipeline_output", "cache_html")
+TAMANHO_MAXIMO_PADRAO = 2 * 1024 ** 3  # 2 GB
+TTL_PADRAO_DIAS = 30  # entradas mais novas que isso são usadas sem revalidar
+
+
+def _hash_url(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _cabecalho(resp, nome):
+    """Lê um cabeçalho da resposta sem diferenciar maiúsculas/minúsculas."""
+    for chave, valor in (resp.headers or {}).items():
+        if chave.lower() == nome.lower():
+            return valor[0] if isinstance(valor, list) else valor
+    return None
+
+
+class CacheHTML:
+    """Cache de páginas HTML por URL, seguro para uso a partir de várias threads."""
+
+    def __init__(self, pasta=PASTA_CACHE_PADRAO, tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.pasta = pasta
+        self.tamanho_maximo = tamanho_maximo
+        os.makedirs(pasta, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(pasta, "indice.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                chave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                tamanho INTEGER NOT NULL,
+                validado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_acesso ON paginas (acessado_em)")
+        self.db.commit()
+
+        self.tamanho_total = self.db.execute("SELECT COALESCE(SUM(tamanho), 0) FROM paginas").fetchone()[0]
+        self.contadores = {"hits": 0, "revalidados": 0, "misses": 0, "gravados": 0, "removidos": 0}
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave + ".html.gz")
+
+    def obter(self, url):
+        """Retorna a entrada em cache (dict) ou None. Atualiza o horário de acesso."""
+        chave = _hash_url(url)
+        with self.lock:
+            linha = self.db.execute(
+                "SELECT etag, last_modified, validado_em FROM paginas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is None:
+                return None
+            self.db.execute("UPDATE paginas SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+            self.db.commit()
+
+        try:
+            with gzip.open(self._caminho(chave), "rt", encoding="utf-8") as f:
+                corpo = f.read()
+        except OSError:
+            # Índice aponta para um arquivo que sumiu: trata como ausente
+            self._remover(chave)
+            return None
+
+        etag, last_modified, validado_em = linha
+        return {"corpo": corpo, "etag": etag, "last_modified": last_modified, "validado_em": validado_em}
+
+    def gravar(self, url, corpo, etag=None, last_modified=None):
+        """Grava (ou substitui) a página e aplica o limite de tamanho."""
+        chave = _hash_url(url)
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+        temporario = caminho + f".{threading.get_ident()}.tmp"
+        with gzip.open(temporario, "wt", encoding="utf-8") as f:
+            f.write(corpo)
+        os.replace(temporario, caminho)
+        tamanho = os.path.getsize(caminho)
+
+        agora = time.time()
+        with self.lock:
+            anterior = self.db.execute("SELECT tamanho FROM paginas WHERE chave = ?", (chave,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (chave, url, etag, last_modified, tamanho, agora, agora)
+            )
+            self.db.commit()
+            self.tamanho_total += tamanho - (anterior[0] if anterior else 0)
+            self.contadores["gravados"] += 1
+            self._aplicar_limite()
+
+    def marcar_validado(self, url):
+        """Registra que o servidor confirmou a entrada (resposta 304)."""
+        with self.lock:
+            self.db.execute("UPDATE paginas SET validado_em = ? WHERE chave = ?", (time.time(), _hash_url(url)))
+            self.db.commit()
+
+    def _remover(self, chave):
+        with self.lock:
+            linha = self.db.execute("SELECT tamanho FROM paginas WHERE chave = ?", (chave,)).fetchone()
+            if linha:
+                self.db.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+                self.db.commit()
+                self.tamanho_total -= linha[0]
+
+    def _aplicar_limite(self):
+        """Remove as entradas menos recentemente acessadas até caber no limite (chamar com lock)."""
+        if self.tamanho_total <= self.tamanho_maximo:
+            return
+
+        for chave, tamanho in self.db.execute("SELECT chave, tamanho FROM paginas ORDER BY acessado_em").fetchall():
+            if self.tamanho_total <= self.tamanho_maximo:
+                break
+            try:
+                os.remove(self._caminho(chave))
+            except OSError:
+                pass
+            self.db.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+            self.tamanho_total -= tamanho
+            self.contadores["removidos"] += 1
+
+        self.db.commit()
+
+    def contar(self, evento):
+        with self.lock:
+            self.contadores[evento] += 1
+
+    def resumo(self):
+        c = self.contadores
+        total = c["hits"] + c["revalidados"] + c["misses"]
+        taxa = (c["hits"] + c["revalidados"]) / total * 100 if total else 0.0
+        return (f"hits: {c['hits']} | revalidados (304): {c['revalidados']} | misses: {c['misses']} "
+                f"| aproveitamento: {taxa:.1f}% | gravados: {c['gravados']} | removidos (LRU): {c['removidos']} "
+                f"| tamanho: {self.tamanho_total / 1024 ** 2:.1f} MB")
+
+    def fechar(self):
+        with self.lock:
+            self.db.close()
+
+
+def buscar_com_cache(url, cache, baixar, offline=False, ttl_dias=TTL_PADRAO_DIAS):
+    """
+    Obtém o HTML de `url` consultando o cache antes da rede.
+
+    Args:
+        url: endereço da página
+        cache: instância de CacheHTML
+        baixar: função(headers_extras) -> resposta tls_client
+        offline: se True, nunca acessa a rede
+        ttl_dias: idade máxima de uma entrada antes de exigir revalidação
+
+    Returns:
+        (html, erro) — html é None quando não foi possível obter a página
+        (incluindo respostas com status >= 400)
+    """
+    entrada = cache.obter(url)
+
+    if entrada is not None:
+        if offline or time.time() - entrada["validado_em"] < ttl_dias * 86400:
+            cache.contar("hits")
+            return entrada["corpo"], None
+    elif offline:
+        cache.contar("misses")
+        return None, "ausente no cache (modo offline)"
+
+    condicionais = {}
+    if entrada is not None:
+        if entrada["etag"]:
+            condicionais["If-None-Match"] = entrada["etag"]
+        if entrada["last_modified"]:
+            condicionais["If-Modified-Since"] = entrada["last_modified"]
+
+    resp = baixar(condicionais)
+
+    if resp.status_code == 304 and entrada is not None:
+        cache.marcar_validado(url)
+        cache.contar("revalidados")
+        return entrada["corpo"], None
+
+    cache.contar("misses")
+    if resp.status_code >= 400:
+        # Página de erro: não vai para o cache nem é tratada como a notícia
+        return None, f"Erro {resp.status_code}"
+    if resp.status_code == 200:
+        cache.gravar(url, resp.text, _cabecalho(resp, "ETag"), _cabecalho(resp, "Last-Modified"))
+
+    return resp.text, None
@@ -0,0 +1,115 @@
+"""
+calendario_b3.py - Calendário de pregões da B3
+
+Funcionalidades:
+1. Feriados da B3 calculados por ano (fixos + móveis a partir da Páscoa)
+2. Pregões = dias úteis sem feriado; onde há cotações no armazém, os dias
+   observados prevalecem (cobre fechamentos extraordinários e feriados novos)
+3. Índices pré-computados por dia civil: "N-ésimo pregão antes/depois de uma
+   data" é uma consulta O(1), vetorizada sobre arrays de datas
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+# (mês, dia) dos feriados fixos em que a B3 não abre
+FERIADOS_FIXOS = [
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (12, 24),  # Véspera de Natal
+    (12, 25),  # Natal
+    (12, 31),  # Último dia do ano (sem pregão)
+]
+ANO_INICIO_CONSCIENCIA_NEGRA = 2024  # 20/11 passou a ser feriado nacional em 2024
+
+
+def pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_b3(ano):
+    """Conjunto de datas sem pregão na B3 no ano (além dos fins de semana)."""
+    domingo_pascoa = pascoa(ano)
+    feriados = {date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS}
+    if ano >= ANO_INICIO_CONSCIENCIA_NEGRA:
+        feriados.add(date(ano, 11, 20))
+    feriados.update({
+        domingo_pascoa - timedelta(days=48),  # Carnaval (segunda)
+        domingo_pascoa - timedelta(days=47),  # Carnaval (terça)
+        domingo_pascoa - timedelta(days=2),   # Sexta-feira Santa
+        domingo_pascoa + timedelta(days=60),  # Corpus Christi
+    })
+    return feriados
+
+
+class CalendarioPregao:
+    """
+    Pregões de [inicio, fim] com consultas O(1) por dia civil.
+
+    Args:
+        inicio, fim: datas (datetime.date) cobertas pelo calendário
+        datas_observadas: datas com cotação (ex.: do armazém de preços); dentro
+            do intervalo que elas abrangem, substituem o calendário calculado
+    """
+
+    def __init__(self, inicio, fim, datas_observadas=None):
+        self.inicio = np.datetime64(inicio, "D")
+        dias = np.arange(self.inicio, np.datetime64(fim, "D") + 1)
+
+        feriados = set()
+        for ano in range(inicio.year, fim.year + 1):
+            feriados.update(feriados_b3(ano))
+        feriados = np.array(sorted(feriados), dtype="datetime64[D]")
+        eh_pregao = np.is_busday(dias) & ~np.isin(dias, feriados)
+
+        if datas_observadas is not None and len(datas_observadas):
+            observadas = np.unique(np.asarray(datas_observadas, dtype="datetime64[D]"))
+            dentro = (dias >= observadas[0]) & (dias <= observadas[-1])
+            eh_pregao = np.where(dentro, np.isin(dias, observadas), eh_pregao)
+
+        self.sessoes = dias[eh_pregao]
+        # Para cada dia civil: posição do primeiro pregão >= dia
+        self._proximo = np.searchsorted(self.sessoes, dias, side="left")
+        self._eh_pregao = eh_pregao
+
+    def _posicao_dia(self, datas):
+        datas = np.asarray(datas, dtype="datetime64[D]")
+        posicao = (datas - self.inicio).astype(np.int64)
+        dentro = ~np.isnat(datas) & (posicao >= 0) & (posicao < len(self._proximo))
+        return np.where(dentro, posicao, 0), dentro
+
+    def eh_pregao(self, datas):
+        """Array booleano: cada data é um pregão?"""
+        posicao, dentro = self._posicao_dia(datas)
+        return dentro & self._eh_pregao[posicao]
+
+    def deslocar(self, datas, n):
+        """
+        N-ésimo pregão a partir de cada data (NaT fora do calendário).
+
+        n = 0 é o primeiro pregão na própria data ou depois dela; n > 0 conta
+        pregões para frente a partir dele e n < 0, pregões anteriores a ele.
+        """
+        posicao, dentro = self._posicao_dia(datas)
+        indice = self._proximo[posicao] + n
+        valido = dentro & (indice >= 0) & (indice < len(self.sessoes))
+        resultado = np.full(len(posicao), np.datetime64("NaT"), dtype="datetime64[D]")
+        resultado[valido] = self.sessoes[indice[valido]]
+        return resultado
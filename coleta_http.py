@@ -0,0 +1,145 @@
+"""
+coleta_http.py - Motor de requisições HTTP compartilhado pelas etapas de coleta
+
+Funcionalidades:
+1. Sessão tls_client por thread (a Session não é compartilhada entre threads)
+2. Limitador de taxa por host (token bucket) no lugar do time.sleep fixo
+3. Retry com backoff exponencial em 429/5xx e erros de rede
+4. Execução concorrente com pool de threads limitado, preservando a ordem
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import tls_client
+
+# ---------- CONFIGURAÇÃO PADRÃO ----------
+MAX_WORKERS = 8                 # requisições simultâneas
+REQUISICOES_POR_SEGUNDO = 2.0   # taxa sustentada por host
+RAJADA_MAXIMA = 4               # tokens acumuláveis por host
+MAX_TENTATIVAS = 4              # tentativas por URL (1 + retries)
+BACKOFF_BASE = 1.0              # segundos; dobra a cada nova tentativa
+BACKOFF_MAXIMO = 30.0
+STATUS_RETRY = {429, 500, 502, 503, 504}
+
+
+class LimitadorTaxa:
+    """Token bucket thread-safe: `taxa` tokens/s, até `capacidade` acumulados."""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self.tokens = float(capacidade)
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                espera = (1 - self.tokens) / self.taxa
+
+            time.sleep(espera)
+
+
+class LimitadorPorHost:
+    """Mantém um LimitadorTaxa independente para cada host."""
+
+    def __init__(self, taxa=REQUISICOES_POR_SEGUNDO, capacidade=RAJADA_MAXIMA):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.limitadores = {}
+        self.lock = threading.Lock()
+
+    def aguardar(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            limitador = self.limitadores.get(host)
+            if limitador is None:
+                limitador = LimitadorTaxa(self.taxa, self.capacidade)
+                self.limitadores[host] = limitador
+        limitador.aguardar()
+
+
+_local = threading.local()
+
+
+def obter_sessao():
+    """Retorna a sessão tls_client da thread atual (criada sob demanda)."""
+    sessao = getattr(_local, "sessao", None)
+    if sessao is None:
+        sessao = tls_client.Session(
+            client_identifier="chrome_120",
+            random_tls_extension_order=True
+        )
+        _local.sessao = sessao
+    return sessao
+
+
+def _tempo_backoff(tentativa, resp=None):
+    """Espera antes da próxima tentativa: Retry-After se houver, senão exponencial com jitter."""
+    if resp is not None:
+        retry_after = (resp.headers or {}).get("Retry-After")
+        if retry_after and str(retry_after).isdigit():
+            return min(float(retry_after), BACKOFF_MAXIMO)
+
+    espera = BACKOFF_BASE * (2 ** tentativa)
+    return min(espera, BACKOFF_MAXIMO) * random.uniform(0.5, 1.0)
+
+
+def requisitar(metodo, url, limitador, max_tentativas=MAX_TENTATIVAS, **kwargs):
+    """
+    Executa uma requisição respeitando o limitador do host e repetindo em 429/5xx.
+
+    Args:
+        metodo: "GET" ou "POST"
+        url: endereço da requisição
+        limitador: LimitadorPorHost compartilhado entre as threads
+        **kwargs: repassados para tls_client (headers, json, ...)
+
+    Returns:
+        resposta do tls_client (a última obtida, mesmo que com erro)
+
+    Raises:
+        a última exceção de rede, se todas as tentativas falharem sem resposta
+    """
+    sessao = obter_sessao()
+    resp = None
+
+    for tentativa in range(max_tentativas):
+        limitador.aguardar(url)
+        try:
+            resp = sessao.execute_request(metodo, url, **kwargs)
+        except Exception:
+            if tentativa == max_tentativas - 1:
+                raise
+            time.sleep(_tempo_backoff(tentativa))
+            continue
+
+        if resp.status_code not in STATUS_RETRY or tentativa == max_tentativas - 1:
+            return resp
+
+        time.sleep(_tempo_backoff(tentativa, resp))
+
+    return resp
+
+
+def executar_em_paralelo(funcao, itens, max_workers=MAX_WORKERS):
+    """
+    Aplica `funcao` a cada item usando um pool de threads limitado.
+
+    Os resultados são gerados na MESMA ordem de `itens`, independentemente
+    da ordem de conclusão, para que a saída seja idêntica à de uma execução serial.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(funcao, itens)
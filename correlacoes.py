@@ -0,0 +1,172 @@
+"""
+correlacoes.py - Correlações vetorizadas entre colunas de sentimento e de variação de preços
+
+Calcula, de uma vez, todas as combinações coluna X × coluna Y para cada
+método (Pearson, Spearman, Kendall tau-b) e cada grupo de linhas (amostra
+inteira e, opcionalmente, uma partição como a empresa):
+
+1. Pearson: somas por grupo via produto de matrizes (grupos como matriz
+   esparsa one-hot), com os dados centralizados na média de cada grupo
+2. Spearman: Pearson sobre os postos médios calculados dentro de cada grupo
+3. Kendall tau-b: matrizes de sinais em blocos de linhas, O(n²) por grupo;
+   empates e variância como no scipy.stats.kendalltau (método assintótico)
+
+P-valores bilaterais: t de Student com n - 2 graus de liberdade (Pearson e
+Spearman, como scipy.stats.pearsonr/spearmanr) e normal (Kendall).
+Linhas com valor ausente em qualquer coluna usada são descartadas.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, special, stats
+
+METODOS = ("pearson", "spearman", "kendall")
+GRUPO_TODAS = "todas"
+MINIMO_AMOSTRAS = 3
+ELEMENTOS_POR_BLOCO_KENDALL = 4_000_000  # limita a memória das matrizes de sinais (float32)
+
+
+def _one_hot(codigos, n_grupos):
+    n = len(codigos)
+    return sparse.csr_matrix((np.ones(n), (np.arange(n), codigos)), shape=(n, n_grupos))
+
+
+def _pearson_grupos(X, Y, codigos, n_grupos):
+    """Correlação de Pearson por grupo: (n_grupos, colunas X, colunas Y)."""
+    G = _one_hot(codigos, n_grupos)
+    n = np.asarray(G.sum(axis=0)).ravel()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        Xc = X - (G.T @ X / n[:, None])[codigos]
+        Yc = Y - (G.T @ Y / n[:, None])[codigos]
+        sxx = G.T @ (Xc ** 2)
+        syy = G.T @ (Yc ** 2)
+        # Um produto esparso por coluna de X (poucas) cobre todas as colunas de Y
+        sxy = np.stack([G.T @ (Xc[:, [i]] * Yc) for i in range(X.shape[1])], axis=1)
+        r = sxy / np.sqrt(sxx[:, :, None] * syy[:, None, :])
+    return np.clip(r, -1.0, 1.0), n
+
+
+def _postos_grupos(M, codigos):
+    """Postos médios (empates recebem a média) de cada coluna, dentro de cada grupo."""
+    return pd.DataFrame(M).groupby(codigos).rank(method="average").to_numpy(dtype=float)
+
+
+def _p_valor_t(r, n):
+    """P-valor bilateral de r com estatística t e n - 2 graus de liberdade."""
+    gl = (n - 2.0)[:, None, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = r * np.sqrt(gl / ((1.0 - r) * (1.0 + r)))
+        p = 2 * stats.t.sf(np.abs(t), gl)
+    return np.where(np.abs(r) == 1.0, 0.0, p)
+
+
+def _estatisticas_empates(M):
+    """Por coluna: (pares empatados, Σ t(t-1)(t-2), Σ t(t-1)(2t+5)) sobre os grupos de empate t."""
+    m, k = M.shape
+    ordenado = np.sort(M, axis=0)
+    novo = np.ones((m, k), dtype=bool)
+    novo[1:] = ordenado[1:] != ordenado[:-1]
+    blocos = np.cumsum(novo, axis=0) - 1
+    t = np.bincount((blocos + np.arange(k) * m).ravel(order="F"), minlength=m * k).reshape(k, m).astype(float)
+    return (t * (t - 1) / 2).sum(axis=1), (t * (t - 1) * (t - 2)).sum(axis=1), (t * (t - 1) * (2 * t + 5)).sum(axis=1)
+
+
+def _kendall(X, Y):
+    """Kendall tau-b e p-valor (colunas X × colunas Y) de uma amostra completa."""
+    m = len(X)
+    concordancia = np.zeros((X.shape[1], Y.shape[1]))
+    # Só a ordem importa: postos densos (inteiros exatos em float32) dão os mesmos sinais
+    # com metade da memória; somas parciais de até ELEMENTOS_POR_BLOCO_KENDALL sinais são exatas
+    px = stats.rankdata(X, method="dense", axis=0).astype(np.float32)
+    py = stats.rankdata(Y, method="dense", axis=0).astype(np.float32)
+    linhas_por_bloco = max(1, ELEMENTOS_POR_BLOCO_KENDALL // max(1, m * (X.shape[1] + Y.shape[1])))
+    for inicio in range(0, m, linhas_por_bloco):
+        sx = np.sign(px[inicio:inicio + linhas_por_bloco, None, :] - px[None, :, :])
+        sy = np.sign(py[inicio:inicio + linhas_por_bloco, None, :] - py[None, :, :])
+        concordancia += sx.reshape(-1, X.shape[1]).T @ sy.reshape(-1, Y.shape[1])
+    concordancia /= 2  # cada par (i, j) aparece duas vezes
+
+    xtie, x0, x1 = (v[:, None] for v in _estatisticas_empates(X))
+    ytie, y0, y1 = (v[None, :] for v in _estatisticas_empates(Y))
+    total = m * (m - 1) / 2
+    pares = m * (m - 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tau = concordancia / np.sqrt((total - xtie) * (total - ytie))
+        variancia = ((pares * (2 * m + 5) - x1 - y1) / 18
+                     + 2 * xtie * ytie / pares
+                     + x0 * y0 / (9 * pares * (m - 2)))
+        p = special.erfc(np.abs(concordancia / np.sqrt(variancia)) / np.sqrt(2))
+    return np.clip(tau, -1.0, 1.0), p
+
+
+def calcular_correlacoes(df, colunas_x, colunas_y, metodos=METODOS, grupo=None, minimo_amostras=MINIMO_AMOSTRAS):
+    """
+    Correlações de todas as colunas X × colunas Y, na amostra inteira e por grupo.
+
+    Args:
+        df: DataFrame com as colunas numéricas (e a coluna `grupo`, se usada)
+        colunas_x, colunas_y: listas de colunas (ex.: sentimentos e variações)
+        metodos: subconjunto de METODOS
+        grupo: coluna que particiona as linhas (ex.: "empresa"); None = só a amostra inteira
+        minimo_amostras: grupos com menos linhas ficam com correlação e p-valor NaN
+
+    Returns:
+        DataFrame longo com colunas grupo, metodo, coluna_x, coluna_y,
+        correlacao, p_value, n_amostras (grupo GRUPO_TODAS = amostra inteira)
+    """
+    desconhecidos = set(metodos) - set(METODOS)
+    if desconhecidos:
+        raise ValueError(f"Métodos de correlação desconhecidos: {sorted(desconhecidos)} (opções: {', '.join(METODOS)})")
+
+    colunas_x, colunas_y = list(colunas_x), list(colunas_y)
+    dados = df.dropna(subset=colunas_x + colunas_y)
+    X = dados[colunas_x].to_numpy(dtype=float)
+    Y = dados[colunas_y].to_numpy(dtype=float)
+
+    # Partições: a amostra inteira (um só grupo) e, se pedido, os grupos da coluna `grupo`
+    particoes = [(np.zeros(len(dados), dtype=np.int64), [GRUPO_TODAS])]
+    if grupo is not None:
+        codigos, nomes = pd.factorize(dados[grupo], sort=True)
+        if len(nomes):
+            particoes.append((codigos, list(nomes)))
+
+    tabelas = []
+    for codigos, nomes in particoes:
+        resultados = {}
+        if "pearson" in metodos:
+            r, n = _pearson_grupos(X, Y, codigos, len(nomes))
+            resultados["pearson"] = (r, _p_valor_t(r, n))
+        if "spearman" in metodos:
+            r, n = _pearson_grupos(_postos_grupos(X, codigos), _postos_grupos(Y, codigos), codigos, len(nomes))
+            resultados["spearman"] = (r, _p_valor_t(r, n))
+        if "kendall" in metodos:
+            pares = [_kendall(X[codigos == g], Y[codigos == g]) for g in range(len(nomes))]
+            resultados["kendall"] = (np.stack([tau for tau, _ in pares]), np.stack([p for _, p in pares]))
+
+        n = np.bincount(codigos, minlength=len(nomes))
+        for metodo in metodos:
+            r, p = resultados[metodo]
+            insuficiente = (n < minimo_amostras)[:, None, None]
+            r = np.where(insuficiente, np.nan, r)
+            p = np.where(insuficiente, np.nan, p)
+            g, i, j = np.indices(r.shape)
+            tabelas.append(pd.DataFrame({
+                "grupo": np.asarray(nomes, dtype=object)[g.ravel()],
+                "metodo": metodo,
+                "coluna_x": np.asarray(colunas_x, dtype=object)[i.ravel()],
+                "coluna_y": np.asarray(colunas_y, dtype=object)[j.ravel()],
+                "correlacao": r.ravel(),
+                "p_value": p.ravel(),
+                "n_amostras": n[g.ravel()],
+            }))
+
+    if not tabelas:
+        return pd.DataFrame(columns=["grupo", "metodo", "coluna_x", "coluna_y", "correlacao", "p_value", "n_amostras"])
+    return pd.concat(tabelas, ignore_index=True)
+
+
+def matriz_correlacoes(resultados, colunas_x, colunas_y, metodo="pearson", grupo=GRUPO_TODAS):
+    """Matriz (colunas X × colunas Y) de um método e grupo, na ordem pedida (ausentes = NaN)."""
+    selecao = resultados[(resultados["metodo"] == metodo) & (resultados["grupo"] == grupo)]
+    return (selecao.pivot(index="coluna_x", columns="coluna_y", values="correlacao")
+            .reindex(index=list(colunas_x), columns=list(colunas_y)).to_numpy(dtype=float))
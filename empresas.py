@@ -0,0 +1,97 @@
+"""
+empresas.py - Configuração das empresas acompanhadas (empresas.json)
+
+Cada entrada do arquivo descreve uma empresa para todas as etapas:
+1. "empresa"        - nome usado nos registros do pipeline
+2. "tag_id"         - tag do InfoMoney de onde vêm os cards (etapa 01)
+3. "palavras_chave" - termos buscados no texto das notícias (etapa 02);
+                      se ausente, usa o nome e o código do ticker
+4. "ticker"         - código no Yahoo Finance, ex.: "TOTS3.SA" (etapa 04)
+
+Para a etapa 02, os termos de todas as empresas são compilados em um único
+matcher (construir_matcher / contar_mencoes).
+"""
+
+import json
+import re
+from collections import Counter, defaultdict
+
+ARQUIVO_PADRAO = "empresas.json"
+
+
+def carregar_empresas(caminho=ARQUIVO_PADRAO):
+    """Lista de entradas (dicts) do arquivo de configuração, na ordem do arquivo."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def tags_por_empresa(caminho=ARQUIVO_PADRAO):
+    """{empresa: tag_id}"""
+    return {e["empresa"]: e["tag_id"] for e in carregar_empresas(caminho)}
+
+
+def palavras_chave_por_empresa(caminho=ARQUIVO_PADRAO):
+    """{empresa: [termos]}"""
+    chaves = {}
+    for e in carregar_empresas(caminho):
+        termos = e.get("palavras_chave")
+        if not termos:
+            termos = [e["empresa"]] + ([e["ticker"].split(".")[0]] if e.get("ticker") else [])
+        chaves[e["empresa"]] = [t.lower() for t in termos]
+    return chaves
+
+
+def tickers_por_empresa(caminho=ARQUIVO_PADRAO):
+    """{empresa: ticker}, só das empresas com ticker configurado."""
+    return {e["empresa"]: e["ticker"] for e in carregar_empresas(caminho) if e.get("ticker")}
+
+
+def _regex_trie(trie):
+    """Converte uma trie de caracteres em regex (prefixos comuns fatorados)."""
+    alternativas = [re.escape(c) + _regex_trie(trie[c]) for c in sorted(k for k in trie if k)]
+    terminal = "" in trie
+
+    if not alternativas:
+        return ""
+    if len(alternativas) == 1 and not terminal:
+        return alternativas[0]
+
+    grupo = "(?:" + "|".join(alternativas) + ")"
+    return grupo + "?" if terminal else grupo
+
+
+def construir_matcher(chaves_empresas):
+    """
+    Compila todos os termos de todas as empresas em uma única regex.
+
+    Os termos viram uma trie, então o custo por posição do texto não cresce com
+    o número de termos; a regex é gulosa ("positivo tecnologia" vence "positivo")
+    e só aceita palavras inteiras.
+
+    Returns:
+        (padrao, termo_empresas) — termo_empresas mapeia termo em minúsculas -> empresas
+    """
+    termo_empresas = defaultdict(set)
+    trie = {}
+
+    for empresa, termos in chaves_empresas.items():
+        for termo in termos:
+            termo = termo.lower()
+            termo_empresas[termo].add(empresa)
+
+            no = trie
+            for caractere in termo:
+                no = no.setdefault(caractere, {})
+            no[""] = {}
+
+    padrao = re.compile(r"(?<!\w)" + _regex_trie(trie) + r"(?!\w)", re.IGNORECASE)
+    return padrao, dict(termo_empresas)
+
+
+def contar_mencoes(conteudo, padrao, termo_empresas):
+    """{empresa: número de menções} no texto, com o matcher de construir_matcher."""
+    contagem = Counter()
+    for m in padrao.finditer(conteudo):
+        for empresa in termo_empresas[m.group(0).lower()]:
+            contagem[empresa] += 1
+    return dict(contagem)
@@ -0,0 +1,217 @@
+"""
+extracao_html.py - Extração de data e texto das páginas de notícia
+
+Backends disponíveis (do mais rápido para o mais lento):
+1. "selectolax" - parser Lexbor, se instalado
+2. "lxml"       - parser libxml2
+3. "bs4"        - BeautifulSoup com html.parser (referência e fallback)
+
+Todos extraem apenas o <time datetime> do bloco `author-small` e os <p> do
+primeiro <article>, com o mesmo texto normalizado:
+- cada <p> contribui só com o próprio texto: o de um <p> aninhado (que o
+  html.parser do BS4 mantém dentro do outro e os parsers HTML5 fecham antes)
+  é contado uma única vez, no próprio parágrafo
+- parágrafos vazios são descartados (inclusive o <p> vazio que o Lexbor cria
+  para um </p> solto), então não há linhas em branco nem \n no fim
+
+A paridade entre os backends é verificada em tests/test_extracao_html.py
+com páginas salvas em tests/fixtures/html.
+
+Uso como script (verificação de paridade sobre o cache de HTML):
+    python extracao_html.py [pasta_cache_html]
+"""
+
+import glob
+import gzip
+import importlib.util
+import os
+import sys
+
+SELETOR_DATA = "div[data-ds-component='author-small'] time"
+XPATH_DATA = "//div[@data-ds-component='author-small']//time"
+# Mesmo critério do get_text() do BS4: ignora comentários e conteúdo de script/style/template
+XPATH_TEXTO = ".//text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+
+BACKENDS = ("selectolax", "lxml", "bs4")
+_MODULOS = {"selectolax": "selectolax", "lxml": "lxml", "bs4": "bs4"}
+
+
+def backends_disponiveis():
+    """Backends cujos pacotes estão instalados, em ordem de preferência."""
+    return [b for b in BACKENDS if importlib.util.find_spec(_MODULOS[b]) is not None]
+
+
+def resolver_backend(backend="auto"):
+    """Converte "auto" no backend mais rápido instalado; valida os demais nomes."""
+    disponiveis = backends_disponiveis()
+    if backend == "auto":
+        if not disponiveis:
+            raise ImportError("Nenhum parser HTML instalado (selectolax, lxml ou beautifulsoup4)")
+        return disponiveis[0]
+    if backend not in disponiveis:
+        raise ImportError(f"Backend de extração indisponível: {backend}")
+    return backend
+
+
+def _juntar_paragrafos(textos):
+    """Une os textos dos parágrafos com \n, sem os vazios."""
+    return "\n".join(texto for texto in textos if texto)
+
+
+# ---------- BS4 (referência) ----------
+
+def extrair_data(soup):
+    """Extrai a data real de publicação do <time datetime="">"""
+    time_tag = soup.select_one(SELETOR_DATA)
+    if time_tag and time_tag.get("datetime"):
+        return time_tag["datetime"]  # formato ISO
+    return None
+
+
+def extrair_texto(soup):
+    """Coleta todo conteúdo em <p> do corpo da notícia"""
+    article = soup.find("article")
+    if not article:
+        return ""
+
+    paragraphs = article.find_all("p")
+    # <p> aninhados saem do pai antes do get_text: cada um vira seu próprio parágrafo
+    for p in paragraphs:
+        for aninhado in p.find_all("p"):
+            aninhado.extract()
+    return _juntar_paragrafos(p.get_text(strip=True) for p in paragraphs)
+
+
+def _extrair_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return extrair_data(soup), extrair_texto(soup)
+
+
+# ---------- lxml ----------
+
+def _extrair_lxml(html):
+    from lxml import etree
+    from lxml.html import HTMLParser, document_fromstring
+
+    try:
+        raiz = document_fromstring(html)
+    except ValueError:
+        # Strings com declaração de encoding precisam ser passadas como bytes
+        raiz = document_fromstring(html.encode("utf-8"), parser=HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return None, ""
+
+    data_publicacao = None
+    tempos = raiz.xpath(XPATH_DATA)
+    if tempos and tempos[0].get("datetime"):
+        data_publicacao = tempos[0].get("datetime")
+
+    articles = raiz.xpath("//article")
+    if not articles:
+        return data_publicacao, ""
+
+    paragrafos = articles[0].xpath(".//p")
+    texto = _juntar_paragrafos(
+        "".join(t.strip() for t in p.xpath(XPATH_TEXTO) if _paragrafo_lxml(t) is p)
+        for p in paragrafos
+    )
+    return data_publicacao, texto
+
+
+def _paragrafo_lxml(texto):
+    """<p> mais próximo que contém um nó de texto do lxml (None se não houver)."""
+    elemento = texto.getparent()
+    if texto.is_tail:  # o tail pertence ao pai do elemento
+        elemento = elemento.getparent()
+    while elemento is not None and elemento.tag != "p":
+        elemento = elemento.getparent()
+    return elemento
+
+
+# ---------- selectolax ----------
+
+def _extrair_selectolax(html):
+    try:
+        from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    except ImportError:  # selectolax < 0.3.13
+        from selectolax.parser import HTMLParser
+
+    arvore = HTMLParser(html)
+
+    data_publicacao = None
+    time_tag = arvore.css_first(SELETOR_DATA)
+    if time_tag is not None and time_tag.attributes.get("datetime"):
+        data_publicacao = time_tag.attributes["datetime"]
+
+    article = arvore.css_first("article")
+    if article is None:
+        return data_publicacao, ""
+
+    for node in article.css("script, style, template"):
+        node.decompose()
+
+    texto = _juntar_paragrafos(
+        "".join(t.text_content.strip() for t in p.traverse(include_text=True)
+                if t.tag == "-text" and _paragrafo_selectolax(t) == p)
+        for p in article.css("p")
+    )
+    return data_publicacao, texto
+
+
+def _paragrafo_selectolax(no):
+    """<p> mais próximo que contém um nó de texto do selectolax (None se não houver)."""
+    no = no.parent
+    while no is not None and no.tag != "p":
+        no = no.parent
+    return no
+
+
+_EXTRATORES = {
+    "selectolax": _extrair_selectolax,
+    "lxml": _extrair_lxml,
+    "bs4": _extrair_bs4,
+}
+
+
+def extrair_campos(html, backend="bs4"):
+    """
+    Extrai (data_publicacao, conteudo) de uma página.
+
+    Função de nível de módulo para poder ser enviada a um ProcessPoolExecutor.
+    """
+    return _EXTRATORES[backend](html or "")
+
+
+# ---------- VERIFICAÇÃO DE PARIDADE ----------
+
+def verificar_paridade(pasta_cache):
+    """Compara todos os backends instalados com o BS4 nas páginas em cache."""
+    arquivos = sorted(glob.glob(os.path.join(pasta_cache, "*", "*.html.gz")))
+    outros = [b for b in backends_disponiveis() if b != "bs4"]
+
+    print(f"🔎 {len(arquivos)} páginas em {pasta_cache} | backends: {', '.join(outros) or 'nenhum'}")
+
+    divergencias = {b: 0 for b in outros}
+    for caminho in arquivos:
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            html = f.read()
+
+        referencia = extrair_campos(html, "bs4")
+        for backend in outros:
+            resultado = extrair_campos(html, backend)
+            if resultado != referencia:
+                divergencias[backend] += 1
+                campo = "data_publicacao" if resultado[0] != referencia[0] else "conteudo"
+                print(f"  ❌ {backend}: {campo} diverge em {os.path.basename(caminho)}")
+
+    for backend, total in divergencias.items():
+        print(f"{'✅' if total == 0 else '⚠️ '} {backend}: {total} divergência(s) em {len(arquivos)} páginas")
+
+    return all(total == 0 for total in divergencias.values())
+
+
+if __name__ == "__main__":
+    pasta = sys.argv[1] if len(sys.argv) > 1 else os.path.join("pipeline_output", "cache_html")
+    sys.exit(0 if verificar_paridade(pasta) else 1)
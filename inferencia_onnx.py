@@ -0,0 +1,256 @@
+"""
+inferencia_onnx.py - Backends alternativos de inferência para o classificador de sentimentos
+
+Backends (selecionados por BACKEND_INFERENCIA em 06_sentiment_analysis.py):
+1. "pytorch"      - pipeline do transformers em precisão total (referência)
+2. "pytorch_int8" - mesmo modelo com quantização dinâmica int8 das camadas Linear
+3. "onnx"         - modelo exportado uma vez para ONNX e executado no ONNX Runtime
+4. "onnx_int8"    - exportação ONNX com quantização dinâmica int8 dos pesos
+
+As exportações ficam em cache no disco (uma pasta por modelo e revisão) e
+só são refeitas se o arquivo não existir. Os backends ONNX requerem os
+pacotes `onnx` e `onnxruntime`.
+
+Uso como script (verificação de paridade com o PyTorch em frases de teste):
+    python inferencia_onnx.py [backend] [modelo]
+"""
+
+import os
+import re
+import sys
+import time
+
+# torch e transformers são importados nas funções que os usam: importar este
+# módulo (como faz a etapa 06) não carrega nenhum dos dois
+
+BACKENDS = ("pytorch", "pytorch_int8", "onnx", "onnx_int8")
+PASTA_EXPORTACAO_PADRAO = os.path.join("pipeline_output", "06_sentiment", "modelos_onnx")
+OPSET_ONNX = 17
+
+# Frases de referência para a verificação de paridade
+FRASES_PARIDADE = [
+    "A empresa registrou lucro recorde no trimestre e as ações dispararam.",
+    "Os resultados vieram abaixo do esperado e a companhia anunciou demissões.",
+    "A assembleia de acionistas será realizada na próxima terça-feira.",
+    "Analistas elevaram a recomendação para compra após a aquisição.",
+    "O prejuízo líquido cresceu 40% e a dívida preocupa o mercado.",
+    "A companhia divulgou o calendário de eventos corporativos do ano.",
+    "Receita cresce, mas margens seguem pressionadas pelo câmbio.",
+    "Investidores reagiram bem ao novo plano estratégico apresentado ontem.",
+]
+
+
+class _SaidaModelo:
+    """Imita a saída do transformers (atributo `logits`) para o resto do código."""
+
+    def __init__(self, logits):
+        self.logits = logits
+
+
+class ModeloONNX:
+    """Sessão do ONNX Runtime com a mesma interface de chamada do modelo PyTorch."""
+
+    def __init__(self, caminho, config, threads=None):
+        import onnxruntime as ort
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opcoes.intra_op_num_threads = threads
+        self.sessao = ort.InferenceSession(caminho, opcoes, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.entradas = {e.name for e in self.sessao.get_inputs()}
+
+    def __call__(self, **entradas):
+        import torch
+
+        feed = {nome: valor.numpy() for nome, valor in entradas.items() if nome in self.entradas}
+        logits = self.sessao.run(["logits"], feed)[0]
+        return _SaidaModelo(torch.from_numpy(logits))
+
+
+class AnalisadorSentimento:
+    """
+    Par tokenizer + modelo com a interface usada do pipeline do transformers
+
+    Expõe `.tokenizer` e `.model` (usados na inferência em lote) e pode ser
+    chamado como o pipeline para um único texto.
+    """
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+    def __call__(self, texto, truncation=True, max_length=512):
+        import torch
+
+        entradas = self.tokenizer(texto, truncation=truncation, max_length=max_length, return_tensors="pt")
+        with torch.inference_mode():
+            probs = torch.softmax(self.model(**entradas).logits, dim=-1)[0]
+        indice = int(probs.argmax())
+        return [{"label": self.model.config.id2label[indice], "score": float(probs[indice])}]
+
+
+def _pasta_modelo(pasta, model_name, revisao):
+    nome = re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name.strip("/"))
+    return os.path.join(pasta, f"{nome}@{revisao}")
+
+
+def exportar_onnx(model_name, revisao="main", pasta=PASTA_EXPORTACAO_PADRAO, quantizar=False):
+    """
+    Exporta o modelo para ONNX (e opcionalmente quantiza para int8), reaproveitando o cache.
+
+    Returns:
+        caminho do arquivo .onnx pronto para uso
+    """
+    destino = _pasta_modelo(pasta, model_name, revisao)
+    caminho = os.path.join(destino, "model.onnx")
+    caminho_int8 = os.path.join(destino, "model.int8.onnx")
+    os.makedirs(destino, exist_ok=True)
+
+    if not os.path.exists(caminho):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        print(f"📦 Exportando {model_name} para ONNX (uma única vez)...")
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revisao)
+        model.eval()
+
+        class _SomenteLogits(torch.nn.Module):
+            def __init__(self, modelo):
+                super().__init__()
+                self.modelo = modelo
+
+            def forward(self, input_ids, attention_mask):
+                return self.modelo(input_ids=input_ids, attention_mask=attention_mask).logits
+
+        exemplo = torch.ones((2, 16), dtype=torch.long)
+        temporario = caminho + ".parcial"
+        torch.onnx.export(
+            _SomenteLogits(model),
+            (exemplo, torch.ones_like(exemplo)),
+            temporario,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "lote", 1: "tokens"},
+                "attention_mask": {0: "lote", 1: "tokens"},
+                "logits": {0: "lote"},
+            },
+            opset_version=OPSET_ONNX,
+            dynamo=False,
+        )
+        os.replace(temporario, caminho)
+
+    if not quantizar:
+        return caminho
+
+    if not os.path.exists(caminho_int8):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("📦 Quantizando o modelo ONNX para int8...")
+        temporario = caminho_int8 + ".parcial"
+        quantize_dynamic(caminho, temporario, weight_type=QuantType.QInt8)
+        os.replace(temporario, caminho_int8)
+
+    return caminho_int8
+
+
+def carregar_analisador(backend, model_name, revisao="main", pasta=PASTA_EXPORTACAO_PADRAO, threads=None):
+    """
+    Carrega o analisador de sentimentos no backend escolhido.
+
+    "pytorch" retorna o próprio pipeline do transformers; os demais retornam
+    um AnalisadorSentimento com a mesma interface.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de inferência desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+
+    if backend == "pytorch":
+        from transformers import pipeline
+
+        # Forçar CPU (device=-1) devido a incompatibilidade da GPU GTX 1050 Ti
+        return pipeline(
+            "sentiment-analysis",
+            model=model_name,
+            tokenizer=model_name,
+            revision=revisao,
+            device=-1  # CPU (mais lento mas funciona em qualquer hardware)
+        )
+
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revisao)
+
+    if backend == "pytorch_int8":
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revisao)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return AnalisadorSentimento(tokenizer, model)
+
+    from transformers import AutoConfig
+
+    caminho = exportar_onnx(model_name, revisao, pasta, quantizar=(backend == "onnx_int8"))
+    config = AutoConfig.from_pretrained(model_name, revision=revisao)
+    return AnalisadorSentimento(tokenizer, ModeloONNX(caminho, config, threads))
+
+
+# ---------- VERIFICAÇÃO DE PARIDADE ----------
+
+def _probabilidades(analisador, textos):
+    import torch
+
+    entradas = analisador.tokenizer(textos, truncation=True, max_length=512, padding=True, return_tensors="pt")
+    with torch.inference_mode():
+        return torch.softmax(analisador.model(**entradas).logits, dim=-1)
+
+
+def verificar_paridade(backend, model_name, revisao="main", textos=None, pasta=PASTA_EXPORTACAO_PADRAO,
+                       tolerancia=0.05):
+    """
+    Compara as probabilidades de um backend com as do PyTorch em precisão total.
+
+    Args:
+        textos: frases de teste (padrão: FRASES_PARIDADE)
+        tolerancia: maior diferença absoluta de probabilidade aceita
+
+    Returns:
+        True se todos os rótulos coincidem e a diferença está dentro da tolerância
+    """
+    textos = textos or FRASES_PARIDADE
+    referencia = carregar_analisador("pytorch", model_name, revisao, pasta)
+    candidato = carregar_analisador(backend, model_name, revisao, pasta)
+
+    inicio = time.perf_counter()
+    probs_ref = _probabilidades(referencia, textos)
+    tempo_ref = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    probs_cand = _probabilidades(candidato, textos)
+    tempo_cand = time.perf_counter() - inicio
+
+    diferenca = float((probs_ref - probs_cand).abs().max())
+    rotulos_iguais = int((probs_ref.argmax(-1) == probs_cand.argmax(-1)).sum())
+    # Diferença na escala -10 a +10 usada pelo pipeline
+    escala_ref = probs_ref.max(-1).values * 10
+    escala_cand = probs_cand.max(-1).values * 10
+    diferenca_escala = float((escala_ref - escala_cand).abs().max())
+
+    print(f"🔎 Paridade {backend} x pytorch em {len(textos)} textos")
+    print(f"   Rótulos iguais: {rotulos_iguais}/{len(textos)}")
+    print(f"   Maior diferença de probabilidade: {diferenca:.4f} (tolerância {tolerancia})")
+    print(f"   Maior diferença na escala -10..+10: {diferenca_escala:.2f}")
+    print(f"   Tempo: pytorch {tempo_ref * 1000:.0f} ms | {backend} {tempo_cand * 1000:.0f} ms")
+
+    ok = rotulos_iguais == len(textos) and diferenca <= tolerancia
+    print(f"{'✅' if ok else '❌'} {backend}: {'dentro' if ok else 'fora'} da tolerância")
+    return ok
+
+
+if __name__ == "__main__":
+    backend = sys.argv[1] if len(sys.argv) > 1 else "onnx_int8"
+    modelo = sys.argv[2] if len(sys.argv) > 2 else "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+    sys.exit(0 if verificar_paridade(backend, modelo) else 1)
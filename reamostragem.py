@@ -0,0 +1,318 @@
+"""
+reamostragem.py - Intervalos de confiança por bootstrap e testes de permutação para as correlações
+
+Com poucas notícias por empresa, os p-valores analíticos de Pearson/Spearman
+dependem de hipóteses (normalidade, amostra grande) que não se sustentam.
+Este módulo estima, para cada par coluna X × coluna Y (ex.: sentimento ×
+variação em um período):
+
+1. Intervalo de confiança percentil por bootstrap (linhas reamostradas com
+   reposição; todas as colunas usam os mesmos índices em cada réplica).
+   As contagens de sorteio de cada linha servem de pesos: Pearson sai de
+   produtos de matrizes e os postos de Spearman de somas acumuladas por
+   grupo de empate, sem copiar nem reordenar as linhas sorteadas
+2. P-valor bilateral por permutação (X embaralhado em relação a Y; só as
+   poucas colunas de X são reordenadas)
+
+As réplicas são calculadas em lotes de arrays e podem ser distribuídas
+entre processos. Cada lote recebe sua semente de uma SeedSequence derivada
+de SEMENTE, então o resultado não depende do número de processos.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse, stats
+
+from correlacoes import GRUPO_TODAS, MINIMO_AMOSTRAS
+
+METODOS = ("pearson", "spearman")  # Kendall fica de fora: O(n²) por réplica
+N_BOOTSTRAP = 2000
+N_PERMUTACOES = 2000
+NIVEL_CONFIANCA = 0.95
+SEMENTE = 20240607
+PROCESSOS = 1
+ELEMENTOS_POR_LOTE = 4_000_000  # réplicas × linhas × colunas de cada lote (limita a memória)
+
+
+def _grupos_empate(M):
+    """Grupo de empate (valores iguais) de cada célula, numerado globalmente entre as colunas."""
+    n, k = M.shape
+    denso = stats.rankdata(M, method="dense", axis=0).astype(np.int64) - 1
+    tamanhos = denso.max(axis=0) + 1 if n else np.zeros(k, dtype=np.int64)
+    inicio = np.concatenate([[0], np.cumsum(tamanhos)[:-1]]).astype(np.int64)
+    grupos = denso + inicio
+    indicadora = sparse.csr_matrix(
+        (np.ones(n * k), (np.repeat(np.arange(n), k), grupos.ravel())), shape=(n, int(tamanhos.sum()))
+    )
+    return grupos, tamanhos, inicio, indicadora
+
+
+def _preparar(X, Y, metodos):
+    """Tudo o que não depende da réplica, calculado uma vez por amostra."""
+    Xc, Yc = X - X.mean(axis=0), Y - Y.mean(axis=0)
+    preparo = {
+        "X": Xc, "Y": Yc, "XX": Xc ** 2, "YY": Yc ** 2,
+        "XY": (Xc[:, :, None] * Yc[:, None, :]).reshape(len(X), -1),
+    }
+    if "spearman" in metodos:
+        postos_x, postos_y = stats.rankdata(X, axis=0), stats.rankdata(Y, axis=0)
+        preparo["postos_x"] = postos_x - postos_x.mean(axis=0)
+        preparo["postos_y"] = postos_y - postos_y.mean(axis=0)
+        preparo["empates_x"] = _grupos_empate(X)
+        preparo["empates_y"] = _grupos_empate(Y)
+    return preparo
+
+
+def _r_de_somas(n, sx, sy, sxx, syy, sxy):
+    """Pearson a partir das somas ponderadas: n e sx, sxx (réplicas, a); sy, syy (réplicas, b); sxy (réplicas, a, b)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vx = sxx - sx ** 2 / n
+        vy = syy - sy ** 2 / n
+        cov = sxy - sx[:, :, None] * sy[:, None, :] / n[:, :, None]
+        # Réplicas em que uma coluna ficou constante (ex.: só um valor de sentimento sorteado)
+        vx = np.where(vx <= 1e-12 * (sxx + 1e-300), np.nan, vx)
+        vy = np.where(vy <= 1e-12 * (syy + 1e-300), np.nan, vy)
+        return np.clip(cov / np.sqrt(vx[:, :, None] * vy[:, None, :]), -1.0, 1.0)
+
+
+def _pearson_ponderado(pesos, preparo):
+    """
+    Pearson de cada réplica bootstrap a partir das contagens de cada linha.
+
+    Reamostrar com reposição equivale a pesar cada linha pelo número de vezes
+    que foi sorteada: todas as somas saem de produtos (réplicas × linhas) @
+    (linhas × colunas), sem materializar as réplicas.
+    """
+    a, b = preparo["X"].shape[1], preparo["Y"].shape[1]
+    return _r_de_somas(
+        pesos.sum(axis=1)[:, None], pesos @ preparo["X"], pesos @ preparo["Y"],
+        pesos @ preparo["XX"], pesos @ preparo["YY"], (pesos @ preparo["XY"]).reshape(-1, a, b)
+    )
+
+
+def _postos_grupos(pesos, empates):
+    """
+    Posto médio e total sorteado de cada grupo de empate, por réplica: (réplicas, grupos) cada.
+
+    Com as contagens de sorteio, o posto de um grupo de valores iguais é o
+    total sorteado abaixo dele + (total sorteado no grupo + 1) / 2; não há
+    ordenação por réplica, só somas acumuladas.
+    """
+    _, tamanhos, inicio, indicadora = empates
+    sorteados = np.asarray((indicadora.T @ pesos.T).T)
+    abaixo = np.cumsum(sorteados, axis=1) - sorteados
+    abaixo -= np.repeat(abaixo[:, inicio], tamanhos, axis=1)  # acumulado reinicia em cada coluna
+    return abaixo + (sorteados + 1) / 2, sorteados
+
+
+def _spearman_ponderado(pesos, preparo):
+    """
+    Spearman de cada réplica bootstrap: Pearson ponderado sobre os postos da réplica.
+
+    Só as poucas colunas de X recebem o posto linha a linha; as somas de Y
+    (muitas colunas) são feitas por grupo de empate.
+    """
+    replicas, n = pesos.shape
+    grupos_x = preparo["empates_x"][0]
+    _, _, inicio_y, indicadora_y = preparo["empates_y"]
+
+    postos_x, _ = _postos_grupos(pesos, preparo["empates_x"])
+    px = postos_x[:, grupos_x]  # (réplicas, linhas, a)
+    wx = pesos[:, :, None] * px
+
+    postos_y, sorteados_y = _postos_grupos(pesos, preparo["empates_y"])
+    sy = np.add.reduceat(sorteados_y * postos_y, inicio_y, axis=1)
+    syy = np.add.reduceat(sorteados_y * postos_y ** 2, inicio_y, axis=1)
+
+    # Σ peso·posto_x·posto_y: peso·posto_x somado dentro de cada grupo de empate de Y
+    a = wx.shape[2]
+    por_grupo = indicadora_y.T @ wx.transpose(1, 0, 2).reshape(n, replicas * a)
+    por_grupo = por_grupo.reshape(-1, replicas, a).transpose(1, 2, 0)  # (réplicas, a, grupos)
+    sxy = np.add.reduceat(por_grupo * postos_y[:, None, :], inicio_y, axis=2)
+
+    return _r_de_somas(pesos.sum(axis=1)[:, None], wx.sum(axis=1), sy, (wx * px).sum(axis=1), syy, sxy)
+
+
+def _pearson_permutado(indices, X, Y):
+    """Pearson com as linhas de X (já centralizadas) reordenadas por réplica; normas não mudam."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        norma = np.sqrt((X ** 2).sum(axis=0)[:, None] * (Y ** 2).sum(axis=0)[None, :])
+        return np.clip((X[indices].transpose(0, 2, 1) @ Y) / norma, -1.0, 1.0)
+
+
+_PREPAROS_WORKER = None
+
+
+def _iniciar_worker(preparos):
+    global _PREPAROS_WORKER
+    _PREPAROS_WORKER = preparos
+
+
+def _executar_lote(tarefa):
+    """Réplicas de um lote: {metodo: (réplicas, a, b)}."""
+    tipo, amostra, metodos, replicas, semente = tarefa
+    preparo = _PREPAROS_WORKER[amostra]
+    rng = np.random.default_rng(semente)
+    n = len(preparo["X"])
+    resultado = {}
+
+    if tipo == "bootstrap":
+        indices = rng.integers(0, n, size=(replicas, n))
+        pesos = np.bincount((indices + n * np.arange(replicas)[:, None]).ravel(), minlength=replicas * n)
+        pesos = pesos.reshape(replicas, n).astype(float)
+        if "pearson" in metodos:
+            resultado["pearson"] = _pearson_ponderado(pesos, preparo)
+        if "spearman" in metodos:
+            resultado["spearman"] = _spearman_ponderado(pesos, preparo)
+        return resultado
+
+    # Permutação: embaralhar X em relação a Y; os postos de Spearman não mudam
+    indices = rng.permuted(np.tile(np.arange(n), (replicas, 1)), axis=1)
+    if "pearson" in metodos:
+        resultado["pearson"] = _pearson_permutado(indices, preparo["X"], preparo["Y"])
+    if "spearman" in metodos:
+        resultado["spearman"] = _pearson_permutado(indices, preparo["postos_x"], preparo["postos_y"])
+    return resultado
+
+
+def _correlacoes_observadas(preparo, metodos):
+    """{metodo: (a, b)} na amostra original (permutação identidade)."""
+    identidade = np.arange(len(preparo["X"]))[None]
+    resultado = {}
+    if "pearson" in metodos:
+        resultado["pearson"] = _pearson_permutado(identidade, preparo["X"], preparo["Y"])[0]
+    if "spearman" in metodos:
+        resultado["spearman"] = _pearson_permutado(identidade, preparo["postos_x"], preparo["postos_y"])[0]
+    return resultado
+
+
+def _lotes(total, replicas_por_lote):
+    return [min(replicas_por_lote, total - inicio) for inicio in range(0, total, replicas_por_lote)]
+
+
+def reamostrar_correlacoes(df, colunas_x, colunas_y, metodos=METODOS, grupo=None,
+                           n_bootstrap=N_BOOTSTRAP, n_permutacoes=N_PERMUTACOES,
+                           nivel_confianca=NIVEL_CONFIANCA, semente=SEMENTE, processos=PROCESSOS):
+    """
+    Bootstrap e permutação de todas as correlações colunas X × colunas Y.
+
+    Args:
+        df: DataFrame com as colunas numéricas (linhas com ausentes são descartadas)
+        metodos: subconjunto de METODOS
+        grupo: coluna que particiona as linhas (ex.: "empresa"); além da amostra inteira
+        processos: workers do pool (1 = no próprio processo)
+
+    Returns:
+        DataFrame longo com colunas grupo, metodo, coluna_x, coluna_y, correlacao,
+        ic_inferior, ic_superior, p_permutacao, n_amostras
+    """
+    desconhecidos = set(metodos) - set(METODOS)
+    if desconhecidos:
+        raise ValueError(f"Métodos de reamostragem desconhecidos: {sorted(desconhecidos)} (opções: {', '.join(METODOS)})")
+
+    colunas_x, colunas_y = list(colunas_x), list(colunas_y)
+    dados = df.dropna(subset=colunas_x + colunas_y)
+    X = dados[colunas_x].to_numpy(dtype=float)
+    Y = dados[colunas_y].to_numpy(dtype=float)
+
+    amostras = [(GRUPO_TODAS, np.ones(len(dados), dtype=bool))]
+    if grupo is not None:
+        amostras += [(nome, (dados[grupo] == nome).to_numpy()) for nome in sorted(dados[grupo].unique())]
+    amostras = [
+        (nome, int(linhas.sum()), _preparar(X[linhas], Y[linhas], metodos) if linhas.sum() >= MINIMO_AMOSTRAS else None)
+        for nome, linhas in amostras
+    ]
+
+    # Tarefas em ordem fixa (amostra, tipo, lote): cada uma com sua semente filha
+    tarefas, destinos = [], []
+    for i, (_, n, preparo) in enumerate(amostras):
+        if preparo is None:
+            continue
+        replicas_por_lote = max(1, ELEMENTOS_POR_LOTE // (n * (len(colunas_x) + len(colunas_y))))
+        # Tamanho dos lotes depende só dos dados, nunca do número de processos
+        for tipo, total in (("bootstrap", n_bootstrap), ("permutacao", n_permutacoes)):
+            for replicas in _lotes(total, replicas_por_lote):
+                tarefas.append([tipo, i, metodos, replicas])
+                destinos.append((i, tipo))
+    for tarefa, semente_filha in zip(tarefas, np.random.SeedSequence(semente).spawn(len(tarefas))):
+        tarefa.append(semente_filha)
+
+    preparos = [preparo for _, _, preparo in amostras]
+    processos = min(processos, len(tarefas))
+    if processos <= 1:
+        _iniciar_worker(preparos)
+        lotes = [_executar_lote(tarefa) for tarefa in tarefas]
+    else:
+        # Os dados (só arrays) vão uma vez para cada worker no initializer; as tarefas levam
+        # só índices. Nunca fork: o processo pai pode já ter threads (BLAS, matplotlib)
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto,
+                                 initializer=_iniciar_worker, initargs=(preparos,)) as executor:
+            lotes = list(executor.map(_executar_lote, tarefas))
+    _iniciar_worker(None)
+
+    replicas = {}
+    for destino, lote in zip(destinos, lotes):
+        for metodo, valores in lote.items():
+            replicas.setdefault(destino + (metodo,), []).append(valores)
+
+    alfa = (1 - nivel_confianca) / 2
+    tabelas = []
+    for i, (nome, n, preparo) in enumerate(amostras):
+        observadas = _correlacoes_observadas(preparo, metodos) if preparo is not None else {}
+        for metodo in metodos:
+            vazio = np.full((len(colunas_x), len(colunas_y)), np.nan)
+            r = observadas[metodo] if observadas else vazio
+            inferior, superior, p = vazio, vazio, vazio
+            if observadas:
+                with np.errstate(invalid="ignore"):
+                    boot = np.concatenate(replicas[(i, "bootstrap", metodo)]) if n_bootstrap else None
+                    if boot is not None and not np.all(np.isnan(boot)):
+                        inferior, superior = np.nanquantile(boot, [alfa, 1 - alfa], axis=0)
+                    perm = np.concatenate(replicas[(i, "permutacao", metodo)]) if n_permutacoes else None
+                    if perm is not None:
+                        # Bilateral, contando a própria amostra observada (nunca retorna 0)
+                        extremos = (np.abs(perm) >= np.abs(r) - 1e-12).sum(axis=0)
+                        validas = (~np.isnan(perm)).sum(axis=0)
+                        p = np.where(np.isnan(r), np.nan, (1 + extremos) / (1 + validas))
+
+            linhas, colunas = np.indices(r.shape)
+            tabelas.append(pd.DataFrame({
+                "grupo": nome,
+                "metodo": metodo,
+                "coluna_x": np.asarray(colunas_x, dtype=object)[linhas.ravel()],
+                "coluna_y": np.asarray(colunas_y, dtype=object)[colunas.ravel()],
+                "correlacao": r.ravel(),
+                "ic_inferior": inferior.ravel(),
+                "ic_superior": superior.ravel(),
+                "p_permutacao": p.ravel(),
+                "n_amostras": n,
+            }))
+
+    return pd.concat(tabelas, ignore_index=True)
+
+
+def salvar_relatorio(resultados, caminho, rotulos_x=None, n_bootstrap=N_BOOTSTRAP, n_permutacoes=N_PERMUTACOES,
+                     nivel_confianca=NIVEL_CONFIANCA, semente=SEMENTE):
+    """Relatório texto (mesmo estilo de estatisticas_correlacao.txt) com IC e p-valor por permutação."""
+    rotulos_x = rotulos_x or {}
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write("=" * 60 + "\n")
+        f.write("REAMOSTRAGEM: BOOTSTRAP E TESTES DE PERMUTAÇÃO\n")
+        f.write("=" * 60 + "\n\n")
+        f.write(f"Réplicas bootstrap: {n_bootstrap} | Permutações: {n_permutacoes} | "
+                f"IC: {nivel_confianca:.0%} (percentil) | Semente: {semente}\n\n")
+
+        for (grupo, metodo), bloco in resultados.groupby(['grupo', 'metodo'], sort=False):
+            f.write(f"{metodo.capitalize()} - {'todas as empresas' if grupo == GRUPO_TODAS else grupo} "
+                    f"(n={bloco['n_amostras'].iloc[0]}):\n")
+            for _, linha in bloco.iterrows():
+                significativo = 'Sim' if linha['p_permutacao'] < 0.05 else 'Não'
+                f.write(f"  {rotulos_x.get(linha['coluna_x'], linha['coluna_x'])} - {linha['coluna_y']}: "
+                        f"{linha['correlacao']:.4f} "
+                        f"IC [{linha['ic_inferior']:.4f}, {linha['ic_superior']:.4f}] "
+                        f"p_perm={linha['p_permutacao']:.4f} (p<0.05: {significativo})\n")
+            f.write("\n")
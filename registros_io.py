@@ -0,0 +1,188 @@
+"""
+registros_io.py - Leitura e escrita de registros em JSON Lines (JSONL)
+
+Formato compartilhado pelas etapas do pipeline: um objeto JSON por linha,
+opcionalmente comprimido (.jsonl.gz ou .jsonl.zst, este último requer o
+pacote `zstandard`).
+
+Funcionalidades:
+1. Leitura em streaming (gerador), aceitando também o .json legado (lista)
+2. Escrita incremental com flush periódico em arquivo `.parcial`, renomeado
+   para o nome final apenas ao concluir a etapa
+3. Exportação opcional para o .json indentado antigo, por compatibilidade
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import textwrap
+
+# Extensão das saídas novas: ".jsonl", ".jsonl.gz" ou ".jsonl.zst"
+EXTENSAO_PADRAO = ".jsonl"
+
+# Também gerar o .json indentado antigo ao final de cada etapa
+EXPORTAR_JSON_LEGADO = True
+
+# Registros escritos entre dois flushes
+INTERVALO_FLUSH = 50
+
+# Extensões aceitas ao procurar a entrada de uma etapa (o .json legado só
+# é usado se não houver nenhum JSONL)
+_EXTENSOES_LEITURA = (".jsonl.zst", ".jsonl.gz", ".jsonl")
+_EXTENSAO_LEGADA = ".json"
+
+
+def hash_texto(texto):
+    """SHA-256 (hex) do texto em UTF-8; identifica conteúdos iguais entre execuções."""
+    return hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+
+
+def id_registro(registro):
+    """
+    Identificador estável de uma notícia entre etapas: (empresa, url).
+
+    Registros sem URL usam o hash do conteúdo no lugar dela.
+    """
+    return registro.get("empresa"), registro.get("url") or hash_texto(registro.get("conteudo", ""))
+
+
+def abrir_texto(caminho, modo="rt", nome_formato=None):
+    """
+    Abre um arquivo texto UTF-8, descomprimindo/comprimindo pela extensão.
+
+    `nome_formato` permite decidir a compressão por outro nome (ex.: o nome
+    final de um arquivo `.parcial`).
+    """
+    nome_formato = nome_formato or caminho
+    if nome_formato.endswith(".gz"):
+        return gzip.open(caminho, modo, encoding="utf-8")
+    if nome_formato.endswith(".zst"):
+        import zstandard
+        return zstandard.open(caminho, modo, encoding="utf-8")
+    return open(caminho, modo.replace("t", ""), encoding="utf-8")
+
+
+def caminho_saida(base):
+    """Caminho de saída de uma etapa: base (sem extensão) + EXTENSAO_PADRAO."""
+    return base + EXTENSAO_PADRAO
+
+
+def localizar(base):
+    """
+    Encontra o arquivo de uma etapa a partir do caminho sem extensão.
+
+    Se houver mais de um JSONL no disco (ex.: após trocar EXTENSAO_PADRAO),
+    vale o gravado por último. O .json legado é exportado depois do JSONL
+    (e por isso é sempre mais novo), então só é usado quando não há JSONL.
+
+    Returns:
+        caminho existente ou None
+    """
+    existentes = [base + ext for ext in _EXTENSOES_LEITURA if os.path.exists(base + ext)]
+    if existentes:
+        return max(existentes, key=os.path.getmtime)
+    if os.path.exists(base + _EXTENSAO_LEGADA):
+        return base + _EXTENSAO_LEGADA
+    return None
+
+
+def ler_registros(caminho):
+    """Gera os registros de um arquivo JSONL (ou da lista de um .json legado)."""
+    if caminho.endswith(".json"):
+        with open(caminho, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        yield from (dados if isinstance(dados, list) else [dados])
+        return
+
+    with abrir_texto(caminho, "rt") as f:
+        for linha in f:
+            linha = linha.strip()
+            if linha:
+                yield json.loads(linha)
+
+
+def carregar_raw(base):
+    """
+    Carrega o RAW da etapa 01 como {empresa: [cards]}.
+
+    No JSONL cada linha é {"empresa": ..., "card": {...}}; o .json legado já é o dicionário.
+    """
+    caminho = localizar(base)
+    if caminho is None:
+        return {}
+    if caminho.endswith(".json"):
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    raw = {}
+    for registro in ler_registros(caminho):
+        raw.setdefault(registro["empresa"], []).append(registro["card"])
+    return raw
+
+
+class EscritorRegistros:
+    """
+    Escreve registros em JSONL com flush a cada INTERVALO_FLUSH registros.
+
+    Enquanto a etapa roda, os dados vão para `<caminho>.parcial`; ao sair do
+    bloco `with` sem erro, o arquivo é renomeado para `caminho`. Se a etapa
+    falhar, o `.parcial` fica no disco com tudo o que já foi processado.
+    """
+
+    def __init__(self, caminho, intervalo_flush=INTERVALO_FLUSH):
+        self.caminho = caminho
+        self.caminho_parcial = caminho + ".parcial"
+        self.intervalo_flush = intervalo_flush
+        self.total = 0
+        self.arquivo = None
+
+    def __enter__(self):
+        self.arquivo = abrir_texto(self.caminho_parcial, "wt", nome_formato=self.caminho)
+        return self
+
+    def escrever(self, registro):
+        self.arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.total += 1
+        if self.total % self.intervalo_flush == 0:
+            self.arquivo.flush()
+
+    def escrever_todos(self, registros):
+        for registro in registros:
+            self.escrever(registro)
+
+    def __exit__(self, tipo, valor, tb):
+        self.arquivo.close()
+        if tipo is None:
+            os.replace(self.caminho_parcial, self.caminho)
+        return False
+
+
+def salvar_registros(registros, base):
+    """
+    Grava os registros em `base + EXTENSAO_PADRAO` e, se configurado, no .json legado.
+
+    Returns:
+        (caminho do arquivo JSONL gravado, total de registros)
+    """
+    caminho = caminho_saida(base)
+    with EscritorRegistros(caminho) as escritor:
+        escritor.escrever_todos(registros)
+
+    if EXPORTAR_JSON_LEGADO:
+        exportar_json_legado(caminho, base + ".json")
+
+    return caminho, escritor.total
+
+
+def exportar_json_legado(origem, destino):
+    """Converte um JSONL no .json indentado antigo, sem carregar tudo na memória."""
+    temporario = destino + ".parcial"
+    with open(temporario, "w", encoding="utf-8") as f:
+        primeiro = True
+        for registro in ler_registros(origem):
+            f.write("[\n" if primeiro else ",\n")
+            f.write(textwrap.indent(json.dumps(registro, indent=2, ensure_ascii=False), "  "))
+            primeiro = False
+        f.write("[]" if primeiro else "\n]")
+    os.replace(temporario, destino)
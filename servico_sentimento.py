@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+servico_sentimento.py - Serviço HTTP local de análise de sentimentos
+
+Mantém o modelo da etapa 06 carregado entre execuções do pipeline. Requisições
+concorrentes são agrupadas em micro-lotes: o lote é enviado ao modelo quando
+atinge TAMANHO_MAXIMO_LOTE textos ou quando o texto mais antigo espera
+ESPERA_MAXIMA_MS, o que ocorrer primeiro.
+
+Endpoints:
+    POST /analisar  {"textos": [...]} -> {"modelo", "configuracao", "resultados": [{label, score, sentimento}]}
+    GET  /metricas  latência, vazão e tamanho médio dos lotes
+    GET  /saude     modelo, backend e configuração de inferência
+
+Uso:
+    python servico_sentimento.py
+    (e em 06_sentiment_analysis.py: URL_SERVICO = "http://127.0.0.1:8765")
+"""
+
+import importlib
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+
+from inferencia_onnx import carregar_analisador
+
+sentimento = importlib.import_module("06_sentiment_analysis")
+
+# ---------- CONFIGURAÇÃO ----------
+HOST = "127.0.0.1"
+PORTA = 8765
+TAMANHO_MAXIMO_LOTE = 32
+ESPERA_MAXIMA_MS = 20
+AMOSTRAS_LATENCIA = 2000  # últimas requisições consideradas nos percentis
+
+
+class Metricas:
+    """Contadores e latências do serviço (thread-safe)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inicio = time.monotonic()
+        self.requisicoes = 0
+        self.textos = 0
+        self.lotes = 0
+        self.tempo_modelo = 0.0
+        self.latencias = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.tempo_carga_modelo = 0.0
+
+    def registrar_lote(self, tamanho, duracao):
+        with self.lock:
+            self.lotes += 1
+            self.textos += tamanho
+            self.tempo_modelo += duracao
+
+    def registrar_requisicao(self, latencia):
+        with self.lock:
+            self.requisicoes += 1
+            self.latencias.append(latencia)
+
+    def resumo(self):
+        with self.lock:
+            latencias = sorted(self.latencias)
+            decorrido = time.monotonic() - self.inicio
+
+            def percentil(p):
+                if not latencias:
+                    return 0.0
+                return latencias[min(len(latencias) - 1, int(p / 100 * len(latencias)))] * 1000
+
+            return {
+                "requisicoes": self.requisicoes,
+                "textos": self.textos,
+                "lotes": self.lotes,
+                "tamanho_medio_lote": round(self.textos / self.lotes, 2) if self.lotes else 0.0,
+                "latencia_ms": {"p50": round(percentil(50), 1), "p95": round(percentil(95), 1),
+                                "p99": round(percentil(99), 1)},
+                "textos_por_segundo": round(self.textos / decorrido, 2) if decorrido else 0.0,
+                "textos_por_segundo_modelo": round(self.textos / self.tempo_modelo, 2) if self.tempo_modelo else 0.0,
+                "tempo_carga_modelo_s": round(self.tempo_carga_modelo, 2),
+                "em_execucao_s": round(decorrido, 1),
+            }
+
+
+class Microlote:
+    """Fila de textos consumida por uma thread que monta lotes com prazo máximo de espera."""
+
+    def __init__(self, analyzer, metricas, tamanho_maximo=TAMANHO_MAXIMO_LOTE, espera_maxima_ms=ESPERA_MAXIMA_MS):
+        self.analyzer = analyzer
+        self.metricas = metricas
+        self.tamanho_maximo = tamanho_maximo
+        self.espera_maxima = espera_maxima_ms / 1000
+        self.fila = queue.Queue()
+        threading.Thread(target=self._executar, daemon=True).start()
+
+    def analisar(self, textos):
+        """Enfileira os textos e bloqueia até todos terem resultado."""
+        pendentes = []
+        for texto in textos:
+            item = {"texto": texto, "pronto": threading.Event(), "resultado": None}
+            self.fila.put(item)
+            pendentes.append(item)
+
+        for item in pendentes:
+            item["pronto"].wait()
+        return [item["resultado"] for item in pendentes]
+
+    def _proximo_lote(self):
+        lote = [self.fila.get()]
+        prazo = time.monotonic() + self.espera_maxima
+        while len(lote) < self.tamanho_maximo:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self.fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self):
+        while True:
+            lote = self._proximo_lote()
+            inicio = time.perf_counter()
+            try:
+                detalhes = sentimento.analisar_sentimentos_detalhado(
+                    [item["texto"] for item in lote], self.analyzer,
+                    batch_size=self.tamanho_maximo, desc=None
+                )
+            except Exception as e:
+                print(f"⚠️  Erro ao analisar lote: {str(e)[:100]}")
+                detalhes = [(None, None, 0.0)] * len(lote)
+            self.metricas.registrar_lote(len(lote), time.perf_counter() - inicio)
+
+            for item, (label, score, valor) in zip(lote, detalhes):
+                item["resultado"] = {"label": label, "score": score, "sentimento": valor}
+                item["pronto"].set()
+
+
+def criar_handler(microlote, metricas):
+    identificacao = {
+        "modelo": sentimento.MODEL_NAME,
+        "revisao": sentimento.MODEL_REVISION,
+        "backend": sentimento.BACKEND_INFERENCIA,
+        "configuracao": sentimento.configuracao_inferencia(),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def _responder(self, status, corpo):
+            dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_GET(self):
+            if self.path == "/metricas":
+                self._responder(200, metricas.resumo())
+            elif self.path == "/saude":
+                self._responder(200, {"status": "ok", **identificacao})
+            else:
+                self._responder(404, {"erro": "rota inexistente"})
+
+        def do_POST(self):
+            if self.path != "/analisar":
+                self._responder(404, {"erro": "rota inexistente"})
+                return
+
+            inicio = time.perf_counter()
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+                textos = json.loads(self.rfile.read(tamanho))["textos"]
+            except (ValueError, KeyError, TypeError):
+                self._responder(400, {"erro": 'corpo esperado: {"textos": [...]}'})
+                return
+
+            resultados = microlote.analisar(textos)
+            metricas.registrar_requisicao(time.perf_counter() - inicio)
+            self._responder(200, {**identificacao, "resultados": resultados})
+
+        def log_message(self, formato, *args):
+            pass  # sem log por requisição; use /metricas
+
+    return Handler
+
+
+def main():
+    torch.set_num_threads(sentimento.THREADS_INTRA_OP)
+    metricas = Metricas()
+
+    print(f"🔄 Carregando modelo BERT (backend: {sentimento.BACKEND_INFERENCIA})...")
+    inicio = time.perf_counter()
+    analyzer = carregar_analisador(
+        sentimento.BACKEND_INFERENCIA, sentimento.MODEL_NAME, sentimento.MODEL_REVISION,
+        sentimento.PASTA_MODELOS_ONNX, sentimento.THREADS_INTRA_OP
+    )
+    metricas.tempo_carga_modelo = time.perf_counter() - inicio
+    print(f"✅ Modelo carregado em {metricas.tempo_carga_modelo:.1f}s")
+
+    microlote = Microlote(analyzer, metricas)
+    servidor = ThreadingHTTPServer((HOST, PORTA), criar_handler(microlote, metricas))
+    print(f"🌐 Serviço em http://{HOST}:{PORTA} (lote até {TAMANHO_MAXIMO_LOTE}, espera máx. {ESPERA_MAXIMA_MS} ms)")
+
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Encerrando serviço")
+        print(json.dumps(metricas.resumo(), ensure_ascii=False, indent=2))
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+tabelas_io.py - Leitura e escrita das tabelas das etapas 04 e 07
+
+Formatos (escolhidos pela extensão do arquivo):
+1. ".csv"     - texto delimitado, o formato original (abre direto em planilhas)
+2. ".parquet" - colunar comprimido, com esquema explícito (requer `pyarrow`)
+3. ".feather" - Arrow IPC, com o mesmo esquema (requer `pyarrow`)
+
+Nos formatos colunares datas são gravadas como date32 e flags como bool:
+quem lê recebe os tipos prontos, sem reinterpretar texto, e pode pedir só
+as colunas que vai usar (apenas elas são lidas do disco).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMATOS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def caminho_tabela(base, formato):
+    """Caminho da tabela: base (sem extensão) + extensão do formato."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de tabela desconhecido: {formato} (opções: {', '.join(FORMATOS)})")
+    return base + FORMATOS[formato]
+
+
+def localizar_tabela(base):
+    """
+    Encontra a tabela de uma etapa a partir do caminho sem extensão.
+
+    Se houver mais de um formato no disco, vale o gravado por último.
+
+    Returns:
+        caminho existente
+
+    Raises:
+        FileNotFoundError: nenhum dos formatos existe para `base`
+    """
+    existentes = [base + ext for ext in FORMATOS.values() if os.path.exists(base + ext)]
+    if not existentes:
+        raise FileNotFoundError(f"Tabela não encontrada: {base}{{{','.join(FORMATOS.values())}}}")
+    return max(existentes, key=os.path.getmtime)
+
+
+# ---------- ESQUEMAS ----------
+
+def esquema_janelas(offsets):
+    """Esquema da tabela de janelas de preços da etapa 04 (colunas d{offset}_*)."""
+    import pyarrow as pa
+
+    campos = [
+        ("empresa", pa.string()),
+        ("ticker", pa.string()),
+        ("titulo", pa.string()),
+        ("url", pa.string()),
+        ("data_publicacao", pa.date32()),
+        ("data_evento", pa.date32()),
+    ]
+    for offset in offsets:
+        key = f"d{offset:+d}"
+        campos += [
+            (f"{key}_date", pa.date32()),
+            (f"{key}_no_pregao", pa.bool_()),
+            (f"{key}_open", pa.float64()),
+            (f"{key}_close", pa.float64()),
+            (f"{key}_pct_change_prev_close", pa.float64()),
+            (f"{key}_intraday_pct", pa.float64()),
+        ]
+    return pa.schema(campos)
+
+
+def esquema_dados_completos(colunas_variacao):
+    """Esquema do dataset unificado da etapa 07 (sentimentos + variações)."""
+    import pyarrow as pa
+
+    campos = [
+        ("empresa", pa.string()),
+        ("titulo", pa.string()),
+        ("data_publicacao", pa.date32()),
+        ("sentimento_original", pa.float64()),
+        ("sentimento_preprocessado", pa.float64()),
+    ]
+    campos += [(coluna, pa.float64()) for coluna in colunas_variacao]
+    return pa.schema(campos)
+
+
+def _tabela_arrow(df, esquema):
+    """Converte o DataFrame para o esquema; colunas ausentes viram nulas."""
+    import pyarrow as pa
+
+    colunas = []
+    for campo in esquema:
+        if campo.name not in df.columns:
+            colunas.append(pa.nulls(len(df), type=campo.type))
+        elif pa.types.is_date32(campo.type):
+            datas = pd.to_datetime(df[campo.name], errors="coerce").to_numpy(dtype="datetime64[D]")
+            colunas.append(pa.array(datas, type=campo.type, mask=np.isnat(datas)))
+        else:
+            colunas.append(pa.array(df[campo.name], type=campo.type, from_pandas=True))
+    return pa.Table.from_arrays(colunas, schema=esquema)
+
+
+# ---------- LEITURA E ESCRITA ----------
+
+def salvar_tabela(df, caminho, esquema=None, **opcoes_csv):
+    """
+    Grava o DataFrame no formato indicado pela extensão de `caminho`.
+
+    Args:
+        esquema: pyarrow.Schema usado nos formatos colunares (padrão: inferido)
+        opcoes_csv: repassadas ao DataFrame.to_csv (ex.: sep, encoding)
+    """
+    if caminho.endswith(".csv"):
+        df.to_csv(caminho, index=False, **opcoes_csv)
+        return caminho
+
+    import pyarrow as pa
+
+    tabela = _tabela_arrow(df, esquema) if esquema is not None else pa.Table.from_pandas(df, preserve_index=False)
+    temporario = caminho + ".parcial"
+    if caminho.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(tabela, temporario, compression="zstd")
+    elif caminho.endswith(".feather"):
+        import pyarrow.feather as feather
+        feather.write_feather(tabela, temporario, compression="zstd")
+    else:
+        raise ValueError(f"Extensão de tabela desconhecida: {caminho}")
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def colunas_tabela(caminho, **opcoes_csv):
+    """Nomes das colunas, lidos só do cabeçalho/metadados do arquivo."""
+    if caminho.endswith(".csv"):
+        return list(pd.read_csv(caminho, nrows=0, **opcoes_csv).columns)
+    if caminho.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_schema(caminho).names
+    import pyarrow as pa
+    with pa.memory_map(caminho) as origem:
+        return pa.ipc.open_file(origem).schema.names
+
+
+def ler_tabela(caminho, colunas=None, **opcoes_csv):
+    """
+    Lê a tabela (qualquer formato de FORMATOS) como DataFrame.
+
+    Args:
+        colunas: lista de nomes ou função nome -> bool; só essas colunas são lidas
+        opcoes_csv: repassadas ao pd.read_csv (ex.: sep, encoding)
+    """
+    if callable(colunas):
+        colunas = [c for c in colunas_tabela(caminho, **opcoes_csv) if colunas(c)]
+
+    if caminho.endswith(".csv"):
+        return pd.read_csv(caminho, usecols=colunas, **opcoes_csv)
+    if caminho.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_table(caminho, columns=colunas).to_pandas()
+    if caminho.endswith(".feather"):
+        import pyarrow.feather as feather
+        return feather.read_table(caminho, columns=colunas).to_pandas()
+    raise ValueError(f"Extensão de tabela desconhecida: {caminho}")
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from armazem_precos import COLUNAS, ArmazemPrecos
+
+
+class FonteFalsa:
+    """Fonte que registra os pedidos e devolve as respostas configuradas por ticker."""
+
+    def __init__(self, respostas=None):
+        self.respostas = respostas or {}
+        self.pedidos = []
+
+    def baixar(self, tickers, inicio, fim):
+        self.pedidos.append((list(tickers), inicio, fim))
+        return {t: self.respostas.get(t, pd.DataFrame(columns=COLUNAS)) for t in tickers}
+
+
+def _cotacoes(*datas):
+    indice = pd.to_datetime(list(datas))
+    return pd.DataFrame({c: 10.0 for c in COLUNAS}, index=indice)
+
+
+def test_fonte_sem_dados_nao_marca_cobertura(tmp_path):
+    armazem = ArmazemPrecos(str(tmp_path / "precos.sqlite"))
+    periodo = (date(2024, 3, 4), date(2024, 3, 8))
+    try:
+        vazia = FonteFalsa()
+        assert armazem.atualizar({"PETR4.SA": periodo}, vazia) == 1
+        assert armazem.lacunas("PETR4.SA", *periodo) == [periodo]
+
+        # A próxima execução pede o mesmo período de novo
+        com_dados = FonteFalsa({"PETR4.SA": _cotacoes("2024-03-04", "2024-03-05")})
+        assert armazem.atualizar({"PETR4.SA": periodo}, com_dados) == 1
+        assert com_dados.pedidos == [(["PETR4.SA"], *periodo)]
+        assert armazem.lacunas("PETR4.SA", *periodo) == []
+        assert len(armazem.carregar("PETR4.SA", *periodo)) == 2
+    finally:
+        armazem.fechar()
+
+
+def test_ticker_sem_dados_nao_afeta_os_demais(tmp_path):
+    armazem = ArmazemPrecos(str(tmp_path / "precos.sqlite"))
+    periodo = (date(2024, 3, 4), date(2024, 3, 8))
+    try:
+        fonte = FonteFalsa({"VALE3.SA": _cotacoes("2024-03-04")})
+        armazem.atualizar({"PETR4.SA": periodo, "VALE3.SA": periodo}, fonte)
+        assert armazem.lacunas("VALE3.SA", *periodo) == []
+        assert armazem.lacunas("PETR4.SA", *periodo) == [periodo]
+    finally:
+        armazem.fechar()
+
+
+def test_lacuna_antiga_de_um_ticker_nao_amplia_o_download_dos_demais(tmp_path):
+    armazem = ArmazemPrecos(str(tmp_path / "precos.sqlite"))
+    try:
+        for ticker in ("VALE3.SA", "ITUB4.SA"):
+            armazem.gravar(ticker, _cotacoes("2024-03-04"), date(2024, 1, 1), date(2024, 3, 4))
+
+        fonte = FonteFalsa({t: _cotacoes("2024-03-05") for t in ("PETR4.SA", "VALE3.SA", "ITUB4.SA")})
+        periodo = (date(2024, 1, 1), date(2024, 3, 8))
+        assert armazem.atualizar({t: periodo for t in ("PETR4.SA", "VALE3.SA", "ITUB4.SA")}, fonte) == 3
+
+        # Uma chamada por lacuna distinta, com os tickers que a compartilham
+        assert sorted(fonte.pedidos) == [
+            (["PETR4.SA"], date(2024, 1, 1), date(2024, 3, 8)),
+            (["VALE3.SA", "ITUB4.SA"], date(2024, 3, 5), date(2024, 3, 8)),
+        ]
+        for ticker in ("PETR4.SA", "VALE3.SA", "ITUB4.SA"):
+            assert armazem.lacunas(ticker, *periodo) == []
+    finally:
+        armazem.fechar()
+
+
+def test_dias_recentes_cobertos_ate_a_ultima_data_devolvida(tmp_path):
+    armazem = ArmazemPrecos(str(tmp_path / "precos.sqlite"))
+    hoje = date.today()
+    inicio = hoje - timedelta(days=10)
+    try:
+        fonte = FonteFalsa({"PETR4.SA": _cotacoes(inicio.isoformat(), hoje.isoformat())})
+        armazem.atualizar({"PETR4.SA": (inicio, hoje + timedelta(days=5))}, fonte)
+
+        # Datas futuras não são pedidas; hoje fica coberto porque a fonte já o devolveu
+        assert fonte.pedidos == [(["PETR4.SA"], inicio, hoje)]
+        assert armazem.lacunas("PETR4.SA", inicio, hoje) == []
+
+        assert armazem.atualizar({"PETR4.SA": (inicio, hoje + timedelta(days=5))}, fonte) == 0
+        assert len(fonte.pedidos) == 1
+    finally:
+        armazem.fechar()
+
+
+def test_hoje_sem_cotacao_volta_a_ser_pedido(tmp_path):
+    armazem = ArmazemPrecos(str(tmp_path / "precos.sqlite"))
+    hoje = date.today()
+    inicio = hoje - timedelta(days=10)
+    try:
+        fonte = FonteFalsa({"PETR4.SA": _cotacoes(inicio.isoformat())})
+        armazem.atualizar({"PETR4.SA": (inicio, hoje)}, fonte)
+
+        # Dias já fechados ficam cobertos mesmo sem pregão; hoje não
+        assert armazem.lacunas("PETR4.SA", inicio, hoje) == [(hoje, hoje)]
+    finally:
+        armazem.fechar()
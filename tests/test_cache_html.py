@@ -0,0 +1,156 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import cache_html
+from cache_html import CacheHTML, buscar_com_cache
+
+URL = "https://www.infomoney.com.br/mercados/noticia-1/"
+
+
+class Relogio:
+    """Substitui time.time no módulo para controlar TTL e ordem de acesso."""
+
+    def __init__(self, inicio=1_700_000_000.0):
+        self.agora = inicio
+
+    def time(self):
+        return self.agora
+
+    def avancar(self, segundos):
+        self.agora += segundos
+
+
+class Servidor:
+    """Fake de `baixar(headers_extras)`: registra os cabeçalhos condicionais e responde em fila."""
+
+    def __init__(self, *respostas):
+        self.respostas = list(respostas)
+        self.pedidos = []
+
+    def __call__(self, condicionais):
+        self.pedidos.append(condicionais)
+        status, texto, headers = self.respostas.pop(0)
+        return SimpleNamespace(status_code=status, text=texto, headers=headers)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(cache_html, "time", relogio)
+    return relogio
+
+
+@pytest.fixture
+def cache(tmp_path, relogio):
+    cache = CacheHTML(str(tmp_path / "cache"))
+    yield cache
+    cache.fechar()
+
+
+def test_miss_grava_e_hit_nao_acessa_a_rede(cache):
+    servidor = Servidor((200, "<html>v1</html>", {"ETag": '"abc"'}))
+
+    assert buscar_com_cache(URL, cache, servidor) == ("<html>v1</html>", None)
+    assert buscar_com_cache(URL, cache, servidor) == ("<html>v1</html>", None)
+
+    assert servidor.pedidos == [{}]
+    assert cache.contadores["misses"] == 1 and cache.contadores["hits"] == 1
+
+
+def test_revalidacao_com_etag_apos_o_ttl(cache, relogio):
+    servidor = Servidor(
+        (200, "<html>v1</html>", {"etag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        (304, "", {}),
+    )
+    buscar_com_cache(URL, cache, servidor, ttl_dias=30)
+
+    relogio.avancar(29 * 86400)
+    assert buscar_com_cache(URL, cache, servidor, ttl_dias=30) == ("<html>v1</html>", None)
+    assert len(servidor.pedidos) == 1
+
+    # Vencido o TTL, pede com If-None-Match/If-Modified-Since; o 304 renova a entrada
+    relogio.avancar(2 * 86400)
+    assert buscar_com_cache(URL, cache, servidor, ttl_dias=30) == ("<html>v1</html>", None)
+    assert servidor.pedidos[1] == {"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert cache.contadores["revalidados"] == 1
+    assert cache.obter(URL)["validado_em"] == relogio.agora
+
+
+def test_revalidacao_com_conteudo_novo_substitui_a_entrada(cache, relogio):
+    servidor = Servidor((200, "<html>v1</html>", {"ETag": '"v1"'}), (200, "<html>v2</html>", {"ETag": '"v2"'}))
+    buscar_com_cache(URL, cache, servidor, ttl_dias=1)
+
+    relogio.avancar(2 * 86400)
+    assert buscar_com_cache(URL, cache, servidor, ttl_dias=1) == ("<html>v2</html>", None)
+    assert cache.obter(URL)["etag"] == '"v2"'
+
+
+@pytest.mark.parametrize("status", [404, 429, 500, 503])
+def test_resposta_de_erro_nao_e_gravada(cache, status):
+    servidor = Servidor((status, "<html>erro</html>", {"ETag": '"erro"'}))
+
+    html, erro = buscar_com_cache(URL, cache, servidor)
+
+    assert html is None and str(status) in erro
+    assert cache.obter(URL) is None
+    assert cache.tamanho_total == 0
+
+
+def test_erro_na_revalidacao_mantem_a_entrada(cache, relogio):
+    servidor = Servidor((200, "<html>v1</html>", {"ETag": '"v1"'}), (500, "<html>erro</html>", {}))
+    buscar_com_cache(URL, cache, servidor, ttl_dias=1)
+
+    relogio.avancar(2 * 86400)
+    assert buscar_com_cache(URL, cache, servidor, ttl_dias=1)[0] is None
+    assert cache.obter(URL)["corpo"] == "<html>v1</html>"
+
+
+def test_remocao_lru(cache, relogio):
+    corpos = {f"{URL}{i}": os.urandom(2000).hex() for i in range(3)}
+    cache.gravar(f"{URL}0", corpos[f"{URL}0"])
+    cache.tamanho_maximo = int(cache.tamanho_total * 2.5)
+
+    relogio.avancar(1)
+    cache.gravar(f"{URL}1", corpos[f"{URL}1"])
+    relogio.avancar(1)
+    assert cache.obter(f"{URL}0")["corpo"] == corpos[f"{URL}0"]  # 0 passa a ser o mais recente
+
+    relogio.avancar(1)
+    cache.gravar(f"{URL}2", corpos[f"{URL}2"])
+
+    assert cache.obter(f"{URL}1") is None
+    assert cache.obter(f"{URL}0")["corpo"] == corpos[f"{URL}0"]
+    assert cache.obter(f"{URL}2")["corpo"] == corpos[f"{URL}2"]
+    assert cache.contadores["removidos"] == 1
+    assert cache.tamanho_total <= cache.tamanho_maximo
+    assert not os.path.exists(cache._caminho(cache_html._hash_url(f"{URL}1")))
+
+
+def test_modo_offline(cache, relogio):
+    def sem_rede(condicionais):
+        raise AssertionError("modo offline acessou a rede")
+
+    html, erro = buscar_com_cache(URL, cache, sem_rede, offline=True)
+    assert html is None and "offline" in erro
+
+    cache.gravar(URL, "<html>v1</html>")
+    relogio.avancar(365 * 86400)
+    # Mesmo vencida, a entrada é usada sem revalidar
+    assert buscar_com_cache(URL, cache, sem_rede, offline=True, ttl_dias=30) == ("<html>v1</html>", None)
+
+
+def test_indice_persistente_entre_instancias(tmp_path, relogio):
+    pasta = str(tmp_path / "cache")
+    cache = CacheHTML(pasta)
+    cache.gravar(URL, "<html>v1</html>", etag='"abc"')
+    tamanho = cache.tamanho_total
+    cache.fechar()
+
+    reaberto = CacheHTML(pasta)
+    try:
+        assert reaberto.tamanho_total == tamanho
+        assert reaberto.obter(URL)["etag"] == '"abc"'
+    finally:
+        reaberto.fechar()
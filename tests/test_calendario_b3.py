@@ -0,0 +1,82 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from calendario_b3 import CalendarioPregao, feriados_b3, pascoa
+
+
+def _d(texto):
+    return np.datetime64(texto, "D")
+
+
+@pytest.mark.parametrize("ano, esperado", [
+    (2023, date(2023, 4, 9)),
+    (2024, date(2024, 3, 31)),
+    (2025, date(2025, 4, 20)),
+    (2038, date(2038, 4, 25)),
+])
+def test_pascoa(ano, esperado):
+    assert pascoa(ano) == esperado
+
+
+@pytest.mark.parametrize("ano, carnaval, sexta_santa, corpus_christi", [
+    (2023, [date(2023, 2, 20), date(2023, 2, 21)], date(2023, 4, 7), date(2023, 6, 8)),
+    (2024, [date(2024, 2, 12), date(2024, 2, 13)], date(2024, 3, 29), date(2024, 5, 30)),
+    (2025, [date(2025, 3, 3), date(2025, 3, 4)], date(2025, 4, 18), date(2025, 6, 19)),
+])
+def test_feriados_moveis(ano, carnaval, sexta_santa, corpus_christi):
+    feriados = feriados_b3(ano)
+    assert set(carnaval) <= feriados
+    assert sexta_santa in feriados
+    assert corpus_christi in feriados
+
+
+def test_consciencia_negra_a_partir_de_2024():
+    assert date(2023, 11, 20) not in feriados_b3(2023)
+    assert date(2024, 11, 20) in feriados_b3(2024)
+
+
+def test_eh_pregao():
+    calendario = CalendarioPregao(date(2024, 1, 1), date(2024, 12, 31))
+    datas = np.array(["2024-02-12", "2024-02-14", "2024-03-29", "2024-03-30", "2024-05-30",
+                      "2024-05-31", "2024-12-24", "2025-01-02", "NaT"], dtype="datetime64[D]")
+    assert calendario.eh_pregao(datas).tolist() == [False, True, False, False, False, True, False, False, False]
+
+
+@pytest.mark.parametrize("data, n, esperado", [
+    ("2024-03-28", 1, "2024-04-01"),   # Sexta-feira Santa e fim de semana pulados
+    ("2024-03-30", 0, "2024-04-01"),   # sábado: n = 0 é o próximo pregão
+    ("2024-03-30", -1, "2024-03-28"),  # e n = -1 o anterior a ele
+    ("2024-03-29", -2, "2024-03-27"),
+    ("2024-02-09", 1, "2024-02-14"),   # Carnaval: sexta -> quarta-feira de Cinzas
+    ("2024-02-10", 2, "2024-02-16"),   # sábado de Carnaval: n = 0 é a quarta
+    ("2024-05-29", 1, "2024-05-31"),   # Corpus Christi
+    ("2024-12-23", 1, "2024-12-26"),   # véspera de Natal e Natal
+    ("2024-12-27", 1, "2024-12-30"),
+])
+def test_deslocar(data, n, esperado):
+    calendario = CalendarioPregao(date(2024, 1, 1), date(2025, 1, 31))
+    assert calendario.deslocar(np.array([data], dtype="datetime64[D]"), n)[0] == _d(esperado)
+
+
+def test_deslocar_fora_do_calendario_e_nat():
+    calendario = CalendarioPregao(date(2024, 1, 1), date(2024, 1, 31))
+    datas = np.array(["2023-12-29", "2024-01-31", "NaT"], dtype="datetime64[D]")
+    resultado = calendario.deslocar(datas, 1)
+    assert np.isnat(resultado).all()  # antes do início, além do último pregão e NaT
+
+
+def test_datas_observadas_prevalecem_no_intervalo_que_cobrem():
+    calculado = CalendarioPregao(date(2024, 3, 1), date(2024, 4, 30))
+    # Observado de 04/03 a 12/04: um pregão calculado ausente (fechamento extraordinário
+    # em 20/03) e a Sexta-feira Santa presente (pregão que o cálculo não previa)
+    sessoes = calculado.sessoes[(calculado.sessoes >= _d("2024-03-04")) & (calculado.sessoes <= _d("2024-04-12"))]
+    observadas = np.union1d(sessoes[sessoes != _d("2024-03-20")], [_d("2024-03-29")])
+    calendario = CalendarioPregao(date(2024, 3, 1), date(2024, 4, 30), datas_observadas=observadas)
+
+    datas = np.array(["2024-03-20", "2024-03-29", "2024-03-01", "2024-04-19"], dtype="datetime64[D]")
+    # Dentro do intervalo observado valem as observações; fora dele, o calendário calculado
+    assert calendario.eh_pregao(datas).tolist() == [False, True, True, True]
+    assert calendario.deslocar(np.array(["2024-03-19"], dtype="datetime64[D]"), 1)[0] == _d("2024-03-21")
+    assert calendario.deslocar(np.array(["2024-03-28"], dtype="datetime64[D]"), 1)[0] == _d("2024-03-29")
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from correlacoes import GRUPO_TODAS, MINIMO_AMOSTRAS, calcular_correlacoes, matriz_correlacoes
+
+SCIPY = {
+    "pearson": stats.pearsonr,
+    "spearman": stats.spearmanr,
+    # O módulo usa sempre a aproximação normal (o scipy usaria o exato em amostras pequenas sem empates)
+    "kendall": lambda x, y: stats.kendalltau(x, y, method="asymptotic"),
+}
+
+
+def _dados(semente=3):
+    rng = np.random.default_rng(semente)
+    n = 90
+    df = pd.DataFrame({
+        "empresa": np.repeat(["A", "B", "C"], 30),
+        "s1": rng.normal(size=n),
+        "s2": rng.integers(-2, 3, size=n).astype(float),  # muitos empates
+    })
+    df["v1"] = df["s1"] * 0.5 + rng.normal(size=n)
+    df["v2"] = np.round(rng.normal(size=n), 1)  # empates em Y
+    df["v3"] = rng.integers(0, 4, size=n).astype(float)  # empates em X e Y ao mesmo tempo
+    df.loc[[4, 40, 77], "v1"] = np.nan  # linhas com ausentes são descartadas
+    return df
+
+
+def _esperado(dados, metodo, x, y):
+    completos = dados.dropna(subset=["s1", "s2", "v1", "v2", "v3"])
+    resultado = SCIPY[metodo](completos[x], completos[y])
+    return resultado[0], resultado[1]
+
+
+@pytest.mark.parametrize("metodo", ["pearson", "spearman", "kendall"])
+def test_igual_ao_scipy_com_empates_ausentes_e_grupos(metodo):
+    df = _dados()
+    resultado = calcular_correlacoes(df, ["s1", "s2"], ["v1", "v2", "v3"], metodos=(metodo,), grupo="empresa")
+
+    for linha in resultado.itertuples():
+        dados = df if linha.grupo == GRUPO_TODAS else df[df["empresa"] == linha.grupo]
+        r, p = _esperado(dados, metodo, linha.coluna_x, linha.coluna_y)
+        assert linha.correlacao == pytest.approx(r, abs=1e-12)
+        assert linha.p_value == pytest.approx(p, rel=1e-9, abs=1e-12)
+    assert set(resultado["grupo"]) == {GRUPO_TODAS, "A", "B", "C"}
+    assert len(resultado) == 4 * 2 * 3
+
+
+def test_grupo_menor_que_o_minimo_fica_nan():
+    df = _dados()
+    df = df[(df["empresa"] != "C") | (df.index < 60 + MINIMO_AMOSTRAS - 1)]
+    resultado = calcular_correlacoes(df, ["s1"], ["v2"], grupo="empresa")
+
+    pequeno = resultado[resultado["grupo"] == "C"]
+    assert (pequeno["n_amostras"] == MINIMO_AMOSTRAS - 1).all()
+    assert pequeno["correlacao"].isna().all() and pequeno["p_value"].isna().all()
+    assert resultado[resultado["grupo"] != "C"]["correlacao"].notna().all()
+
+
+def test_coluna_constante_da_nan():
+    df = _dados()
+    df["constante"] = 1.0
+    resultado = calcular_correlacoes(df, ["s1", "constante"], ["v2"])
+
+    constante = resultado[resultado["coluna_x"] == "constante"]
+    assert constante["correlacao"].isna().all()
+    assert resultado[resultado["coluna_x"] == "s1"]["correlacao"].notna().all()
+
+
+def test_dataframe_vazio():
+    df = _dados().iloc[0:0]
+    resultado = calcular_correlacoes(df, ["s1"], ["v1", "v2"], grupo="empresa")
+
+    assert list(resultado["grupo"].unique()) == [GRUPO_TODAS]
+    assert (resultado["n_amostras"] == 0).all()
+    assert resultado["correlacao"].isna().all()
+
+
+def test_matriz_na_ordem_pedida():
+    df = _dados()
+    resultado = calcular_correlacoes(df, ["s1", "s2"], ["v1", "v2"], metodos=("pearson",))
+    matriz = matriz_correlacoes(resultado, ["s2", "s1"], ["v2", "v1", "ausente"])
+
+    assert matriz.shape == (2, 3)
+    assert matriz[1, 1] == pytest.approx(_esperado(df, "pearson", "s1", "v1")[0])
+    assert np.isnan(matriz[:, 2]).all()
+
+
+def test_metodo_desconhecido():
+    with pytest.raises(ValueError):
+        calcular_correlacoes(_dados(), ["s1"], ["v1"], metodos=("pearson", "distancia"))
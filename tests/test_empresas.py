@@ -0,0 +1,93 @@
+import os
+import re
+
+import pytest
+
+from empresas import construir_matcher, contar_mencoes, palavras_chave_por_empresa
+
+_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "empresas.json")
+
+CHAVES = {
+    **palavras_chave_por_empresa(_CONFIG),
+    "Méliuz": ["méliuz", "casb3"],
+    "Banco do Brasil": ["banco do brasil", "bbas3"],
+    "BB Seguridade": ["bb seguridade", "bbse3", "banco do brasil seguridade"],
+}
+
+TEXTOS = [
+    "A TOTVS (TOTS3) divulgou resultados; a totvs cresceu.",
+    "Positivo Tecnologia e positivo: a POSITIVO TECNOLOGIA subiu, e a Positivo também.",
+    "Resultados positivos não mencionam a empresa; positivo tecnologias também não.",
+    "MÉLIUZ e Méliuz e méliuz; Méliuzão e meliuz não contam. casb3!",
+    "Banco do Brasil Seguridade, BB Seguridade e o Banco do Brasil (BBAS3).",
+    "Locaweb-LWSA3/Intelbras.INTB3 (intelbras) \"locaweb\"",
+    "Nenhuma empresa aqui.",
+    "",
+]
+
+
+def _mencoes_por_termo(conteudo, chaves):
+    """Busca termo a termo, só palavras inteiras: quais empresas aparecem."""
+    return {
+        empresa for empresa, termos in chaves.items()
+        if any(re.search(r"(?<!\w)" + re.escape(t) + r"(?!\w)", conteudo, re.IGNORECASE) for t in termos)
+    }
+
+
+def _contagem_gulosa(conteudo, chaves):
+    """Contagem ingênua: da esquerda para a direita, o termo mais longo em cada posição."""
+    termos = sorted({t.lower() for ts in chaves.values() for t in ts}, key=len, reverse=True)
+    texto = conteudo.lower()
+    contagem, i = {}, 0
+    while i < len(texto):
+        for termo in termos:
+            fim = i + len(termo)
+            if (texto.startswith(termo, i)
+                    and (i == 0 or not re.match(r"\w", texto[i - 1]))
+                    and (fim == len(texto) or not re.match(r"\w", texto[fim]))):
+                for empresa, ts in chaves.items():
+                    if termo in (t.lower() for t in ts):
+                        contagem[empresa] = contagem.get(empresa, 0) + 1
+                i = fim
+                break
+        else:
+            i += 1
+    return contagem
+
+
+@pytest.mark.parametrize("conteudo", TEXTOS)
+def test_mesmas_empresas_que_a_busca_termo_a_termo(conteudo):
+    padrao, termo_empresas = construir_matcher(CHAVES)
+    assert set(contar_mencoes(conteudo, padrao, termo_empresas)) == _mencoes_por_termo(conteudo, CHAVES)
+
+
+@pytest.mark.parametrize("conteudo", TEXTOS)
+def test_contagem_gulosa(conteudo):
+    padrao, termo_empresas = construir_matcher(CHAVES)
+    assert contar_mencoes(conteudo, padrao, termo_empresas) == _contagem_gulosa(conteudo, CHAVES)
+
+
+def test_mesmo_resultado_que_a_busca_por_substring_com_palavras_inteiras():
+    # Sem termos colados a outras letras, a busca antiga (`termo in texto.lower()`) concorda
+    padrao, termo_empresas = construir_matcher(CHAVES)
+    for conteudo in [TEXTOS[0], TEXTOS[1], TEXTOS[5], TEXTOS[6]]:
+        antigo = {e for e, termos in CHAVES.items() if any(t.lower() in conteudo.lower() for t in termos)}
+        assert set(contar_mencoes(conteudo, padrao, termo_empresas)) == antigo
+
+
+def test_termos_sobrepostos_e_acentos():
+    padrao, termo_empresas = construir_matcher(CHAVES)
+
+    # "positivo tecnologia" vence "positivo": cada trecho conta uma vez
+    assert contar_mencoes(TEXTOS[1], padrao, termo_empresas) == {"Positivo Tecnologia": 4}
+    # Palavras maiores ("positivos", "Méliuzão") e a grafia sem acento não contam;
+    # em "positivo tecnologias" o termo longo falha e sobra "positivo"
+    assert contar_mencoes(TEXTOS[2], padrao, termo_empresas) == {"Positivo Tecnologia": 1}
+    assert contar_mencoes(TEXTOS[3], padrao, termo_empresas) == {"Méliuz": 4}
+    # O termo mais longo decide a empresa
+    assert contar_mencoes(TEXTOS[4], padrao, termo_empresas) == {"BB Seguridade": 2, "Banco do Brasil": 2}
+
+
+def test_termo_compartilhado_conta_para_todas_as_empresas():
+    padrao, termo_empresas = construir_matcher({"A": ["grupo x"], "B": ["grupo x", "bbb"]})
+    assert contar_mencoes("Grupo X e BBB", padrao, termo_empresas) == {"A": 1, "B": 2}
@@ -0,0 +1,60 @@
+import glob
+import os
+
+import pytest
+
+from extracao_html import BACKENDS, backends_disponiveis, extrair_campos
+
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "html")
+FIXTURES = sorted(glob.glob(os.path.join(PASTA_FIXTURES, "*.html")))
+
+
+def _ler(nome):
+    with open(os.path.join(PASTA_FIXTURES, nome), encoding="utf-8") as f:
+        return f.read()
+
+
+def _exigir(backend):
+    if backend not in backends_disponiveis():
+        pytest.skip(f"{backend} não instalado")
+
+
+@pytest.mark.parametrize("backend", [b for b in BACKENDS if b != "bs4"])
+@pytest.mark.parametrize("caminho", FIXTURES, ids=os.path.basename)
+def test_backends_iguais_ao_bs4(caminho, backend):
+    _exigir("bs4")
+    _exigir(backend)
+    with open(caminho, encoding="utf-8") as f:
+        html = f.read()
+    assert extrair_campos(html, backend) == extrair_campos(html, "bs4")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_paragrafo_aninhado_contado_uma_vez(backend):
+    _exigir(backend)
+    assert extrair_campos("<article><p>a<p>b</p></p></article>", backend) == (None, "a\nb")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_paragrafos_vazios_descartados(backend):
+    _exigir(backend)
+    data, conteudo = extrair_campos(_ler("paragrafos_vazios_e_ocultos.html"), backend)
+    assert data is None
+    assert conteudo == "Locaweb(LWSA3)reporta lucro.\nAçõessobem4%no dia."
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_noticia_completa(backend):
+    _exigir(backend)
+    data, conteudo = extrair_campos(_ler("noticia_completa.html"), backend)
+    assert data == "2024-05-14T09:31:00-03:00"
+    assert conteudo.startswith("ATOTVS(TOTS3) anunciou")
+    assert "Menu" not in conteudo and "carregarAnuncio" not in conteudo
+    assert not conteudo.endswith("\n")
+    assert len(conteudo.split("\n")) == 4
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sem_article(backend):
+    _exigir(backend)
+    assert extrair_campos(_ler("sem_article.html"), backend) == (None, "")
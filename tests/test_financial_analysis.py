@@ -0,0 +1,122 @@
+import importlib.util
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from calendario_b3 import CalendarioPregao
+
+_CAMINHO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "04_financial_analysis.py")
+_spec = importlib.util.spec_from_file_location("financial_analysis", _CAMINHO)
+financial_analysis = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(financial_analysis)
+
+
+def test_horario_ambiguo_do_fim_do_horario_de_verao():
+    # 17/02/2018: às 24h os relógios voltaram para 23h, então 23:30 ocorreu duas vezes
+    timestamps = financial_analysis.publication_timestamps(pd.Series(["2018-02-17T23:30:00"]))
+    assert timestamps.iloc[0] == pd.Timestamp("2018-02-17T23:30:00-02:00")
+    assert str(financial_analysis.local_dates(timestamps)[0]) == "2018-02-17"
+
+
+def test_horario_inexistente_do_inicio_do_horario_de_verao():
+    # 04/11/2018: à 0h os relógios adiantaram para 1h
+    timestamps = financial_analysis.publication_timestamps(pd.Series(["2018-11-04T00:30:00"]))
+    assert timestamps.iloc[0] == pd.Timestamp("2018-11-04T01:00:00-02:00")
+
+
+# ---------- build_windows x laço por linha (get_last_valid_price) ----------
+
+def _precos(datas):
+    """Cotações sintéticas nas datas dadas, com os retornos de add_returns."""
+    df = pd.DataFrame(
+        {"Open": [10.0 + i for i in range(len(datas))],
+         "Close": [10.5 + i * 1.1 for i in range(len(datas))]},
+        index=[date.fromisoformat(d) for d in datas],
+    )
+    df["pct_change_prev_close"] = df["Close"].pct_change()
+    df["intraday_pct"] = (df["Close"] - df["Open"]) / df["Open"]
+    return df
+
+
+def _noticias(datas):
+    eventos = pd.to_datetime(pd.Series(datas))
+    return pd.DataFrame({
+        "titulo": [f"n{i}" for i in range(len(datas))],
+        "url": [f"https://exemplo/{i}" for i in range(len(datas))],
+        "data_local": eventos,
+        "data_evento": eventos,
+    })
+
+
+def _janelas_por_linha(grupo, prices, calendar=None):
+    """Semântica do laço original: último preço ANTERIOR ou do próprio dia-alvo."""
+    linhas = []
+    for base in grupo["data_evento"]:
+        base = base.date()
+        registro = {}
+        for offset in range(-financial_analysis.WINDOW_BEFORE, financial_analysis.WINDOW_AFTER + 1):
+            key = f"d{offset:+d}"
+            if calendar is None:
+                alvo = base + timedelta(days=offset)
+            else:
+                alvo = pd.Timestamp(calendar.deslocar(np.array([base], dtype="datetime64[D]"), offset)[0]).date()
+
+            anteriores = [d for d in prices.index if d <= alvo]
+            real = anteriores[-1] if anteriores else None
+
+            registro[f"{key}_date"] = alvo.isoformat()
+            registro[f"{key}_no_pregao"] = real != alvo
+            for nome, coluna in financial_analysis.PRICE_FIELDS:
+                registro[f"{key}_{nome}"] = np.nan if real is None else float(prices.loc[real, coluna])
+        linhas.append(registro)
+    return pd.DataFrame(linhas)
+
+
+def _comparar(resultado, esperado):
+    for coluna in esperado.columns:
+        if coluna.endswith("_date"):
+            assert list(resultado[coluna]) == list(esperado[coluna]), coluna
+        elif coluna.endswith("_no_pregao"):
+            assert resultado[coluna].astype(bool).tolist() == esperado[coluna].tolist(), coluna
+        else:
+            np.testing.assert_allclose(resultado[coluna].to_numpy(dtype=float),
+                                       esperado[coluna].to_numpy(dtype=float), err_msg=coluna)
+
+
+# Pregões com lacunas: fim de semana, o Carnaval de 2024 (12 e 13/02) e um dia sem cotação (21/02)
+_DATAS_PRECOS = ["2024-02-07", "2024-02-08", "2024-02-09", "2024-02-14", "2024-02-15",
+                 "2024-02-16", "2024-02-19", "2024-02-20", "2024-02-22", "2024-02-23"]
+# Antes da primeira cotação, no Carnaval, no fim de semana, no dia sem cotação e depois da última
+_DATAS_NOTICIAS = ["2024-02-05", "2024-02-07", "2024-02-11", "2024-02-13", "2024-02-17",
+                   "2024-02-21", "2024-02-23", "2024-02-26"]
+
+
+def test_build_windows_dias_civis_igual_ao_laco_por_linha():
+    grupo, prices = _noticias(_DATAS_NOTICIAS), _precos(_DATAS_PRECOS)
+    resultado = financial_analysis.build_windows("Empresa", "EMPR3.SA", grupo, prices)
+
+    _comparar(resultado, _janelas_por_linha(grupo, prices))
+    # Notícia de 05/02: d-2 a d+1 caem antes da primeira cotação
+    assert resultado.loc[0, ["d-2_no_pregao", "d+1_no_pregao"]].tolist() == [True, True]
+    assert np.isnan(resultado.loc[0, "d+1_close"])
+    assert resultado.loc[0, "d+2_no_pregao"] == False  # noqa: E712 - 07/02 tem pregão
+
+
+def test_build_windows_sem_precos():
+    grupo = _noticias(_DATAS_NOTICIAS)
+    resultado = financial_analysis.build_windows("Empresa", "EMPR3.SA", grupo, _precos([]))
+
+    _comparar(resultado, _janelas_por_linha(grupo, _precos([])))
+    assert resultado.filter(like="_no_pregao").to_numpy().all()
+    assert resultado.filter(like="_close").isna().to_numpy().all()
+
+
+def test_build_windows_por_pregao_igual_ao_laco_por_linha():
+    grupo, prices = _noticias(_DATAS_NOTICIAS), _precos(_DATAS_PRECOS)
+    calendar = CalendarioPregao(date(2024, 1, 20), date(2024, 3, 10),
+                                np.array(_DATAS_PRECOS, dtype="datetime64[D]"))
+    resultado = financial_analysis.build_windows("Empresa", "EMPR3.SA", grupo, prices, calendar)
+
+    _comparar(resultado, _janelas_por_linha(grupo, prices, calendar))
@@ -0,0 +1,95 @@
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+import inferencia_onnx
+from inferencia_onnx import FRASES_PARIDADE, _probabilidades, carregar_analisador, verificar_paridade
+
+MODELO_ETAPA_06 = "lxyuan/distilbert-base-multilingual-cased-sentiments-student"
+TOLERANCIA = 0.05
+
+
+@pytest.fixture(scope="module")
+def modelo_minimo(tmp_path_factory):
+    """DistilBERT minúsculo com pesos aleatórios fixos, salvo em disco (roda sem rede)."""
+    import torch
+    from transformers import BertTokenizerFast, DistilBertConfig, DistilBertForSequenceClassification
+
+    pasta = tmp_path_factory.mktemp("modelo_minimo")
+    palavras = sorted({p.strip(".,%").lower() for frase in FRASES_PARIDADE for p in frase.split()})
+    vocab = pasta / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + palavras), encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(vocab), do_lower_case=True).save_pretrained(pasta)
+
+    torch.manual_seed(0)
+    config = DistilBertConfig(
+        vocab_size=5 + len(palavras), dim=32, n_layers=2, n_heads=2, hidden_dim=64,
+        max_position_embeddings=512, initializer_range=0.5,
+        id2label={0: "positive", 1: "neutral", 2: "negative"},
+        label2id={"positive": 0, "neutral": 1, "negative": 2},
+    )
+    DistilBertForSequenceClassification(config).eval().save_pretrained(pasta)
+    return str(pasta)
+
+
+def _modelo_etapa_06_local():
+    """Caminho do modelo da etapa 06 se já estiver no cache local do Hugging Face."""
+    from huggingface_hub import snapshot_download
+
+    try:
+        return snapshot_download(MODELO_ETAPA_06, local_files_only=True)
+    except Exception:
+        return None
+
+
+def _comparar(backend, modelo, pasta):
+    referencia = _probabilidades(carregar_analisador("pytorch", modelo, pasta=pasta), FRASES_PARIDADE)
+    candidato = _probabilidades(carregar_analisador(backend, modelo, pasta=pasta), FRASES_PARIDADE)
+    assert (referencia.argmax(-1) == candidato.argmax(-1)).all()
+    assert float((referencia - candidato).abs().max()) <= TOLERANCIA
+
+
+def test_onnx_paridade_modelo_minimo(modelo_minimo, tmp_path):
+    _comparar("onnx", modelo_minimo, str(tmp_path))
+    assert verificar_paridade("onnx", modelo_minimo, pasta=str(tmp_path), tolerancia=TOLERANCIA)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx_int8"])
+def test_paridade_modelo_da_etapa_06(backend, tmp_path):
+    modelo = _modelo_etapa_06_local()
+    if modelo is None:
+        pytest.skip(f"{MODELO_ETAPA_06} não está no cache local do Hugging Face")
+    _comparar(backend, modelo, str(tmp_path))
+
+
+def test_paridade_reprovada_volta_para_pytorch(monkeypatch, tmp_path):
+    caminho = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "06_sentiment_analysis.py")
+    monkeypatch.chdir(tmp_path)  # a etapa cria sua pasta de saída ao ser importada
+    spec = importlib.util.spec_from_file_location("sentiment_analysis", caminho)
+    etapa = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(etapa)
+
+    class Interromper(Exception):
+        pass
+
+    backend_ao_carregar = []
+
+    def carregar_noticias(_):
+        backend_ao_carregar.append(etapa.BACKEND_INFERENCIA)
+        raise Interromper
+
+    monkeypatch.setattr(etapa, "BACKEND_INFERENCIA", "onnx_int8")
+    monkeypatch.setattr(etapa, "VERIFICAR_PARIDADE", True)
+    monkeypatch.setattr(etapa, "verificar_paridade", lambda *a, **k: False)
+    monkeypatch.setattr(etapa, "carregar_noticias", carregar_noticias)
+    with pytest.raises(Interromper):
+        etapa.main()
+
+    assert backend_ao_carregar == ["pytorch"]
+    assert not etapa.configuracao_inferencia().startswith("onnx")
@@ -0,0 +1,99 @@
+import importlib.util
+import os
+
+import pytest
+
+spacy = pytest.importorskip("spacy")
+from spacy.language import Language  # noqa: E402
+
+_CAMINHO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "05_pre_processamento.py")
+_spec = importlib.util.spec_from_file_location("pre_processamento", _CAMINHO)
+pre_processamento = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(pre_processamento)
+
+
+@Language.component("lema_com_contexto_teste")
+def _lema_com_contexto(doc):
+    # O lema depende do vizinho anterior, como o de um tagger de verdade
+    for i, token in enumerate(doc):
+        token.lemma_ = f"{token.text}<{doc[i - 1].text if i else ''}"
+    return doc
+
+
+@pytest.fixture(autouse=True)
+def nlp_falso(monkeypatch):
+    nlp = spacy.blank("pt")
+    nlp.add_pipe("lema_com_contexto_teste")
+    monkeypatch.setitem(pre_processamento._recursos, "nlp", nlp)
+    monkeypatch.setitem(pre_processamento._recursos, "stopwords", frozenset(["a", "de", "o"]))
+    monkeypatch.setitem(pre_processamento._recursos, "tokenizador", str.split)
+    return nlp
+
+
+TEXTOS = [
+    "A TOTVS subiu de novo",
+    "Locaweb cai; TOTVS sobe",
+    "A TOTVS subiu de novo!",  # mesmo texto limpo da primeira
+    "subiu TOTVS",
+    "Locaweb cai; TOTVS sobe",
+]
+
+
+def _noticias():
+    return [{"conteudo": texto, "ordem": i} for i, texto in enumerate(TEXTOS)]
+
+
+def _sem_cache():
+    return [n["conteudo_processado"] for n in pre_processamento.preprocessar_noticias(_noticias())]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 64])
+def test_cache_da_o_mesmo_resultado_que_o_modo_sem_cache(batch_size):
+    cache = pre_processamento.CacheLemas(capacidade=100)
+
+    saida = list(pre_processamento.preprocessar_noticias_com_cache(_noticias(), cache, batch_size=batch_size))
+
+    assert [n["ordem"] for n in saida] == list(range(len(TEXTOS)))
+    assert [n["conteudo_processado"] for n in saida] == _sem_cache()
+
+
+def test_segunda_execucao_vem_toda_do_cache(tmp_path, monkeypatch, nlp_falso):
+    esperado = _sem_cache()
+    caminho = str(tmp_path / "cache_lemas.json.gz")
+    cache = pre_processamento.CacheLemas(100, caminho, "modelo-1")
+    list(pre_processamento.preprocessar_noticias_com_cache(_noticias(), cache, batch_size=1))
+    assert cache.misses == 3 and cache.hits == 2
+    cache.salvar()
+
+    def pipe_sem_textos(entradas, **kwargs):
+        for texto, _ in entradas:
+            raise AssertionError(f"texto em cache foi ao modelo: {texto}")
+        yield from ()
+
+    monkeypatch.setattr(nlp_falso, "pipe", pipe_sem_textos)
+    reaberto = pre_processamento.CacheLemas(100, caminho, "modelo-1")
+    saida = list(pre_processamento.preprocessar_noticias_com_cache(_noticias(), reaberto))
+
+    assert reaberto.hits == len(TEXTOS) and reaberto.misses == 0
+    assert [n["conteudo_processado"] for n in saida] == esperado
+
+
+def test_cache_de_outro_modelo_e_descartado(tmp_path):
+    caminho = str(tmp_path / "cache_lemas.json.gz")
+    cache = pre_processamento.CacheLemas(100, caminho, "modelo-1")
+    cache.gravar("chave", ["lema"])
+    cache.salvar()
+
+    assert pre_processamento.CacheLemas(100, caminho, "modelo-2").obter("chave") is None
+    assert pre_processamento.CacheLemas(100, caminho, "modelo-1").obter("chave") == ["lema"]
+
+
+def test_lru_por_texto():
+    cache = pre_processamento.CacheLemas(capacidade=2)
+    cache.gravar("a", ["1"])
+    cache.gravar("b", ["2"])
+    cache.obter("a")
+    cache.gravar("c", ["3"])
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") == ["1"] and cache.obter("c") == ["3"]
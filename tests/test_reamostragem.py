@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from reamostragem import _pearson_ponderado, _preparar, _spearman_ponderado, reamostrar_correlacoes
+
+
+def _dados(n=40, semente=1):
+    rng = np.random.default_rng(semente)
+    X = np.column_stack([rng.normal(size=n), rng.integers(-3, 4, size=n)])  # 2ª coluna com empates
+    Y = np.column_stack([X[:, 0] + rng.normal(size=n), rng.normal(size=n), np.round(rng.normal(size=n), 1)])
+    return X.astype(float), Y
+
+
+@pytest.mark.parametrize("metodo", ["pearson", "spearman"])
+def test_bootstrap_ponderado_igual_ao_scipy_na_amostra_sorteada(metodo):
+    X, Y = _dados()
+    n = len(X)
+    preparo = _preparar(X, Y, ("pearson", "spearman"))
+    rng = np.random.default_rng(7)
+    indices = rng.integers(0, n, size=(5, n))
+    pesos = np.stack([np.bincount(linha, minlength=n) for linha in indices]).astype(float)
+
+    calcular = _pearson_ponderado if metodo == "pearson" else _spearman_ponderado
+    funcao_scipy = stats.pearsonr if metodo == "pearson" else stats.spearmanr
+    r = calcular(pesos, preparo)
+
+    for replica, linha in enumerate(indices):
+        for i in range(X.shape[1]):
+            for j in range(Y.shape[1]):
+                esperado = funcao_scipy(X[linha, i], Y[linha, j])[0]
+                assert r[replica, i, j] == pytest.approx(esperado, abs=1e-10)
+
+
+def test_resultado_nao_depende_do_numero_de_processos():
+    X, Y = _dados(n=60)
+    df = pd.DataFrame(np.column_stack([X, Y]), columns=["x0", "x1", "y0", "y1", "y2"])
+    df["empresa"] = np.repeat(["A", "B", "C"], 20)
+    argumentos = dict(colunas_x=["x0", "x1"], colunas_y=["y0", "y1", "y2"], grupo="empresa",
+                      n_bootstrap=300, n_permutacoes=300, semente=123)
+
+    um = reamostrar_correlacoes(df, processos=1, **argumentos)
+    tres = reamostrar_correlacoes(df, processos=3, **argumentos)
+    pd.testing.assert_frame_equal(um, tres)
+
+
+def test_correlacao_observada_e_intervalo():
+    X, Y = _dados(n=80)
+    df = pd.DataFrame({"x": X[:, 0], "y": Y[:, 0]})
+    resultado = reamostrar_correlacoes(df, ["x"], ["y"], n_bootstrap=500, n_permutacoes=500).set_index("metodo")
+
+    assert resultado.loc["pearson", "correlacao"] == pytest.approx(stats.pearsonr(df.x, df.y)[0])
+    assert resultado.loc["spearman", "correlacao"] == pytest.approx(stats.spearmanr(df.x, df.y)[0])
+    for metodo in ("pearson", "spearman"):
+        linha = resultado.loc[metodo]
+        assert linha.ic_inferior < linha.correlacao < linha.ic_superior
+        assert 0 < linha.p_permutacao <= 1 / 501 + 1e-12  # correlação forte: nenhuma permutação a supera
@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import registros_io
+from registros_io import EscritorRegistros, exportar_json_legado, ler_registros, localizar, salvar_registros
+
+REGISTROS = [
+    {"empresa": "TOTVS", "url": "https://exemplo/1", "titulo": "Ação sobe", "conteudo": "ç ã é\nsegunda linha"},
+    {"empresa": "Locaweb", "url": None, "titulo": "", "numeros": [1, 2.5, None]},
+    {"empresa": "Intelbras", "url": "https://exemplo/3", "aninhado": {"a": {"b": True}}},
+]
+
+
+def _tocar(caminho, mtime):
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("")
+    os.utime(caminho, (mtime, mtime))
+
+
+@pytest.mark.parametrize("extensao", [".jsonl", ".jsonl.gz"])
+def test_ida_e_volta(tmp_path, monkeypatch, extensao):
+    monkeypatch.setattr(registros_io, "EXTENSAO_PADRAO", extensao)
+    monkeypatch.setattr(registros_io, "EXPORTAR_JSON_LEGADO", False)
+    base = str(tmp_path / "etapa")
+
+    caminho, total = salvar_registros(iter(REGISTROS), base)
+
+    assert caminho == base + extensao and total == len(REGISTROS)
+    assert list(ler_registros(caminho)) == REGISTROS
+    assert localizar(base) == caminho
+    assert not os.path.exists(base + ".json")
+    assert not os.path.exists(caminho + ".parcial")
+
+
+def test_gz_e_comprimido_no_disco(tmp_path):
+    caminho = str(tmp_path / "etapa.jsonl.gz")
+    with EscritorRegistros(caminho) as escritor:
+        escritor.escrever_todos(REGISTROS)
+
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        assert [json.loads(linha) for linha in f] == REGISTROS
+
+
+def test_parcial_mantido_em_caso_de_erro(tmp_path):
+    caminho = str(tmp_path / "etapa.jsonl")
+
+    with pytest.raises(RuntimeError):
+        with EscritorRegistros(caminho, intervalo_flush=1) as escritor:
+            escritor.escrever_todos(REGISTROS[:2])
+            raise RuntimeError("falha no meio da etapa")
+
+    assert not os.path.exists(caminho)
+    assert list(ler_registros(caminho + ".parcial")) == REGISTROS[:2]
+
+    # Uma nova execução bem-sucedida substitui o .parcial pelo arquivo final
+    with EscritorRegistros(caminho) as escritor:
+        escritor.escrever_todos(REGISTROS)
+    assert not os.path.exists(caminho + ".parcial")
+    assert list(ler_registros(caminho)) == REGISTROS
+
+
+def test_localizar_prefere_o_jsonl_mais_novo(tmp_path):
+    base = str(tmp_path / "etapa")
+    assert localizar(base) is None
+
+    _tocar(base + ".json", 1_000)
+    assert localizar(base) == base + ".json"
+
+    # O .json legado é sempre exportado por último, mas só vale sem JSONL
+    _tocar(base + ".jsonl", 2_000)
+    _tocar(base + ".jsonl.gz", 3_000)
+    os.utime(base + ".json", (4_000, 4_000))
+    assert localizar(base) == base + ".jsonl.gz"
+
+    os.utime(base + ".jsonl", (5_000, 5_000))
+    assert localizar(base) == base + ".jsonl"
+
+
+def test_exportar_json_legado(tmp_path):
+    origem = str(tmp_path / "etapa.jsonl")
+    with EscritorRegistros(origem) as escritor:
+        escritor.escrever_todos(REGISTROS)
+
+    destino = str(tmp_path / "etapa.json")
+    exportar_json_legado(origem, destino)
+    with open(destino, encoding="utf-8") as f:
+        assert json.load(f) == REGISTROS
+    assert list(ler_registros(destino)) == REGISTROS
+    assert not os.path.exists(destino + ".parcial")
+
+
+def test_exportar_json_legado_vazio(tmp_path):
+    origem = str(tmp_path / "vazio.jsonl")
+    with EscritorRegistros(origem):
+        pass
+
+    destino = str(tmp_path / "vazio.json")
+    exportar_json_legado(origem, destino)
+    with open(destino, encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_salvar_registros_exporta_json_legado(tmp_path, monkeypatch):
+    monkeypatch.setattr(registros_io, "EXTENSAO_PADRAO", ".jsonl.gz")
+    monkeypatch.setattr(registros_io, "EXPORTAR_JSON_LEGADO", True)
+    base = str(tmp_path / "etapa")
+
+    salvar_registros(REGISTROS, base)
+
+    assert list(ler_registros(base + ".json")) == REGISTROS
+    # O JSONL continua sendo a entrada da etapa seguinte
+    assert localizar(base) == base + ".jsonl.gz"